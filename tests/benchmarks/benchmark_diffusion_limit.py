@@ -0,0 +1,105 @@
+"""
+Benchmark of the technology diffusion limit with knowledge spillover. The dataset of test_5b is extended to a synthetic
+number of nodes and optimized years and the time and the number of nonzeros of the diffusion limit constraints are
+reported for each size.
+
+Usage: python benchmark_diffusion_limit.py --nodes 10 20 40 80 --years 5 10 20
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from zen_garden.model.default_config import Config
+from zen_garden.model.objects.technology.technology import TechnologyRules
+from zen_garden.model.optimization_setup import OptimizationSetup
+from zen_garden.utils import InputDataChecks
+
+DATASET = os.path.join(os.path.dirname(__file__), "..", "testcases", "test_5b")
+CONSTRAINTS = ["constraint_technology_diffusion_limit", "constraint_technology_diffusion_limit_total", "constraint_capacity_addition_all_nodes",
+               "constraint_knowledge", "constraint_knowledge_all_nodes"]
+
+
+def create_dataset(folder, n_nodes, n_years):
+    """ creates a copy of test_5b with a synthetic number of nodes and years, the nodes are connected by a chain of pipelines
+
+    :param folder: folder in which the dataset is created
+    :param n_nodes: number of nodes
+    :param n_years: number of optimized years
+    :return: path of the dataset """
+    dataset = os.path.join(folder, f"diffusion_{n_nodes}_nodes_{n_years}_years")
+    shutil.copytree(DATASET, dataset)
+    nodes = [f"N{i}" for i in range(n_nodes)]
+    pd.DataFrame({"node": nodes, "lon": np.arange(n_nodes) % 10, "lat": np.arange(n_nodes) // 10}).to_csv(os.path.join(dataset, "energy_system", "set_nodes.csv"), index=False)
+    edges = [(nodes[i], nodes[j]) for i in range(n_nodes - 1) for i, j in [(i, i + 1), (i + 1, i)]]
+    pd.DataFrame({"edge": [f"{i}-{j}" for i, j in edges], "node_from": [i for i, _ in edges], "node_to": [j for _, j in edges]}).to_csv(os.path.join(dataset, "energy_system", "set_edges.csv"), index=False)
+    pd.DataFrame({"time": [0], **{node: [10] for node in nodes}}).to_csv(os.path.join(dataset, "set_carriers", "heat", "demand.csv"), index=False)
+    os.remove(os.path.join(dataset, "set_carriers", "heat", "demand_yearly_variation.csv"))
+    # existing capacities only for the boiler at all nodes
+    pd.DataFrame({"node": nodes, "year_construction": 2015, "capacity_existing": 10}).to_csv(
+        os.path.join(dataset, "set_technologies", "set_conversion_technologies", "natural_gas_boiler", "capacity_existing.csv"), index=False)
+    os.remove(os.path.join(dataset, "set_technologies", "set_transport_technologies", "natural_gas_pipeline", "capacity_existing.csv"))
+    with open(os.path.join(dataset, "system.json")) as file:
+        system = json.load(file)
+    system["set_nodes"] = nodes
+    system["optimized_years"] = n_years
+    with open(os.path.join(dataset, "system.json"), "w") as file:
+        json.dump(system, file, indent=4)
+    return dataset
+
+
+def run_benchmark(dataset):
+    """ constructs the optimization problem and measures the diffusion limit constraints
+
+    :param dataset: path of the dataset
+    :return: time to construct the diffusion limit constraints and their number of nonzeros """
+    config = Config()
+    config.analysis.dataset = os.path.abspath(dataset)
+    config.solver.name = "highs"
+    config.solver.analyze_numerics = False
+    input_data_checks = InputDataChecks(config=config, optimization_setup=None)
+    input_data_checks.check_dataset()
+    input_data_checks.read_system_file(config)
+    input_data_checks.check_technology_selections()
+    input_data_checks.check_year_definitions()
+    optimization_setup = OptimizationSetup(config, scenario_dict={}, input_data_checks=input_data_checks)
+    optimization_setup.get_optimization_horizon()
+    optimization_setup.overwrite_time_indices(0)
+    # time the construction of the diffusion limit constraints
+    timing = {}
+    constraint_technology_diffusion_limit = TechnologyRules.constraint_technology_diffusion_limit
+    def timed_constraint(rules):
+        t0 = time.perf_counter()
+        constraint_technology_diffusion_limit(rules)
+        timing["time"] = time.perf_counter() - t0
+    TechnologyRules.constraint_technology_diffusion_limit = timed_constraint
+    try:
+        optimization_setup.construct_optimization_problem()
+    finally:
+        TechnologyRules.constraint_technology_diffusion_limit = constraint_technology_diffusion_limit
+    model = optimization_setup.model
+    nonzeros = sum(int(((model.constraints[name].vars != -1) & (model.constraints[name].labels != -1)).sum()) for name in CONSTRAINTS if name in model.constraints)
+    return timing["time"], nonzeros
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of the technology diffusion limit with knowledge spillover")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10, 20, 40, 80], help="numbers of nodes")
+    parser.add_argument("--years", type=int, nargs="+", default=[5], help="numbers of optimized years")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for n_years in args.years:
+            for n_nodes in args.nodes:
+                dataset = create_dataset(folder, n_nodes, n_years)
+                construction_time, nonzeros = run_benchmark(dataset)
+                results.append({"nodes": n_nodes, "years": n_years, "time [s]": round(construction_time, 3), "nonzeros": nonzeros,
+                                "nonzeros per node and year": round(nonzeros / n_nodes / n_years, 1)})
+    print(pd.DataFrame(results).to_string(index=False))
@@ -0,0 +1,76 @@
+"""
+Benchmark of the reconstruction of the full timeseries of storage level components in Results.get_full_ts. A synthetic
+storage level with a number of storage units, years and hours per year is reconstructed with the previous implementation,
+which interpolates each year in a separate dataframe, and with the vectorized implementation. The time of both
+implementations is reported and the outputs are checked for equality.
+
+Usage: python benchmark_full_ts_storage.py --storage_units 10 100 1000 --years 5 --hours 8760
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from zen_garden.postprocess.results.results import Results
+
+
+def create_storage_level(n_storage_units, n_years, n_hours, n_periods=8, seed=0):
+    """ creates a synthetic storage level with a sequence of storage time steps as in the time series aggregation, i.e.,
+    each year is split into periods of consecutive hours that share a storage time step
+
+    :param n_storage_units: number of storage units
+    :param n_years: number of years
+    :param n_hours: number of hours per year
+    :param n_periods: number of storage time steps per year
+    :param seed: seed of the random values
+    :return: storage level with the storage time steps as columns, sequence of storage time steps, start and end time steps of each year """
+    rng = np.random.default_rng(seed)
+    period_length = n_hours // n_periods
+    sequence_year = np.minimum(np.arange(n_hours) // period_length, n_periods - 1)
+    sequence_timesteps = pd.Series(np.concatenate([sequence_year + year * n_periods for year in range(n_years)]))
+    index = pd.MultiIndex.from_product([[f"storage_{i}" for i in range(n_storage_units)], ["node_0"]], names=["technology", "node"])
+    series = pd.DataFrame(rng.random((n_storage_units, n_years * n_periods)), index=index, columns=range(n_years * n_periods))
+    time_steps_start_end = {year * n_periods: (year + 1) * n_periods - 1 for year in range(n_years)}
+    return series, sequence_timesteps, time_steps_start_end
+
+
+def get_full_ts_storage_level_loop(series, sequence_timesteps, time_steps_start_end):
+    """ previous reconstruction of the full timeseries of a storage level, with a dataframe per year
+
+    :param series: values of the component with the storage time steps as columns
+    :param sequence_timesteps: sequence of the storage time steps in the full timeseries
+    :param time_steps_start_end: first storage time step of each year and the corresponding last storage time step
+    :return: full timeseries """
+    last_occurrences = sequence_timesteps.groupby(sequence_timesteps).apply(lambda x: x.index[-1])
+    first_occurrences = sequence_timesteps.groupby(sequence_timesteps).apply(lambda x: x.index[0])
+    output_df = series[last_occurrences.index].rename(last_occurrences, axis=1)
+    output_df = output_df.reindex(columns=sequence_timesteps.index)
+    for tstart, tend in time_steps_start_end.items():
+        tstart_reconstructed = first_occurrences[tstart]
+        first_valid_timestep = output_df.loc[:, tstart_reconstructed:].T.first_valid_index()
+        df_temp = pd.DataFrame(index=series.index, columns=range(tstart_reconstructed - 1, first_valid_timestep + 1), dtype=float)
+        df_temp.loc[:, tstart_reconstructed - 1] = series.loc[:, tend]
+        df_temp.loc[:, first_valid_timestep] = series.loc[:, sequence_timesteps[first_valid_timestep]]
+        df_temp = df_temp.interpolate(method='index', axis=1)
+        output_df.loc[:, first_occurrences[tstart]:last_occurrences[tstart]] = df_temp.loc[:, tstart_reconstructed:first_valid_timestep]
+    return output_df.interpolate(method='index', axis=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of the full timeseries of storage level components")
+    parser.add_argument("--storage_units", type=int, nargs="+", default=[10, 100, 1000], help="numbers of storage units")
+    parser.add_argument("--years", type=int, default=5, help="number of years")
+    parser.add_argument("--hours", type=int, default=8760, help="number of hours per year")
+    args = parser.parse_args()
+    results = []
+    for n_storage_units in args.storage_units:
+        series, sequence_timesteps, time_steps_start_end = create_storage_level(n_storage_units, args.years, args.hours)
+        t0 = time.perf_counter()
+        expected = get_full_ts_storage_level_loop(series, sequence_timesteps, time_steps_start_end)
+        t1 = time.perf_counter()
+        actual = Results._get_full_ts_storage_level(series, sequence_timesteps, time_steps_start_end)
+        t2 = time.perf_counter()
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+        results.append({"storage units": n_storage_units, "loop [s]": round(t1 - t0, 3), "vectorized [s]": round(t2 - t1, 3), "speedup": round((t1 - t0) / (t2 - t1), 1)})
+    print(pd.DataFrame(results).to_string(index=False))
@@ -0,0 +1,73 @@
+"""
+Benchmark of the apis to pass the optimization problem to the solver. The problem of a dataset is constructed once and
+solved with each io_api. For each api, the wall time of the solver call, the solving time reported by the solver and the
+difference, i.e., the time to write, read and hand off the model, are reported.
+
+Usage: python benchmark_io_api.py --dataset ../testcases/test_1a --io_apis lp mps direct --repetitions 3
+"""
+import argparse
+import logging
+import os
+
+import pandas as pd
+
+from zen_garden.model.default_config import Config
+from zen_garden.model.optimization_setup import OptimizationSetup
+from zen_garden.utils import InputDataChecks
+
+DATASET = os.path.join(os.path.dirname(__file__), "..", "testcases", "test_1a")
+
+
+def construct_problem(dataset, solver_name):
+    """ constructs the optimization problem of a dataset
+
+    :param dataset: path of the dataset
+    :param solver_name: name of the solver
+    :return: optimization setup with the constructed problem """
+    config = Config()
+    config.analysis.dataset = os.path.abspath(dataset)
+    config.solver.name = solver_name
+    config.solver.analyze_numerics = False
+    config.solver.use_scaling = False
+    input_data_checks = InputDataChecks(config=config, optimization_setup=None)
+    input_data_checks.check_dataset()
+    input_data_checks.read_system_file(config)
+    input_data_checks.check_technology_selections()
+    input_data_checks.check_year_definitions()
+    optimization_setup = OptimizationSetup(config, scenario_dict={}, input_data_checks=input_data_checks)
+    optimization_setup.get_optimization_horizon()
+    optimization_setup.overwrite_time_indices(0)
+    optimization_setup.construct_optimization_problem()
+    return optimization_setup
+
+
+def get_solving_time(optimization_setup):
+    """ returns the solving time reported by the solver
+
+    :param optimization_setup: optimization setup of the solved problem
+    :return: solving time """
+    if optimization_setup.solver.name == "highs":
+        return optimization_setup.model.solver_model.getRunTime()
+    elif optimization_setup.solver.name == "gurobi":
+        return optimization_setup.model.solver_model.Runtime
+    raise NotImplementedError(f"Solving time of solver {optimization_setup.solver.name} is not implemented")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of the apis to pass the optimization problem to the solver")
+    parser.add_argument("--dataset", type=str, default=DATASET, help="path of the dataset")
+    parser.add_argument("--solver", type=str, default="highs", help="name of the solver")
+    parser.add_argument("--io_apis", type=str, nargs="+", default=["lp", "mps", "direct"], help="apis to compare")
+    parser.add_argument("--repetitions", type=int, default=3, help="number of solves per api")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    optimization_setup = construct_problem(args.dataset, args.solver)
+    results = []
+    for io_api in args.io_apis:
+        optimization_setup.solver.io_api = io_api
+        for repetition in range(args.repetitions):
+            optimization_setup.solve()
+            solving_time = get_solving_time(optimization_setup)
+            results.append({"io_api": io_api, "solver call [s]": optimization_setup.solve_time, "solving [s]": solving_time,
+                            "model handoff [s]": optimization_setup.solve_time - solving_time, "objective": optimization_setup.model.objective.value})
+    print(pd.DataFrame(results).groupby("io_api", sort=False).mean().round(4).to_string())
@@ -0,0 +1,190 @@
+"""
+Benchmark suite of the pipeline of ZEN-garden on synthetic datasets. For each size, the dataset is generated and the
+phases of the pipeline (reading the input data, constructing the optimization problem, scaling, solving and postprocessing)
+are run one after another. The wall time and the peak resident memory of each phase are stored in a json file.
+With --baseline, the results are compared to a previous json file and the benchmark fails if a phase regressed.
+
+Usage: python run_benchmarks.py --nodes 10 50 --time_steps 24 168 --output benchmark_results.json --baseline benchmark_baseline.json
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import linopy
+import psutil
+
+from synthetic_dataset import create_synthetic_dataset
+from zen_garden.model.default_config import Config
+from zen_garden.model.optimization_setup import OptimizationSetup
+from zen_garden.postprocess.postprocess import Postprocess
+from zen_garden.utils import InputDataChecks
+
+PHASES = ["read_input", "construct", "scaling", "solve", "postprocess"]
+
+
+class PhaseMonitor:
+    """
+    Context manager that measures the wall time and the peak resident memory of a phase. The memory is sampled by a
+    background thread
+    """
+    def __init__(self, interval=0.01):
+        """ initializes the monitor
+
+        :param interval: sampling interval of the memory in seconds """
+        self.interval = interval
+        self.process = psutil.Process(os.getpid())
+        self.results = {}
+
+    def phase(self, name):
+        """ returns a context manager which measures the phase
+
+        :param name: name of the phase
+        :return: context manager of the phase """
+        monitor = self
+
+        class Phase:
+            def __enter__(self):
+                self.stop = threading.Event()
+                self.rss_start = monitor.process.memory_info().rss
+                self.peak_rss = self.rss_start
+                self.thread = threading.Thread(target=self.sample, daemon=True)
+                self.thread.start()
+                self.t0 = time.perf_counter()
+
+            def sample(self):
+                while not self.stop.wait(monitor.interval):
+                    self.peak_rss = max(self.peak_rss, monitor.process.memory_info().rss)
+
+            def __exit__(self, *args):
+                wall_time = time.perf_counter() - self.t0
+                self.stop.set()
+                self.thread.join()
+                rss_end = monitor.process.memory_info().rss
+                self.peak_rss = max(self.peak_rss, rss_end)
+                monitor.results[name] = {
+                    "wall_time": wall_time,
+                    "peak_rss_mb": self.peak_rss / 1024 ** 2,
+                    "rss_increase_mb": (self.peak_rss - self.rss_start) / 1024 ** 2,
+                }
+
+        return Phase()
+
+
+def run_pipeline(dataset, solver_name, folder_output):
+    """ runs the phases of the pipeline on a dataset
+
+    :param dataset: path of the dataset
+    :param solver_name: name of the solver
+    :param folder_output: folder of the results
+    :return: measurements of the phases and size of the optimization problem """
+    config = Config()
+    config.analysis.dataset = os.path.abspath(dataset)
+    config.analysis.folder_output = folder_output
+    config.solver.name = solver_name
+    config.solver.solver_dir = os.path.join(folder_output, "solver_files")
+    monitor = PhaseMonitor()
+    with monitor.phase("read_input"):
+        input_data_checks = InputDataChecks(config=config, optimization_setup=None)
+        input_data_checks.check_dataset()
+        input_data_checks.read_system_file(config)
+        input_data_checks.check_technology_selections()
+        input_data_checks.check_year_definitions()
+        optimization_setup = OptimizationSetup(config, scenario_dict={}, input_data_checks=input_data_checks)
+        optimization_setup.get_optimization_horizon()
+        optimization_setup.overwrite_time_indices(0)
+    with monitor.phase("construct"):
+        optimization_setup.construct_optimization_problem()
+    with monitor.phase("scaling"):
+        if optimization_setup.solver.use_scaling:
+            optimization_setup.scaling.run_scaling()
+    with monitor.phase("solve"):
+        optimization_setup.solve()
+    assert optimization_setup.optimality, f"The synthetic dataset {dataset} is not optimal"
+    with monitor.phase("postprocess"):
+        if optimization_setup.solver.use_scaling:
+            optimization_setup.scaling.re_scale()
+        Postprocess(optimization_setup, scenarios=config.scenarios, subfolder=Path(""), model_name=os.path.basename(dataset))
+    model = optimization_setup.model
+    problem = {
+        "number_variables": int(model.variables.nvars),
+        "number_constraints": int(model.constraints.ncons),
+        "objective_value": float(model.objective.value),
+    }
+    return monitor.results, problem
+
+
+def compare_to_baseline(results, baseline, tolerance_time, tolerance_memory):
+    """ compares the results to a baseline and returns the regressions
+
+    :param results: results of the benchmark
+    :param baseline: results of a previous benchmark
+    :param tolerance_time: allowed relative increase of the wall time
+    :param tolerance_memory: allowed relative increase of the peak memory
+    :return: list of regressions """
+    baseline_runs = {json.dumps(run["parameters"], sort_keys=True): run for run in baseline["runs"]}
+    regressions = []
+    for run in results["runs"]:
+        baseline_run = baseline_runs.get(json.dumps(run["parameters"], sort_keys=True))
+        if baseline_run is None:
+            continue
+        for phase, measurement in run["phases"].items():
+            if phase not in baseline_run["phases"]:
+                continue
+            baseline_measurement = baseline_run["phases"][phase]
+            for key, tolerance in [("wall_time", tolerance_time), ("peak_rss_mb", tolerance_memory)]:
+                if measurement[key] > baseline_measurement[key] * (1 + tolerance):
+                    regressions.append(f"{run['parameters']} {phase} {key}: {baseline_measurement[key]:.3f} -> {measurement[key]:.3f}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark suite of the pipeline of ZEN-garden on synthetic datasets")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10], help="numbers of nodes")
+    parser.add_argument("--edges", type=int, nargs="+", default=[None], help="numbers of connections between nodes, by default a ring")
+    parser.add_argument("--technologies", type=int, nargs="+", default=[2], help="numbers of conversion technologies")
+    parser.add_argument("--carriers", type=int, nargs="+", default=[2], help="numbers of carriers")
+    parser.add_argument("--years", type=int, nargs="+", default=[1], help="numbers of optimized years")
+    parser.add_argument("--time_steps", type=int, nargs="+", default=[24], help="numbers of time steps per year")
+    parser.add_argument("--solver", type=str, default="highs", help="name of the solver")
+    parser.add_argument("--output", type=str, default="benchmark_results.json", help="path of the json file of the results")
+    parser.add_argument("--baseline", type=str, default=None, help="path of the json file of a previous benchmark")
+    parser.add_argument("--tolerance_time", type=float, default=0.25, help="allowed relative increase of the wall time")
+    parser.add_argument("--tolerance_memory", type=float, default=0.1, help="allowed relative increase of the peak memory")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "linopy": linopy.__version__, "cpu_count": os.cpu_count()},
+        "runs": [],
+    }
+    cwd = os.getcwd()
+    output = os.path.abspath(args.output)
+    with tempfile.TemporaryDirectory() as folder:
+        # the postprocessing stores the path of the dataset relative to the working directory
+        os.chdir(folder)
+        for nodes, edges, technologies, carriers, years, time_steps in itertools.product(args.nodes, args.edges, args.technologies, args.carriers, args.years, args.time_steps):
+            parameters = {"nodes": nodes, "edges": edges, "technologies": technologies, "carriers": carriers, "years": years, "time_steps": time_steps}
+            dataset = create_synthetic_dataset(folder, **parameters)
+            phases, problem = run_pipeline(dataset, args.solver, os.path.join(folder, "outputs"))
+            results["runs"].append({"parameters": parameters, "problem": problem, "phases": phases})
+            print(parameters, " ".join(f"{phase}: {phases[phase]['wall_time']:.2f}s/{phases[phase]['peak_rss_mb']:.0f}MB" for phase in PHASES))
+        os.chdir(cwd)
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare_to_baseline(results, baseline, args.tolerance_time, args.tolerance_memory)
+        if regressions:
+            print("Regressions compared to the baseline:\n" + "\n".join(regressions))
+            sys.exit(1)
+        print("No regressions compared to the baseline")
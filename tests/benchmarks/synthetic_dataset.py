@@ -0,0 +1,129 @@
+"""
+Generator of synthetic datasets in the folder layout of ZEN-garden. The attributes of the elements are taken from the
+dataset of test_1a, the sets, the network and the time series are scaled by the parameters of the generator.
+
+The dataset consists of
+- one demand carrier "heat" and carriers - 1 importable fuels
+- a number of conversion technologies, each converting one of the fuels to heat
+- one pipeline and one storage technology per fuel
+- a network of nodes connected by a ring and additional random edges in both directions
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+TEMPLATE = os.path.join(os.path.dirname(__file__), "..", "testcases", "test_1a")
+
+
+def _read_attributes(*path):
+    """ reads the attributes of an element of the template dataset
+
+    :param path: path of the element folder relative to the template dataset
+    :return: attributes of the element """
+    with open(os.path.join(TEMPLATE, *path, "attributes.json")) as file:
+        return json.load(file)
+
+
+def _write_element(dataset, attributes, *path):
+    """ writes the attributes of an element
+
+    :param dataset: path of the dataset
+    :param attributes: attributes of the element
+    :param path: path of the element folder relative to the dataset
+    :return: path of the element folder """
+    folder = os.path.join(dataset, *path)
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, "attributes.json"), "w") as file:
+        json.dump(attributes, file, indent=2)
+    return folder
+
+
+def create_synthetic_dataset(folder, nodes=10, edges=None, technologies=2, carriers=2, years=1, time_steps=24, seed=0):
+    """ creates a synthetic dataset
+
+    :param folder: folder in which the dataset is created
+    :param nodes: number of nodes
+    :param edges: number of connections between two nodes, each connection is an edge in both directions. If None, the nodes are connected by a ring
+    :param technologies: number of conversion technologies
+    :param carriers: number of carriers, i.e., heat and carriers - 1 fuels
+    :param years: number of optimized years
+    :param time_steps: number of time steps per year
+    :param seed: seed of the random generator
+    :return: path of the dataset """
+    assert nodes >= 2, "The dataset needs at least two nodes"
+    assert carriers >= 2, "The dataset needs at least one fuel and the demand carrier"
+    assert technologies >= 1, "The dataset needs at least one conversion technology"
+    rng = np.random.default_rng(seed)
+    dataset = os.path.join(folder, f"synthetic_{nodes}n_{edges}e_{technologies}t_{carriers}c_{years}y_{time_steps}ts")
+    if os.path.exists(dataset):
+        shutil.rmtree(dataset)
+    # energy system with the network
+    shutil.copytree(os.path.join(TEMPLATE, "energy_system"), os.path.join(dataset, "energy_system"))
+    set_nodes = [f"N{i}" for i in range(nodes)]
+    angle = 2 * np.pi * np.arange(nodes) / nodes
+    pd.DataFrame({"node": set_nodes, "lon": 10 + 5 * np.cos(angle), "lat": 50 + 5 * np.sin(angle)}).to_csv(
+        os.path.join(dataset, "energy_system", "set_nodes.csv"), index=False)
+    connections = [(i, (i + 1) % nodes) for i in range(nodes if nodes > 2 else 1)]
+    n_connections = len(connections) if edges is None else edges
+    candidates = [(i, j) for i in range(nodes) for j in range(i + 2, nodes) if (i, j) != (0, nodes - 1)]
+    n_additional = min(max(n_connections - len(connections), 0), len(candidates))
+    connections += [candidates[k] for k in rng.choice(len(candidates), n_additional, replace=False)]
+    connections = connections[:max(n_connections, 1)]
+    set_edges = [(set_nodes[i], set_nodes[j]) for connection in connections for i, j in [connection, connection[::-1]]]
+    pd.DataFrame({"edge": [f"{i}-{j}" for i, j in set_edges], "node_from": [i for i, _ in set_edges], "node_to": [j for _, j in set_edges]}).to_csv(
+        os.path.join(dataset, "energy_system", "set_edges.csv"), index=False)
+    time = np.arange(time_steps)
+    # demand carrier with a daily profile
+    _write_element(dataset, _read_attributes("set_carriers", "heat"), "set_carriers", "heat")
+    profile = 1 + 0.3 * np.sin(2 * np.pi * time / 24)
+    demand = pd.DataFrame({node: np.round(rng.uniform(5, 50) * profile, 3) for node in set_nodes}, index=pd.Index(time, name="time"))
+    demand.to_csv(os.path.join(dataset, "set_carriers", "heat", "demand.csv"))
+    # fuels with different import prices
+    fuels = [f"fuel_{i}" for i in range(carriers - 1)]
+    for fuel in fuels:
+        attributes = _read_attributes("set_carriers", "natural_gas")
+        attributes["price_import"]["default_value"] = round(float(rng.uniform(15, 40)), 2)
+        folder_fuel = _write_element(dataset, attributes, "set_carriers", fuel)
+        price = pd.DataFrame({node: np.round(attributes["price_import"]["default_value"] * (1 + 0.1 * np.sin(2 * np.pi * (time + i) / 24)), 3)
+                              for i, node in enumerate(set_nodes)}, index=pd.Index(time, name="time"))
+        price.to_csv(os.path.join(folder_fuel, "price_import.csv"))
+    # conversion technologies
+    conversion_technologies = [f"boiler_{i}" for i in range(technologies)]
+    for i, technology in enumerate(conversion_technologies):
+        fuel = fuels[i % len(fuels)]
+        attributes = _read_attributes("set_technologies", "set_conversion_technologies", "natural_gas_boiler")
+        attributes["input_carrier"]["default_value"] = [fuel]
+        attributes["conversion_factor"] = {fuel: {"default_value": round(float(rng.uniform(1.05, 1.5)), 3), "unit": "GWh/GWh"}}
+        attributes["capex_specific_conversion"]["default_value"] = round(float(rng.uniform(500, 1000)), 1)
+        _write_element(dataset, attributes, "set_technologies", "set_conversion_technologies", technology)
+    # transport and storage technologies of the fuels
+    transport_technologies = [f"{fuel}_pipeline" for fuel in fuels]
+    storage_technologies = [f"{fuel}_storage" for fuel in fuels]
+    for fuel, transport_technology, storage_technology in zip(fuels, transport_technologies, storage_technologies):
+        attributes = _read_attributes("set_technologies", "set_transport_technologies", "natural_gas_pipeline")
+        attributes["reference_carrier"]["default_value"] = [fuel]
+        _write_element(dataset, attributes, "set_technologies", "set_transport_technologies", transport_technology)
+        attributes = _read_attributes("set_technologies", "set_storage_technologies", "natural_gas_storage")
+        attributes["reference_carrier"]["default_value"] = [fuel]
+        _write_element(dataset, attributes, "set_technologies", "set_storage_technologies", storage_technology)
+    # system
+    system = {
+        "set_conversion_technologies": conversion_technologies,
+        "set_storage_technologies": storage_technologies,
+        "set_transport_technologies": transport_technologies,
+        "set_nodes": set_nodes,
+        "reference_year": 2022,
+        "unaggregated_time_steps_per_year": time_steps,
+        "aggregated_time_steps_per_year": time_steps,
+        "conduct_time_series_aggregation": False,
+        "optimized_years": years,
+        "interval_between_years": 1,
+        "use_rolling_horizon": False,
+        "years_in_rolling_horizon": 1
+    }
+    with open(os.path.join(dataset, "system.json"), "w") as file:
+        json.dump(system, file, indent=4)
+    return dataset
@@ -1,6 +1,7 @@
 import json
 import os
 import re
+import shutil
 import warnings
 from collections import defaultdict
 from copy import deepcopy
@@ -154,6 +155,169 @@ def test_1a(config, folder_path):
     check_get_total_get_full_ts(res)
 
 
+def test_1a_metadata_index(config, folder_path):
+    # run the test and read the results with and without the metadata index
+    data_set_name = "test_1a"
+    folder_output = os.path.join("outputs", "test_1a_metadata_index")
+    main(
+        config=config, dataset_path=os.path.join(folder_path, data_set_name), folder_output_path=folder_output
+    )
+    res = Results(os.path.join(folder_output, data_set_name))
+    # the dictionary-encoded units are decoded with the dictionary of the index or of the file
+    units = res.get_unit("flow_import", droplevel=False)
+    assert units.dtype == "category"
+    index_path = os.path.join(folder_output, data_set_name, "metadata_index.json")
+    os.remove(index_path)
+    res_without_index = Results(os.path.join(folder_output, data_set_name))
+    res_without_index.invalidate_cache()
+    assert units.equals(res_without_index.get_unit("flow_import", droplevel=False))
+    components = res.solution_loader.components
+    components_without_index = res_without_index.solution_loader.components
+    assert components.keys() == components_without_index.keys()
+    for name, component in components.items():
+        component_without_index = components_without_index[name]
+        assert component.index_names == component_without_index.index_names
+        assert component.doc == component_without_index.doc
+        assert component.has_units == component_without_index.has_units
+    assert res.get_df("capacity").equals(res_without_index.get_df("capacity"))
+
+
+def test_1a_results_cache(config, folder_path):
+    # run the test and check the hits, eviction and invalidation of the cache of the results
+    data_set_name = "test_1a"
+    folder_output = os.path.join("outputs", "test_1a_results_cache")
+    main(
+        config=config, dataset_path=os.path.join(folder_path, data_set_name), folder_output_path=folder_output
+    )
+    res = Results(os.path.join(folder_output, data_set_name))
+    res.invalidate_cache()
+    res.get_df("capacity")
+    cache_info = res.get_cache_info()
+    capacity = res.get_df("capacity")
+    assert res.get_cache_info()["hits"] == cache_info["hits"] + 1
+    assert res.get_cache_info()["nbytes"] <= res.get_cache_info()["max_bytes"]
+    # the budget is exceeded by the data frames of a single component
+    res = Results(os.path.join(folder_output, data_set_name), cache_max_bytes=1)
+    assert res.get_df("capacity").equals(capacity)
+    assert res.get_cache_info()["entries"] == 0
+    res = Results(os.path.join(folder_output, data_set_name), cache_max_bytes=2 ** 30)
+    res.get_df("capacity")
+    assert res.get_cache_info()["entries"] > 0
+    res.invalidate_cache()
+    assert res.get_cache_info()["entries"] == 0
+
+
+def test_1a_batch(config, folder_path):
+    # run the test and compare the batched queries with the single queries
+    data_set_name = "test_1a"
+    folder_output = os.path.join("outputs", "test_1a_batch")
+    main(
+        config=config, dataset_path=os.path.join(folder_path, data_set_name), folder_output_path=folder_output
+    )
+    res = Results(os.path.join(folder_output, data_set_name))
+    batch = res.get_batch({"capacity": "capacity", "capacity_boiler": ("capacity", "natural_gas_boiler"), "missing": "not_a_component"}, method="total")
+    assert batch["capacity"].equals(res.get_total("capacity"))
+    assert batch["capacity_boiler"].equals(res.get_total("capacity", index="natural_gas_boiler"))
+    assert batch["missing"].empty
+    batch = res.get_batch(["demand", "flow_conversion_output"], method="full_ts", year=0, max_workers=2)
+    assert batch["demand"].equals(res.get_full_ts("demand", year=0))
+    assert batch["flow_conversion_output"].equals(res.get_full_ts("flow_conversion_output", year=0))
+    assert res.get_batch(["capacity"])["capacity"].equals(res.get_df("capacity"))
+    energy_balance = res.get_energy_balance_dataframes(node=res.get_total("demand").index.get_level_values("node")[0], carrier="heat", year=0)
+    assert "demand" in energy_balance
+
+
+def test_1a_parquet(config, folder_path):
+    # run the test with the results written in the Parquet format
+    config.analysis.output_format = "parquet"
+    data_set_name = "test_1a"
+    folder_output = os.path.join("outputs", "test_1a_parquet")
+    main(
+        config=config, dataset_path=os.path.join(folder_path, data_set_name), folder_output_path=folder_output
+    )
+
+    # read the results and check again
+    res = Results(os.path.join(folder_output, data_set_name))
+    compare_variables_results(data_set_name, res, folder_path)
+    check_get_total_get_full_ts(res)
+    dataset = res.get_dataset("capacity")
+    assert dataset.count_rows() == len(res.get_df("capacity"))
+
+
+def test_1a_input_data_cache(config, folder_path):
+    # run the test twice, the second run reads the input data from the cache
+    config.analysis.use_input_data_cache = True
+    config.analysis.folder_input_data_cache = os.path.join("outputs", "input_data_cache")
+    data_set_name = "test_1a"
+    folder_output = os.path.join("outputs", "test_1a_input_data_cache")
+    for _ in range(2):
+        optimization_setup = main(
+            config=config, dataset_path=os.path.join(folder_path, data_set_name), folder_output_path=folder_output
+        )
+    config.analysis.use_input_data_cache = False
+    assert optimization_setup.input_data_cache.misses == 0
+
+    # read the results and check again
+    res = Results(os.path.join(folder_output, data_set_name))
+    compare_variables_results(data_set_name, res, folder_path)
+
+
+def test_1a_profiling(config, folder_path):
+    # run the test with the profiler
+    config.solver.run_profiling = True
+    data_set_name = "test_1a"
+    folder_output = os.path.join("outputs", "test_1a_profiling")
+    optimization_setup = main(
+        config=config, dataset_path=os.path.join(folder_path, data_set_name), folder_output_path=folder_output
+    )
+    config.solver.run_profiling = False
+    with open(os.path.join(folder_output, data_set_name, "profile.json")) as file:
+        records = json.load(file)["records"]
+    phases = {record["name"]: record for record in records if record["category"] == "phase"}
+    for phase in ["read_input_csv", "construct_vars", "construct_constraints", "solve", "postprocess"]:
+        assert phase in phases
+    model = optimization_setup.model
+    assert phases["construct_vars"]["variables"] == sum(int((model.variables[name].labels != -1).sum()) for name in model.variables)
+    assert phases["construct_constraints"]["constraints"] == sum(int((model.constraints[name].labels != -1).sum()) for name in model.constraints)
+    assert any(record["category"] == "rule" for record in records)
+
+    # read the results and check again
+    res = Results(os.path.join(folder_output, data_set_name))
+    compare_variables_results(data_set_name, res, folder_path)
+
+
+def test_full_ts_storage_level_nan():
+    # the vectorized full timeseries of storage levels matches the previous loop over the years, also with nan rows
+    def get_full_ts_storage_level_loop(series, sequence_timesteps, time_steps_start_end):
+        last_occurrences = sequence_timesteps.groupby(sequence_timesteps).apply(lambda x: x.index[-1])
+        first_occurrences = sequence_timesteps.groupby(sequence_timesteps).apply(lambda x: x.index[0])
+        output_df = series[last_occurrences.index].rename(last_occurrences, axis=1)
+        output_df = output_df.reindex(columns=sequence_timesteps.index)
+        for tstart, tend in time_steps_start_end.items():
+            tstart_reconstructed = first_occurrences[tstart]
+            first_valid_timestep = output_df.loc[:, tstart_reconstructed:].T.first_valid_index()
+            df_temp = pd.DataFrame(index=series.index, columns=range(tstart_reconstructed - 1, first_valid_timestep + 1), dtype=float)
+            df_temp.loc[:, tstart_reconstructed - 1] = series.loc[:, tend]
+            df_temp.loc[:, first_valid_timestep] = series.loc[:, sequence_timesteps[first_valid_timestep]]
+            df_temp = df_temp.interpolate(method="index", axis=1)
+            output_df.loc[:, first_occurrences[tstart]:last_occurrences[tstart]] = df_temp.loc[:, tstart_reconstructed:first_valid_timestep]
+        return output_df.interpolate(method="index", axis=1)
+
+    # two years with three storage time steps of four hours each
+    sequence_timesteps = pd.Series(np.repeat(np.arange(6), 4))
+    time_steps_start_end = {0: 2, 3: 5}
+    index = pd.MultiIndex.from_product([["storage_0", "storage_1", "storage_2", "storage_3"], ["node_0"]], names=["technology", "node"])
+    rng = np.random.default_rng(0)
+    series = pd.DataFrame(rng.random((4, 6)), index=index, columns=range(6))
+    series.iloc[1] = np.nan
+    series.iloc[2, [0, 4]] = np.nan
+    series.iloc[3, 3] = np.nan
+    expected = get_full_ts_storage_level_loop(series, sequence_timesteps, time_steps_start_end)
+    actual = Results._get_full_ts_storage_level(series, sequence_timesteps, time_steps_start_end)
+    assert actual.iloc[1].isna().all()
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
 def test_1b(config, folder_path):
     # run the test
     data_set_name = "test_1b"
@@ -306,6 +470,25 @@ def test_3d(config, folder_path):
     check_get_total_get_full_ts(res, discount_to_first_step=False)
 
 
+def test_3d_stitched_results(config, folder_path):
+    # run the test with the results of the rolling horizon steps stitched together
+    config.analysis.save_stitched_results = True
+    data_set_name = "test_3d"
+    folder_output = os.path.join("outputs", "test_3d_stitched_results")
+    main(
+        config=config, dataset_path=os.path.join(folder_path, data_set_name), folder_output_path=folder_output
+    )
+
+    # the stitched results are read instead of the results of the steps
+    assert os.path.exists(os.path.join(folder_output, data_set_name, "stitched", "metadata_index.json"))
+    res = Results(os.path.join(folder_output, data_set_name))
+    compare_variables_results(data_set_name, res, folder_path)
+    check_get_total_get_full_ts(res, discount_to_first_step=False)
+    # the raw values of the steps are still available
+    raw_capacity = res.get_total("capacity", keep_raw=True)
+    assert len(raw_capacity) >= len(res.get_total("capacity"))
+
+
 def test_3e(config, folder_path):
     # run the test
     data_set_name = "test_3e"
@@ -348,6 +531,37 @@ def test_3g(config, folder_path):
     check_get_total_get_full_ts(res)
 
 
+def test_3g_reuse_rolling_horizon_model(config, folder_path):
+    # run the rolling horizon steps with the problem of the previous step updated and formulated from scratch
+    config_reused = deepcopy(config)
+    config_reused.system.reuse_rolling_horizon_model = True
+    config_from_scratch = deepcopy(config)
+    config_from_scratch.system.reuse_rolling_horizon_model = False
+    data_set_name = "test_3g"
+    folder_output = os.path.join("outputs", "test_3g_reuse_rolling_horizon_model")
+    optimization_setup = main(
+        config=config_reused, dataset_path=os.path.join(folder_path, data_set_name), folder_output_path=folder_output
+    )
+    # the second step is updated, the last step has fewer years and is formulated from scratch
+    assert optimization_setup.n_updated_steps == 1
+
+    # read the results and check again
+    res = Results(os.path.join(folder_output, data_set_name))
+    compare_variables_results(data_set_name, res, folder_path)
+
+    # the results of all steps match the steps formulated from scratch
+    folder_output_from_scratch = os.path.join("outputs", "test_3g_reuse_rolling_horizon_model_from_scratch")
+    main(
+        config=config_from_scratch, dataset_path=os.path.join(folder_path, data_set_name), folder_output_path=folder_output_from_scratch
+    )
+    res_from_scratch = Results(os.path.join(folder_output_from_scratch, data_set_name))
+    for component in ["capacity", "flow_conversion_output", "carbon_emissions_cumulative", "net_present_cost"]:
+        total = res.get_total(component, keep_raw=True)
+        total_from_scratch = res_from_scratch.get_total(component, keep_raw=True)
+        assert total.shape == total_from_scratch.shape
+        assert np.allclose(total, total_from_scratch, equal_nan=True)
+
+
 def test_3h(config, folder_path):
     # run the test
     data_set_name = "test_3h"
@@ -376,6 +590,23 @@ def test_3i(config, folder_path):
     check_get_total_get_full_ts(res)
 
 
+def test_3i_tsa_cache(config, folder_path):
+    # run the test twice, the second run reads the aggregated time series from the cache
+    config.analysis.time_series_aggregation.use_cache = True
+    config.analysis.time_series_aggregation.folder_cache = os.path.join("outputs", "tsa_cache")
+    data_set_name = "test_3i"
+    folder_output = os.path.join("outputs", "test_3i_tsa_cache")
+    for _ in range(2):
+        main(
+            config=config, dataset_path=os.path.join(folder_path, data_set_name), folder_output_path=folder_output
+        )
+    config.analysis.time_series_aggregation.use_cache = False
+
+    # read the results and check again
+    res = Results(os.path.join(folder_output, data_set_name))
+    compare_variables_results(data_set_name, res, folder_path)
+
+
 def test_4a(config, folder_path):
     # run the test
     data_set_name = "test_4a"
@@ -390,6 +621,25 @@ def test_4a(config, folder_path):
     check_get_total_get_full_ts(res)
 
 
+def test_4a_parallel(config, folder_path):
+    # run the test with the scenarios solved in parallel processes
+    data_set_name = "test_4a"
+    folder_output = os.path.join("outputs", "test_4a_parallel")
+    main(
+        config=config, dataset_path=os.path.join(folder_path, data_set_name), folder_output_path=folder_output, scenario_workers=2
+    )
+
+    # read the results and check again
+    res = Results(os.path.join(folder_output, data_set_name))
+    compare_variables_results(data_set_name, res, folder_path)
+    # the scenarios are read concurrently and share the unit registry
+    scenarios = list(res.solution_loader.scenarios.values())
+    assert all(scenario.ureg is scenarios[0].ureg for scenario in scenarios)
+    capacity = res.get_total("capacity")
+    for scenario_name in res.solution_loader.scenarios:
+        assert capacity.loc[scenario_name].equals(res.get_total("capacity", scenario_name=scenario_name))
+
+
 def test_4b(config, folder_path):
     # run the test
     data_set_name = "test_4b"
@@ -428,6 +678,79 @@ def test_4d(config, folder_path):
     compare_variables_results(data_set_name, res, folder_path)
 
 
+def test_4d_reuse_base_model(config, folder_path):
+    # run two scenarios that only differ in the fixed opex, the second one patches the problem of the first one
+    config_from_scratch = deepcopy(config)
+    config.system.reuse_base_model = True
+    data_set_name = "test_4d"
+    folder_output = os.path.join("outputs", "test_4d_reuse_base_model")
+    optimization_setup = main(
+        config=config, dataset_path=os.path.join(folder_path, data_set_name), folder_output_path=folder_output, job_index=[1, 5]
+    )
+    assert optimization_setup.n_patched_scenarios == 1
+    objective_patched = optimization_setup.model.objective.value
+
+    # read the results and check again
+    res = Results(os.path.join(folder_output, data_set_name))
+    compare_variables_results(data_set_name, res, folder_path)
+
+    # formulate the second scenario from scratch, the scenarios of the config were expanded by the first run
+    optimization_setup = main(
+        config=config_from_scratch, dataset_path=os.path.join(folder_path, data_set_name), folder_output_path=folder_output, job_index=5
+    )
+    assert np.isclose(objective_patched, optimization_setup.model.objective.value)
+
+
+def test_4d_reuse_base_model_capacity_limit(config, folder_path):
+    # patch a scenario that changes the mask of a constraint rule of the solved base model
+    folder_output = os.path.join("outputs", "test_4d_reuse_base_model_capacity_limit")
+    dataset_path = os.path.join(folder_output, "inputs", "test_4d")
+    shutil.rmtree(dataset_path, ignore_errors=True)
+    shutil.copytree(os.path.join(folder_path, "test_4d"), dataset_path)
+    with open(os.path.join(dataset_path, "set_technologies", "set_conversion_technologies", "natural_gas_boiler", "attributes_limited.json"), "w") as file:
+        json.dump({"capacity_limit": {"default_value": 100.0, "unit": "GW"}}, file)
+    with open(os.path.join(dataset_path, "scenarios.json"), "w") as file:
+        json.dump({"capacity_limit": {"natural_gas_boiler": {"capacity_limit": {"default": "attributes_limited"}}}}, file)
+    config_from_scratch = deepcopy(config)
+    config.system.reuse_base_model = True
+    optimization_setup = main(config=config, dataset_path=dataset_path, folder_output_path=folder_output)
+    assert optimization_setup.n_patched_scenarios == 1
+    objective_patched = optimization_setup.model.objective.value
+
+    # formulate the patched scenario from scratch
+    optimization_setup = main(
+        config=config_from_scratch, dataset_path=dataset_path, job_index=1, folder_output_path=folder_output
+    )
+    assert np.isclose(objective_patched, optimization_setup.model.objective.value)
+
+
+def test_4d_warm_start(config, folder_path):
+    # run two scenarios, the second one is warm started from the basis of the first one
+    config.solver.warm_start_scenarios = True
+    config.solver.run_diagnostics = True
+    data_set_name = "test_4d"
+    folder_output = os.path.join("outputs", "test_4d_warm_start")
+    optimization_setup = main(
+        config=config, dataset_path=os.path.join(folder_path, data_set_name), folder_output_path=folder_output, job_index=[1, 5]
+    )
+    warm_start_data = optimization_setup.warm_start_store.get_benchmarking_data()
+    assert warm_start_data["warm_start_type"] == "basis"
+    assert warm_start_data["iterations_saved"] is not None
+
+    # the saved iterations are written to the benchmarking data of the warm started scenario
+    benchmarking_data = []
+    for root, _, files in os.walk(os.path.join(folder_output, data_set_name)):
+        if "benchmarking.json" in files:
+            with open(os.path.join(root, "benchmarking.json")) as file:
+                benchmarking_data.append(json.load(file))
+    assert any(data.get("iterations_saved") == warm_start_data["iterations_saved"] for data in benchmarking_data
+               if data.get("warm_start_type") == "basis")
+
+    # read the results and check again
+    res = Results(os.path.join(folder_output, data_set_name))
+    compare_variables_results(data_set_name, res, folder_path)
+
+
 def test_5a(config, folder_path):
     # run the test
     data_set_name = "test_5a"
@@ -13,7 +13,7 @@ from zen_garden.utils import copy_dataset_example
 
 def run_module(args=None, config = "./config.py", dataset = None, 
                folder_output = None, job_index = None, job_index_var = "SLURM_ARRAY_TASK_ID",
-               example = None):
+               example = None, scenario_workers = None):
     """
     Runs the main function of ZEN-Garden
 
@@ -27,7 +27,7 @@ def run_module(args=None, config = "./config.py", dataset = None,
                   "current working directory. You can specify a config file with the --config argument. However, " \
                   "note that the output directory will always be the current working directory, independent of the " \
                   "dataset specified in the config file."
-    parser = argparse.ArgumentParser(description=description, add_help=True, usage="usage: python -m zen_garden [-h] [--config CONFIG] [--dataset DATASET] [--job_index JOB_INDEX] [--job_index_var JOB_INDEX_VAR] [--example EXAMPLE]")
+    parser = argparse.ArgumentParser(description=description, add_help=True, usage="usage: python -m zen_garden [-h] [--config CONFIG] [--dataset DATASET] [--job_index JOB_INDEX] [--job_index_var JOB_INDEX_VAR] [--example EXAMPLE] [--scenario_workers SCENARIO_WORKERS]")
     # TODO make json config default
     parser.add_argument("--config", required=False, type=str, default=config, help="The config file used to run the pipeline, "
                                                                                         "defaults to config.py in the current directory.")
@@ -40,6 +40,9 @@ def run_module(args=None, config = "./config.py", dataset = None,
                                                                                                          "If both --job_index and --job_index_var are specified, --job_index will be used.")
     parser.add_argument("--example", required=False, type=str, default=example, help="Run an example scenario. The argument should be the name of a dataset example in documentation/dataset_examples. This command will copy the dataset and the config to the current folder and run the example.")
 
+    parser.add_argument("--scenario_workers", required=False, type=int, default=scenario_workers, help="Number of scenarios that are solved in parallel processes. IMPORTANT: This will overwrite the "
+                                                                                                   "config.system.scenario_workers attribute of the config file!")
+
     args = parser.parse_args(args)
 
     # copy example dataset and run example
@@ -73,7 +76,7 @@ def run_module(args=None, config = "./config.py", dataset = None,
         job_index = [int(i) for i in job_index.split(",")]
 
     ### run
-    main(config=config, dataset_path=args.dataset, job_index=job_index, folder_output_path=args.folder_output)
+    main(config=config, dataset_path=args.dataset, job_index=job_index, folder_output_path=args.folder_output, scenario_workers=args.scenario_workers)
 
 
 if __name__ == "__main__":
@@ -5,12 +5,15 @@ Compilation  of the optimization problem.
 import cProfile
 import importlib.util
 import logging
+import multiprocessing
 import os
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import importlib
 
 from .model.optimization_setup import OptimizationSetup
 from .postprocess.postprocess import Postprocess
+from .postprocess.results.solution_loader import hdf_store_pool, results_cache
 from .utils import setup_logger, InputDataChecks, StringUtils, ScenarioUtils, OptimizationError
 from .preprocess.unit_handling import Scaling
 
@@ -18,7 +21,7 @@ from .preprocess.unit_handling import Scaling
 setup_logger()
 
 
-def main(config, dataset_path=None, job_index=None, folder_output_path=None):
+def main(config, dataset_path=None, job_index=None, folder_output_path=None, scenario_workers=None):
     """
     This function runs ZEN garden,
     it is executed in the __main__.py script
@@ -27,6 +30,8 @@ def main(config, dataset_path=None, job_index=None, folder_output_path=None):
     :param dataset_path: If not None, used to overwrite the config.analysis.dataset
     :param job_index: The index of the scenario to run or a list of indices, if None, all scenarios are run in sequence
     :param folder_output_path: If not None, used to overwrite the config.analysis.folder_output
+    :param scenario_workers: If not None, used to overwrite the config.system.scenario_workers
+    :return: The optimization setup of the last scenario, None if the scenarios are run in parallel
     """
 
     # print the version
@@ -46,6 +51,8 @@ def main(config, dataset_path=None, job_index=None, folder_output_path=None):
     # get the abs path to avoid working dir stuff
     config.analysis.dataset = os.path.abspath(config.analysis.dataset)
     config.analysis.folder_output = os.path.abspath(config.analysis.folder_output)
+    config.analysis.folder_input_data_cache = os.path.abspath(config.analysis.folder_input_data_cache)
+    config.analysis.time_series_aggregation.folder_cache = os.path.abspath(config.analysis.time_series_aggregation.folder_cache)
     config.analysis.zen_garden_version = version
     ### SYSTEM CONFIGURATION
     input_data_checks = InputDataChecks(config=config, optimization_setup=None)
@@ -53,6 +60,8 @@ def main(config, dataset_path=None, job_index=None, folder_output_path=None):
     input_data_checks.read_system_file(config)
     input_data_checks.check_technology_selections()
     input_data_checks.check_year_definitions()
+    if scenario_workers is not None:
+        config.system.scenario_workers = scenario_workers
     # overwrite default system and scenario dictionaries
     scenarios, elements = ScenarioUtils.get_scenarios(config, job_index)
     # get the name of the dataset
@@ -60,41 +69,159 @@ def main(config, dataset_path=None, job_index=None, folder_output_path=None):
     # clean sub-scenarios if necessary
     ScenarioUtils.clean_scenario_folder(config, out_folder)
     ### ITERATE THROUGH SCENARIOS
-    for scenario, scenario_dict in zip(scenarios, elements):
-        # FORMULATE THE OPTIMIZATION PROBLEM
-        # add the scenario_dict and read input data
-        optimization_setup = OptimizationSetup(config, scenario_dict=scenario_dict, input_data_checks=input_data_checks)
-        # get rolling horizon years
-        steps_horizon = optimization_setup.get_optimization_horizon()
-        # iterate through horizon steps
-        for step in steps_horizon:
-            StringUtils.print_optimization_progress(scenario, steps_horizon, step, system=config.system)
-            # overwrite time indices
-            optimization_setup.overwrite_time_indices(step)
-            # create optimization problem
+    scenarios = list(scenarios)
+    elements = list(elements)
+    n_workers = min(config.system.scenario_workers, len(scenarios))
+    if n_workers > 1:
+        run_scenarios_in_parallel(config, scenarios, elements, model_name, out_folder, n_workers)
+        optimization_setup = None
+    else:
+        optimization_setup = None
+        for scenario, scenario_dict in zip(scenarios, elements):
+            previous_setup = optimization_setup if config.system.reuse_base_model else None
+            # the next scenario is warm started from the basis or solution of the previous scenario
+            warm_start_store = None
+            if optimization_setup is not None and config.solver.warm_start_scenarios:
+                warm_start_store = optimization_setup.warm_start_store
+            optimization_setup = run_scenario(config, scenario, scenario_dict, input_data_checks, model_name,
+                                              previous_setup=previous_setup, warm_start_store=warm_start_store)
+    logging.info("--- Optimization finished ---")
+    return optimization_setup
+
+
+def run_scenario(config, scenario, scenario_dict, input_data_checks, model_name, previous_setup=None, warm_start_store=None):
+    """
+    Formulates, solves and postprocesses a single scenario, including all rolling horizon steps
+
+    :param config: A config instance used for the run
+    :param scenario: name of the scenario
+    :param scenario_dict: scenario dict of the scenario
+    :param input_data_checks: input data checks object
+    :param model_name: name of the model
+    :param previous_setup: optimization setup of the previous scenario, whose optimization problem is patched if possible
+    :param warm_start_store: warm start store of the previous scenario
+    :return: The optimization setup of the scenario
+    """
+    # FORMULATE THE OPTIMIZATION PROBLEM
+    # patch the problem of the previous scenario if only parameters change, otherwise add the scenario_dict and read input data
+    patched = previous_setup is not None and previous_setup.apply_scenario_delta(scenario_dict)
+    if patched:
+        optimization_setup = previous_setup
+    else:
+        optimization_setup = OptimizationSetup(config, scenario_dict=scenario_dict, input_data_checks=input_data_checks,
+                                               warm_start_store=warm_start_store)
+    # get rolling horizon years
+    steps_horizon = optimization_setup.get_optimization_horizon()
+    # iterate through horizon steps
+    for step in steps_horizon:
+        StringUtils.print_optimization_progress(scenario, steps_horizon, step, system=config.system)
+        # overwrite time indices
+        optimization_setup.overwrite_time_indices(step)
+        # create optimization problem or update the problem of the previous rolling horizon step
+        if not patched and not optimization_setup.apply_rolling_horizon_step():
             optimization_setup.construct_optimization_problem()
+        with optimization_setup.profiler.profile("scaling"):
             if optimization_setup.solver.use_scaling:
+                # the unscaled problem is patched for the next scenario or rolling horizon step
+                if optimization_setup.rule_records is not None:
+                    optimization_setup.scaling.store_unscaled_problem()
                 optimization_setup.scaling.run_scaling()
             elif optimization_setup.solver.analyze_numerics or optimization_setup.solver.run_diagnostics:
                 optimization_setup.scaling.analyze_numerics()
-            # SOLVE THE OPTIMIZATION PROBLEM
-            optimization_setup.solve()
-            # break if infeasible
-            if not optimization_setup.optimality:
-                # write IIS
-                optimization_setup.write_IIS()
-                raise OptimizationError(optimization_setup.model.termination_condition)
-            if optimization_setup.solver.use_scaling:
-                optimization_setup.scaling.re_scale()
-            # save new capacity additions and cumulative carbon emissions for next time step
-            optimization_setup.add_results_of_optimization_step(step)
-            # EVALUATE RESULTS
-            # create scenario name, subfolder and param_map for postprocessing
-            scenario_name, subfolder, param_map = StringUtils.generate_folder_path(
-                config=config, scenario=scenario, scenario_dict=scenario_dict, steps_horizon=steps_horizon, step=step
-            )
-            # write results
-            Postprocess(optimization_setup, scenarios=config.scenarios, subfolder=subfolder,
-                        model_name=model_name, scenario_name=scenario_name, param_map=param_map)
-    logging.info("--- Optimization finished ---")
+        # SOLVE THE OPTIMIZATION PROBLEM
+        optimization_setup.solve()
+        # break if infeasible
+        if not optimization_setup.optimality:
+            # write IIS
+            optimization_setup.write_IIS()
+            raise OptimizationError(optimization_setup.model.termination_condition)
+        if optimization_setup.solver.use_scaling:
+            optimization_setup.scaling.re_scale()
+        # save new capacity additions and cumulative carbon emissions for next time step
+        optimization_setup.add_results_of_optimization_step(step)
+        # EVALUATE RESULTS
+        # create scenario name, subfolder and param_map for postprocessing
+        scenario_name, subfolder, param_map = StringUtils.generate_folder_path(
+            config=config, scenario=scenario, scenario_dict=scenario_dict, steps_horizon=steps_horizon, step=step
+        )
+        # write results
+        postprocess = Postprocess(optimization_setup, scenarios=config.scenarios, subfolder=subfolder,
+                                  model_name=model_name, scenario_name=scenario_name, param_map=param_map)
+    # stitch the results of the rolling horizon steps
+    if config.system.use_rolling_horizon and config.analysis.save_stitched_results:
+        postprocess.save_stitched_results()
     return optimization_setup
+
+
+def run_scenarios_in_parallel(config, scenarios, elements, model_name, out_folder, n_workers):
+    """
+    Runs the scenarios in a pool of worker processes. A failing scenario is reported but does not stop the others.
+
+    :param config: A config instance used for the run
+    :param scenarios: names of the scenarios
+    :param elements: scenario dicts of the scenarios
+    :param model_name: name of the model
+    :param out_folder: output folder of the model
+    :param n_workers: number of worker processes
+    """
+    # split the available cores between the workers if not specified otherwise
+    solver_threads = config.solver.threads_per_worker
+    if solver_threads is None:
+        solver_threads = max(1, (os.cpu_count() or 1) // n_workers)
+    log_folder = os.path.join(out_folder, "logs")
+    os.makedirs(log_folder, exist_ok=True)
+    logging.info(f"Running {len(scenarios)} scenarios on {n_workers} workers with {solver_threads} solver thread(s) each. Logs are written to {log_folder}")
+    failed_scenarios = {}
+    # the workers rewrite the result files, which cannot be open for reading or cached in this process
+    hdf_store_pool.close()
+    results_cache.invalidate(out_folder)
+    # spawn fresh interpreters to not share solver or thread states with the parent process
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp_context) as executor:
+        futures = {
+            executor.submit(_run_scenario_worker, config, scenario, scenario_dict, model_name, log_folder, solver_threads): scenario
+            for scenario, scenario_dict in zip(scenarios, elements)
+        }
+        for future in as_completed(futures):
+            scenario = futures[future]
+            scenario_string = ScenarioUtils.scenario_string(scenario)
+            try:
+                future.result()
+                logging.info(f"--- Optimization {scenario_string}finished ---")
+            except Exception as e:
+                failed_scenarios[scenario] = e
+                logging.error(f"--- Optimization {scenario_string}failed with {type(e).__name__}: {e} ---")
+    if failed_scenarios:
+        raise RuntimeError(f"{len(failed_scenarios)} of {len(scenarios)} scenarios failed: {list(failed_scenarios.keys())}. Check the logs in {log_folder}")
+
+
+def _run_scenario_worker(config, scenario, scenario_dict, model_name, log_folder, solver_threads):
+    """
+    Entry point of a worker process. Redirects the logging to a scenario specific file and limits the solver threads
+
+    :param config: A config instance used for the run
+    :param scenario: name of the scenario
+    :param scenario_dict: scenario dict of the scenario
+    :param model_name: name of the model
+    :param log_folder: folder of the scenario log files
+    :param solver_threads: number of threads the solver may use
+    """
+    file_handler = logging.FileHandler(os.path.join(log_folder, f"scenario_{scenario}.log"), mode="w")
+    file_handler.setFormatter(logging.Formatter("%(message)s"))
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(file_handler)
+    # limit the threads of the solver
+    if config.solver.name == "gurobi":
+        config.solver.solver_options["Threads"] = solver_threads
+    elif config.solver.name == "highs":
+        config.solver.solver_options["threads"] = solver_threads
+    input_data_checks = InputDataChecks(config=config, optimization_setup=None)
+    try:
+        run_scenario(config, scenario, scenario_dict, input_data_checks, model_name)
+    except Exception:
+        logging.exception(f"Optimization {ScenarioUtils.scenario_string(scenario)}failed")
+        raise
+    finally:
+        file_handler.close()
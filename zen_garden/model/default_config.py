@@ -102,6 +102,9 @@ class System(Subscriptable):
     conduct_scenario_analysis: bool = False
     run_default_scenario: bool = True
     clean_sub_scenarios: bool = False
+    scenario_workers: int = 1 # number of scenarios solved in parallel processes, 1 runs them sequentially
+    reuse_base_model: bool = False # patch the optimization problem of the previous scenario if only non-time-series parameters change
+    reuse_rolling_horizon_model: bool = False # update the optimization problem of the previous rolling horizon step instead of formulating it from scratch
     total_hours_per_year: int = 8760
     knowledge_depreciation_rate: float = 0.1
     reference_year: int = 2024
@@ -127,7 +130,11 @@ class Solver(Subscriptable):
     check_unit_consistency: bool = True
     solver_dir: str = ".//outputs//solver_files"
     keep_files: bool = False
-    io_api: str = "lp"
+    io_api: str = "auto" # "lp", "mps", "direct", or "auto" to pass the model directly to the solver if possible
+    warm_start_rolling_horizon: bool = False # warm start each rolling horizon step from the basis or solution of the previous step
+    warm_start_scenarios: bool = False # warm start each scenario from the basis or solution of the previous scenario if the scenarios are run in sequence
+    warm_start_type: str = "basis" # "basis" or "solution", mixed-integer problems are always warm started from the solution
+    threads_per_worker: Optional[int] = None # solver threads per parallel scenario worker, if None the cores are split evenly
     save_duals: bool = False
     save_parameters: bool = True
     selected_saved_parameters: list = [] # if empty, all parameters are saved
@@ -142,6 +149,8 @@ class Solver(Subscriptable):
     rounding_decimal_points_tsa: int = 4
     analyze_numerics: bool = True
     run_diagnostics: bool = False
+    run_profiling: bool = False # if true, the time, peak memory and size of each phase and component are saved in profile.json
+    profiling_top_n: int = 10 # number of slowest components that are printed if run_profiling is true
     use_scaling: bool = True
     scaling_include_rhs: bool = True
     scaling_algorithm: Union[list[str],str] = ["geom","geom","geom"]
@@ -159,6 +168,8 @@ class TimeSeriesAggregation(Subscriptable):
     rescaleClusterPeriods: bool = False
     representationMethod: str = "meanRepresentation"
     resolution: int = 1
+    use_cache: bool = False # cache the typical periods on disk and reuse them for identical raw time series
+    folder_cache: str = "./outputs/tsa_cache/"
 
 class Analysis(Subscriptable):
     """
@@ -172,8 +183,12 @@ class Analysis(Subscriptable):
     time_series_aggregation: TimeSeriesAggregation = TimeSeriesAggregation()
     folder_output: str = "./outputs/"
     overwrite_output: bool = True
-    output_format: str = "h5"
+    output_format: str = "h5" # "h5" or "parquet", parquet writes one file per component and requires pyarrow
+    output_chunk_size: int = 1000000 # number of rows of a component that are written to the output files at once
+    save_stitched_results: bool = False # save the results of all rolling horizon steps stitched together, which are read instead of the results of the single steps
     earliest_year_of_data: int = 1900
+    use_input_data_cache: bool = False # cache the extracted input data on disk and reuse it if the input files are unchanged
+    folder_input_data_cache: str = "./outputs/input_data_cache/"
     zen_garden_version: str = None
 
 class Config(Subscriptable):
@@ -198,10 +198,8 @@ class CarrierRules(GenericRule):
 
 
         """
-        times = self.get_year_time_step_duration_array()
-        term_summed_cost_carrier = (
-                    (self.variables["cost_carrier"].broadcast_like(times) + self.variables["cost_shed_demand"].broadcast_like(times))
-                    * times).sum(["set_carriers", "set_nodes", "set_time_steps_operation"])
+        term_summed_cost_carrier = self.sum_operation2year(
+            self.variables["cost_carrier"] + self.variables["cost_shed_demand"]).sum(["set_carriers", "set_nodes"])
         lhs = self.variables["cost_carrier_total"] - term_summed_cost_carrier
         rhs = 0
         constraints = lhs == rhs
@@ -218,9 +216,8 @@ class CarrierRules(GenericRule):
         :math:`\\tau_t`: duration of time step :math:`t`
 
         """
-        term_summed_carbon_emissions_carrier = (
-                self.variables["carbon_emissions_carrier"] * self.get_year_time_step_duration_array()).sum(
-            ["set_carriers", "set_nodes", "set_time_steps_operation"])
+        term_summed_carbon_emissions_carrier = self.sum_operation2year(
+            self.variables["carbon_emissions_carrier"]).sum(["set_carriers", "set_nodes"])
         lhs = self.variables["carbon_emissions_carrier_total"] - term_summed_carbon_emissions_carrier
         rhs = 0
         constraints = lhs == rhs
@@ -276,12 +273,12 @@ class CarrierRules(GenericRule):
         mask_exp = self.parameters.availability_export_yearly != np.inf
 
         # import
-        lhs_imp = (self.variables["flow_import"] * self.get_year_time_step_duration_array()).sum("set_time_steps_operation").where(mask_imp)
+        lhs_imp = self.sum_operation2year(self.variables["flow_import"]).where(mask_imp)
         rhs_imp = self.parameters.availability_import_yearly.where(mask_imp)
         constraints_imp = lhs_imp <= rhs_imp
 
         # export
-        lhs_exp = (self.variables["flow_export"] * self.get_year_time_step_duration_array()).sum("set_time_steps_operation").where(mask_exp)
+        lhs_exp = self.sum_operation2year(self.variables["flow_export"]).where(mask_exp)
         rhs_exp = self.parameters.availability_export_yearly.where(mask_exp)
         constraints_exp = lhs_exp <= rhs_exp
 
@@ -354,12 +351,9 @@ class CarrierRules(GenericRule):
         :math:`\\overline{U}_{c,n,t}`: flow of carrier :math:`c` exported at node :math:`n` and time step :math:`t`
 
         """
-        # create times xarray with 1 where the operation time step is in the year
-        times = self.get_year_time_step_array()
         # convert the carbon intensity carrier from yearly to operation time steps
-        # TODO map and expand
-        carbon_intensity_carrier_import = (self.parameters.carbon_intensity_carrier_import.broadcast_like(times) * times).sum("set_time_steps_yearly")
-        carbon_intensity_carrier_export = (self.parameters.carbon_intensity_carrier_export.broadcast_like(times) * times).sum("set_time_steps_yearly")
+        carbon_intensity_carrier_import = self.map_year2operation(self.parameters.carbon_intensity_carrier_import)
+        carbon_intensity_carrier_export = self.map_year2operation(self.parameters.carbon_intensity_carrier_export)
         lhs = (self.variables["carbon_emissions_carrier"]
                - (self.variables["flow_import"]*carbon_intensity_carrier_import
                - self.variables["flow_export"]*carbon_intensity_carrier_export))
@@ -410,56 +404,10 @@ class CarrierRules(GenericRule):
         ### auxiliary calculations
         # carrier flow transport technologies
         if self.variables["flow_transport"].size > 0:
-            # recalculate all the edges
-            edges_in = {node: self.energy_system.calculate_connected_edges(node, "in") for node in self.sets["set_nodes"]}
-            edges_out = {node: self.energy_system.calculate_connected_edges(node, "out") for node in self.sets["set_nodes"]}
-            max_edges = max([len(edges_in[node]) for node in self.sets["set_nodes"]] + [len(edges_out[node]) for node in
-                                                                                   self.sets["set_nodes"]])
-
-            # create the variables
-            flow_transport_in_vars = xr.DataArray(-1, coords=[self.parameters.demand.coords["set_carriers"],
-                                                              self.parameters.demand.coords["set_nodes"],
-                                                              self.parameters.demand.coords["set_time_steps_operation"],
-                                                              xr.DataArray(np.arange(
-                                                                  len(self.sets["set_transport_technologies"]) * (
-                                                                          2 * max_edges + 1)), dims=["_term"])])
-            flow_transport_in_coeffs = xr.full_like(flow_transport_in_vars, np.nan, dtype=float)
-            flow_transport_out_vars = flow_transport_in_vars.copy()
-            flow_transport_out_coeffs = xr.full_like(flow_transport_in_vars, np.nan, dtype=float)
-            for carrier, node in index.get_unique([0, 1]):
-                techs = [tech for tech in self.sets["set_transport_technologies"] if
-                         carrier in self.sets["set_reference_carriers"][tech]]
-                edges_in = self.energy_system.calculate_connected_edges(node, "in")
-                edges_out = self.energy_system.calculate_connected_edges(node, "out")
-
-                # get the variables for the in flow
-                in_vars_plus = self.variables["flow_transport"].labels.loc[techs, edges_in, :].data
-                in_vars_plus = in_vars_plus.reshape((-1, in_vars_plus.shape[-1])).T
-                in_coefs_plus = np.ones_like(in_vars_plus)
-                in_vars_minus = self.variables["flow_transport_loss"].labels.loc[techs, edges_in, :].data
-                in_vars_minus = in_vars_minus.reshape((-1, in_vars_minus.shape[-1])).T
-                in_coefs_minus = np.ones_like(in_vars_minus)
-                in_vars = np.concatenate([in_vars_plus, in_vars_minus], axis=1)
-                in_coefs = np.concatenate([in_coefs_plus, -in_coefs_minus], axis=1)
-                flow_transport_in_vars.loc[carrier, node, :, :in_vars.shape[-1] - 1] = in_vars
-                flow_transport_in_coeffs.loc[carrier, node, :, :in_coefs.shape[-1] - 1] = in_coefs
-
-                # get the variables for the out flow
-                out_vars_plus = self.variables["flow_transport"].labels.loc[techs, edges_out, :].data
-                out_vars_plus = out_vars_plus.reshape((-1, out_vars_plus.shape[-1])).T
-                out_coefs_plus = np.ones_like(out_vars_plus)
-                flow_transport_out_vars.loc[carrier, node, :, :out_vars_plus.shape[-1] - 1] = out_vars_plus
-                flow_transport_out_coeffs.loc[carrier, node, :, :out_coefs_plus.shape[-1] - 1] = out_coefs_plus
-
-            # craete the linear expression
-            term_flow_transport_in = lp.LinearExpression(xr.Dataset({"coeffs": flow_transport_in_coeffs,
-                                                                "vars": flow_transport_in_vars}), self.model)
-            term_flow_transport_out = lp.LinearExpression(xr.Dataset({"coeffs": flow_transport_out_coeffs,
-                                                                 "vars": flow_transport_out_vars}), self.model)
+            term_flow_transport = self.get_term_flow_transport()
         else:
             # if there is no carrier flow we just create empty arrays
-            term_flow_transport_in = self.variables["flow_import"].where(False).to_linexpr()
-            term_flow_transport_out = self.variables["flow_import"].where(False).to_linexpr()
+            term_flow_transport = self.variables["flow_import"].where(False).to_linexpr()
 
         # carrier input and output conversion technologies
         term_carrier_conversion_in = []
@@ -524,8 +472,7 @@ class CarrierRules(GenericRule):
         ### formulate the constraints
         lhs = lp.merge([term_carrier_conversion_out,
                        -term_carrier_conversion_in,
-                       term_flow_transport_in,
-                       -term_flow_transport_out,
+                       term_flow_transport,
                        -term_flow_storage_charge,
                        term_flow_storage_discharge,
                        term_carrier_import,
@@ -538,3 +485,55 @@ class CarrierRules(GenericRule):
 
         ### return
         self.constraints.add_constraint("constraint_nodal_energy_balance",constraints)
+
+    def get_term_flow_transport(self):
+        """ returns the net transported flow of each carrier at each node for the nodal energy balance.
+        The terms are scattered from the sparse node-edge incidence of the transport flows instead of being selected and
+        summed per node. Like all linopy expressions, the result stores the same number of terms for every carrier and
+        node, i.e., the maximum number of ingoing flows, losses and outgoing flows at a node, so a single hub node widens
+        all rows. The nodal energy balance has this width anyway, since it is one constraint whose duals are the nodal prices
+
+        :return: linear expression of the ingoing flows minus the losses and the outgoing flows """
+        labels_flow = self.variables["flow_transport"].labels.transpose("set_transport_technologies", "set_edges", "set_time_steps_operation")
+        labels_loss = self.variables["flow_transport_loss"].labels.transpose(*labels_flow.dims)
+        carriers = self.parameters.demand.coords["set_carriers"]
+        nodes = self.parameters.demand.coords["set_nodes"]
+        time_steps = self.parameters.demand.coords["set_time_steps_operation"]
+        techs = labels_flow.coords["set_transport_technologies"].values
+        edges = labels_flow.coords["set_edges"].values
+        # incidence of the edges, i.e., the node out of which and the node into which the flow goes
+        node_index = pd.Index(nodes.values)
+        node_out = node_index.get_indexer([self.energy_system.set_nodes_on_edges[edge][0] for edge in edges])
+        node_in = node_index.get_indexer([self.energy_system.set_nodes_on_edges[edge][1] for edge in edges])
+        # reference carrier of each transport technology
+        carrier_index = pd.Index(carriers.values)
+        tech_carrier = [(tech_idx, carrier_idx) for tech_idx, tech in enumerate(techs)
+                        for carrier_idx in carrier_index.get_indexer(self.sets["set_reference_carriers"][tech]) if carrier_idx != -1]
+        tech_idx, carrier_idx = np.array(tech_carrier, dtype=int).reshape(-1, 2).T
+        # sparse entries (row, column, coefficient) with row = (carrier, node) and column = (variable, technology, edge)
+        n_edges = len(edges)
+        tech_idx = np.repeat(tech_idx, n_edges)
+        carrier_idx = np.repeat(carrier_idx, n_edges)
+        edge_idx = np.tile(np.arange(n_edges), len(tech_carrier))
+        rows = np.concatenate([carrier_idx * len(nodes) + node_in[edge_idx]] * 2 + [carrier_idx * len(nodes) + node_out[edge_idx]])
+        cols = np.tile(tech_idx * n_edges + edge_idx, 3)
+        is_loss = np.repeat([False, True, False], len(edge_idx))
+        coeffs = np.repeat([1.0, -1.0, -1.0], len(edge_idx))
+        # position of each entry in the terms of its row
+        order = np.argsort(rows, kind="stable")
+        rows, cols, is_loss, coeffs = rows[order], cols[order], is_loss[order], coeffs[order]
+        counts = np.bincount(rows, minlength=len(carriers) * len(nodes))
+        terms = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        # scatter the labels of the flows into the terms, the rows are padded to the row with the most terms
+        n_terms = max(counts.max(initial=0), 1)
+        flat_flow = labels_flow.data.reshape(-1, labels_flow.shape[-1])
+        flat_loss = labels_loss.data.reshape(-1, labels_loss.shape[-1])
+        term_vars = np.full((len(carriers) * len(nodes), labels_flow.shape[-1], n_terms), -1, dtype=flat_flow.dtype)
+        term_coeffs = np.full(term_vars.shape, np.nan)
+        term_vars[rows, :, terms] = np.where(is_loss[:, None], flat_loss[cols], flat_flow[cols])
+        term_coeffs[rows, :, terms] = coeffs[:, None]
+        shape = (len(carriers), len(nodes), labels_flow.shape[-1], n_terms)
+        coords = [carriers, nodes, time_steps, xr.DataArray(np.arange(n_terms), dims=["_term"])]
+        term_flow_transport = lp.LinearExpression(xr.Dataset({"coeffs": xr.DataArray(term_coeffs.reshape(shape), coords=coords),
+                                                              "vars": xr.DataArray(term_vars.reshape(shape), coords=coords)}), self.model)
+        return term_flow_transport
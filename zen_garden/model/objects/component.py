@@ -6,7 +6,6 @@ import copy
 import itertools
 import logging
 import uuid
-from itertools import combinations
 from itertools import zip_longest
 
 import linopy as lp
@@ -16,6 +15,8 @@ import pint
 import xarray as xr
 from ordered_set import OrderedSet
 
+from zen_garden.utils import Profiler
+
 class ZenIndex(object):
     """
     A multiindex class that can be easily used with xarray
@@ -262,6 +263,8 @@ class IndexSet(Component):
 
         # this is the Dataset with the coords
         self.coords_dataset = xr.Dataset()
+        # the set to which the names of the read sets are added while a constraint rule is recorded
+        self.used_sets = None
 
     def add_set(self, name, data, doc, index_set=None):
         """Adds a set to the IndexSets (this set it not indexed)
@@ -338,7 +341,7 @@ class IndexSet(Component):
 
         :param index_values: A list of index values (tuples)
         :param index_list: The list of the names of the indices
-        :param bounds: Either None, tuple, array or callable to define the bounds of the variable
+        :param bounds: Either None, tuple of scalars or xarrays, array or callable to define the bounds of the variable
         :param model: The model to which the mask belongs, note that indices which don't match existing indices are
                       renamed to match the model
         :return: The mask as xarray
@@ -368,12 +371,12 @@ class IndexSet(Component):
         lower = xr.DataArray(-np.inf, coords=coords, dims=index_list)
         upper = xr.DataArray(np.inf, coords=coords, dims=index_list)
         if isinstance(bounds, tuple):
-            if isinstance(bounds[0], xr.DataArray):
-                lower.loc[index_arrs] = bounds[0].loc[index_arrs]
-                upper.loc[index_arrs] = bounds[1].loc[index_arrs]
-            else:
-                lower[...] = bounds[0]
-                upper[...] = bounds[1]
+            # the bounds are scalars or xarrays, which are broadcast to the coords of the variable
+            for bound, bound_arr in zip(bounds, (lower, upper)):
+                if isinstance(bound, xr.DataArray):
+                    bound_arr.loc[index_arrs] = bound.broadcast_like(bound_arr).loc[index_arrs]
+                else:
+                    bound_arr[...] = bound
         elif isinstance(bounds, np.ndarray):
             lower.loc[index_arrs] = bounds[:, 0]
             upper.loc[index_arrs] = bounds[:, 1]
@@ -440,6 +443,8 @@ class IndexSet(Component):
         :return: The set that has the name
         """
 
+        if self.used_sets is not None:
+            self.used_sets.add(name)
         return self.sets[name]
 
     def __contains__(self, item):
@@ -475,6 +480,36 @@ class DictParameter(object):
         setattr(self, name, data)
 
 
+class ParameterRecorder(object):
+    """
+    This is a helper class that records the names of the parameters that are read from a Parameter object
+    """
+
+    def __init__(self, parameters, used_parameters=None):
+        """Initialization of the recorder
+
+        :param parameters: The Parameter or DictParameter object whose parameters are recorded
+        :param used_parameters: The set to which the names of the read parameters are added
+        """
+
+        self.parameters = parameters
+        self.used_parameters = used_parameters if used_parameters is not None else set()
+
+    def __getattr__(self, name):
+        """Returns the attribute of the recorded object and records its name
+
+        :param name: The name of the attribute
+        :return: The attribute of the recorded object
+        """
+
+        value = getattr(self.parameters, name)
+        # the dictionary parameters are recorded under the same names
+        if isinstance(value, DictParameter):
+            return ParameterRecorder(value, self.used_parameters)
+        self.used_parameters.add(name)
+        return value
+
+
 class Parameter(Component):
     def __init__(self, optimization_setup):
         """ initialization of the parameter object """
@@ -580,7 +615,7 @@ class Parameter(Component):
 
     @staticmethod
     def get_param_units(data, dict_of_units, index_list, name):
-        """ creates series of units with identical multi-index as data has
+        """ creates categorical series of units with identical multi-index as data has
 
         :param data: non default data of parameter and index_names
         :param dict_of_units: units of parameter
@@ -596,11 +631,12 @@ class Parameter(Component):
                 unit_series = unit_series.rename_axis(index=index_list)
                 unit_series = unit_series.sort_index()
                 if "unit_in_base_units" in dict_of_units:
-                    unit_series[:] = str(dict_of_units["unit_in_base_units"].units)
-                    return unit_series
+                    unit = str(dict_of_units["unit_in_base_units"].units)
+                    return pd.Series(pd.Categorical.from_codes(np.zeros(len(unit_series), dtype=np.int32), categories=[unit]), index=unit_series.index)
             for key, value in dict_of_units.items():
                 unit_series.loc[pd.IndexSlice[key]] = str(value)
-            return unit_series
+            # the units are dictionary-encoded
+            return unit_series.astype("category")
 
     @staticmethod
     def convert_to_dict(data):
@@ -677,35 +713,38 @@ class Variable(Component):
         :param mask: mask of variable
         """
         if name not in self.docs.keys():
-            index_values, index_list = self.get_index_names_data(index_sets)
-            mask_index, lower, upper = self.index_sets.indices_to_mask(index_values, index_list, bounds, model)
-            if mask is not None:
-                mask = mask.reindex_like(mask_index,fill_value=False)
-                mask_index = mask_index & mask
-            model.add_variables(lower=lower, upper=upper, integer=integer, binary=binary, name=name, mask=mask_index, coords=mask_index.coords)
-
-            # save variable doc
-            if integer:
-                domain = "Integers"
-            elif binary:
-                domain = "Binary"
-            else:
-                if isinstance(bounds, tuple) and isinstance(bounds[0], xr.DataArray):
-                    domain = "BoundedReals"
-                elif isinstance(bounds, tuple) and bounds[0] == 0:
-                    domain = "NonNegativeReals"
-                elif callable(bounds) or isinstance(bounds, np.ndarray):
-                    domain = "BoundedReals"
+            with self.optimization_setup.profiler.profile(name, category="variable"):
+                index_values, index_list = self.get_index_names_data(index_sets)
+                mask_index, lower, upper = self.index_sets.indices_to_mask(index_values, index_list, bounds, model)
+                if mask is not None:
+                    mask = mask.reindex_like(mask_index,fill_value=False)
+                    mask_index = mask_index & mask
+                model.add_variables(lower=lower, upper=upper, integer=integer, binary=binary, name=name, mask=mask_index, coords=mask_index.coords)
+                if self.optimization_setup.profiler.enabled:
+                    self.optimization_setup.profiler.count(variables=(model.variables[name].labels != -1).sum())
+
+                # save variable doc
+                if integer:
+                    domain = "Integers"
+                elif binary:
+                    domain = "Binary"
                 else:
-                    domain = "Reals"
-            self.docs[name] = self.compile_doc_string(doc, index_list, name, domain)
-            self.units[name] = self.get_var_units(unit_category, index_values, index_list,mask_index)
+                    if isinstance(bounds, tuple) and any(isinstance(bound, xr.DataArray) for bound in bounds):
+                        domain = "BoundedReals"
+                    elif isinstance(bounds, tuple) and bounds[0] == 0:
+                        domain = "NonNegativeReals"
+                    elif callable(bounds) or isinstance(bounds, np.ndarray):
+                        domain = "BoundedReals"
+                    else:
+                        domain = "Reals"
+                self.docs[name] = self.compile_doc_string(doc, index_list, name, domain)
+                self.units[name] = self.get_var_units(unit_category, index_values, index_list,mask_index)
         else:
             logging.warning(f"Variable {name} already added. Can only be added once")
 
     def get_var_units(self, unit_category, var_index_values, index_list,mask=None):
         """
-         creates series of units with identical multi-index as variable has
+         creates categorical series of units with identical multi-index as variable has
 
         :param unit_category: dict defining the dimensionality of the variable's unit
         :param var_index_values: list of variable index values
@@ -729,42 +768,52 @@ class Variable(Component):
             if dim in unit_category:
                 dim_unit = [key for key, value in self.unit_handling.base_units.items() if value == dim_name][0]
                 unit = unit * self.unit_handling.ureg(dim_unit)**unit_category[dim]
-        var_units = pd.Series(index=index,dtype=str)
+        # the units are dictionary-encoded, i.e., each index stores the code of its unit in the list of distinct units
+        categories = []
+        codes = np.full(len(index), -1, dtype=np.int32)
+        def get_code(unit_string):
+            if unit_string not in categories:
+                categories.append(unit_string)
+            return categories.index(unit_string)
         # variable can have different units
         if "energy_quantity" in unit_category:
             # energy_quantity depends on carrier index level (e.g. flow_import)
-            if any("carrier" in carrier_name for carrier_name in var_units.index.names):
-                carrier_level = [level for level in var_units.index.names if "carrier" in level][0]
+            if any("carrier" in carrier_name for carrier_name in index.names):
+                carrier_level = [level for level in index.names if "carrier" in level][0]
+                carrier_values = index.get_level_values(carrier_level)
                 for carrier, energy_quantity in self.unit_handling.carrier_energy_quantities.items():
-                    carrier_idx = var_units.index.get_level_values(carrier_level) == carrier
-                    var_units[carrier_idx] = str((unit * energy_quantity ** unit_category["energy_quantity"]).units)
+                    codes[carrier_values == carrier] = get_code(str((unit * energy_quantity ** unit_category["energy_quantity"]).units))
             # energy_quantity depends on technology index level (e.g. capacity)
             else:
-                tech_level = [level for level in var_units.index.names if "technologies" in level][0]
+                tech_level = [level for level in index.names if "technologies" in level][0]
+                tech_values = index.get_level_values(tech_level)
                 for technology in self.optimization_setup.dict_elements["Technology"]:
                     reference_carrier = technology.reference_carrier[0]
                     energy_quantity = [energy_quantity for carrier, energy_quantity in self.unit_handling.carrier_energy_quantities.items() if carrier == reference_carrier][0]
-                    tech_idx = var_units.index.get_level_values(tech_level) == technology.name
-                    var_units[tech_idx] = str((unit * energy_quantity ** unit_category["energy_quantity"]).units)
-                if "set_capacity_types" in var_units.index.names:
-                    energy_idx = var_units.index.get_level_values("set_capacity_types") == "energy"
-                    var_units[energy_idx] = var_units[energy_idx].apply(lambda u: str(self.unit_handling.ureg(u+"*hour").units))
-
+                    codes[tech_values == technology.name] = get_code(str((unit * energy_quantity ** unit_category["energy_quantity"]).units))
+                if "set_capacity_types" in index.names:
+                    energy_idx = (index.get_level_values("set_capacity_types") == "energy") & (codes >= 0)
+                    # the energy-rated units are converted once per distinct unit
+                    energy_codes = np.array([get_code(str(self.unit_handling.ureg(u + "*hour").units)) for u in list(categories)], dtype=np.int32)
+                    codes[energy_idx] = energy_codes[codes[energy_idx]]
         # variable has constant unit
         else:
-            var_units[:] = str(unit.units)
+            codes[:] = get_code(str(unit.units))
+        var_units = pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=index)
         return var_units[mask.to_series()]
 
 class Constraint(Component):
-    def __init__(self, index_sets,model):
+    def __init__(self, index_sets,model,profiler=None):
         """Initialization of a constraint
 
         :param index_sets: A reference to the index sets of the model
         :param model: A reference to the linopy model
+        :param profiler: profiler that records the added constraints
         """
 
         self.index_sets = index_sets
         self.model = model
+        self.profiler = profiler if profiler is not None else Profiler()
         super().__init__()
 
     def add_constraint(self, name, constraint, doc=""):
@@ -777,27 +826,35 @@ class Constraint(Component):
         if name not in self.docs.keys():
             if constraint is None or constraint == []:
                 return
-            elif isinstance(constraint, dict):
-                for key, cons in constraint.items():
-                    if cons is None or cons == []:
-                        return
-                    assert (isinstance(cons, lp.constraints.Constraint) or isinstance(cons, lp.constraints.AnonymousConstraint)), f"Constraint {key} has wrong format. Must be a linopy constraint but is {type(cons).__name__}"
-                    if type(key) == tuple:
-                        _key = "-".join([str(k) for k in key])
-                    else:
-                        _key = str(key)
-                    _name = f"{name}--{key}"
-                    self.add_single_constraint(_name, cons)
-                    self.docs[name] = self.compile_doc_string(doc, index_list=list(cons.indexes), name=_name)
-            elif isinstance(constraint,lp.constraints.Constraint) or isinstance(constraint, lp.constraints.AnonymousConstraint):
-                self.add_single_constraint(name, constraint)
-                self.docs[name] = self.compile_doc_string(doc, index_list=list(constraint.indexes), name= name)
-            else:
-                raise TypeError(f"Constraint {name} has wrong format. Must be either a linopy constraint or a dictionary of constraints but is {type(constraint).__name__}")
-
+            with self.profiler.profile(name, category="constraint"):
+                self._add_constraint(name, constraint, doc)
         else:
             logging.warning(f"{name} already added. Can only be added once")
 
+    def _add_constraint(self, name, constraint, doc):
+        """ adds a linopy constraint or a dictionary of constraints to the model
+
+        :param name: name of variable
+        :param constraint: either a linopy constraint or a dictionary of constraints
+        :param doc: docstring of variable"""
+        if isinstance(constraint, dict):
+            for key, cons in constraint.items():
+                if cons is None or cons == []:
+                    return
+                assert (isinstance(cons, lp.constraints.Constraint) or isinstance(cons, lp.constraints.AnonymousConstraint)), f"Constraint {key} has wrong format. Must be a linopy constraint but is {type(cons).__name__}"
+                if type(key) == tuple:
+                    _key = "-".join([str(k) for k in key])
+                else:
+                    _key = str(key)
+                _name = f"{name}--{key}"
+                self.add_single_constraint(_name, cons)
+                self.docs[name] = self.compile_doc_string(doc, index_list=list(cons.indexes), name=_name)
+        elif isinstance(constraint,lp.constraints.Constraint) or isinstance(constraint, lp.constraints.AnonymousConstraint):
+            self.add_single_constraint(name, constraint)
+            self.docs[name] = self.compile_doc_string(doc, index_list=list(constraint.indexes), name= name)
+        else:
+            raise TypeError(f"Constraint {name} has wrong format. Must be either a linopy constraint or a dictionary of constraints but is {type(constraint).__name__}")
+
     def add_single_constraint(self, name, constraint):
         """ adds a single constraint to the model
 
@@ -830,6 +887,9 @@ class Constraint(Component):
             mask = bool(mask)
         else:
             self.model.add_constraints(lhs, sign, rhs, name=name, mask=mask)
+            if self.profiler.enabled:
+                labels = self.model.constraints[name].labels
+                self.profiler.count(constraints=(labels != -1).sum(), nonzeros=((self.model.constraints[name].vars != -1) & (labels != -1)).sum())
 
     def add_pw_constraint(self, model, name, index_values, yvar, xvar, break_points, f_vals, cons_type="EQ"):
         """Adds a piece-wise linear constraint of the type f(x) = y for each index in the index_values, where f is defined
@@ -837,6 +897,8 @@ class Constraint(Component):
         Note that these method will create helper variables in form of a S0S2, sources:
          https://support.gurobi.com/hc/en-us/articles/360013421331-How-do-I-model-piecewise-linear-functions-
          https://medium.com/bcggamma/hands-on-modeling-non-linearity-in-linear-optimization-problems-f9da34c23c9a
+        The breakpoints of all index values are stacked along an additional breakpoint dimension, such that the helper
+        variables and constraints are added at once for all index values.
 
         :param model: The model to add the constraints to
         :param name: The name of the constraint
@@ -855,47 +917,49 @@ class Constraint(Component):
         xvar = model.variables[xvar]
         yvar = model.variables[yvar]
 
-        # cycle through all indices
-        for num, index_val in enumerate(index_values):
-            # extract everyting
-            x = xvar.at[index_val]
-            y = yvar.at[index_val]
-            br = break_points[index_val]
-            fv = f_vals[index_val]
-            if len(br) != len(fv):
+        # stack the breakpoints and function values, index values with fewer breakpoints are padded with nan
+        dim_name = f"{name}_breakpoints"
+        n_breakpoints = max(len(break_points[index_val]) for index_val in index_values)
+        coords = [xvar.indexes[dim] for dim in xvar.dims] + [pd.RangeIndex(n_breakpoints, name=dim_name)]
+        br = xr.DataArray(np.full([len(c) for c in coords], np.nan), coords=coords, dims=list(xvar.dims) + [dim_name])
+        fv = br.copy()
+        for index_val in index_values:
+            if len(break_points[index_val]) != len(f_vals[index_val]):
                 raise ValueError("Number of break points should be equal to number of function values for each "
                                  "index value.")
+            position = tuple(xvar.indexes[dim].get_loc(val) for dim, val in zip(xvar.dims, index_val))
+            br.values[position + (slice(0, len(break_points[index_val])), )] = break_points[index_val]
+            fv.values[position + (slice(0, len(f_vals[index_val])), )] = f_vals[index_val]
 
-            # create sos vars, assure same coords
-            sos2_vars = self._get_nonnegative_sos2_vars(model, len(br))
-            br = xr.DataArray(br, coords=sos2_vars.coords)
-            fv = xr.DataArray(fv, coords=sos2_vars.coords)
+        # create sos vars, assure same coords
+        sos2_vars = self._get_nonnegative_sos2_vars(model, name, br.notnull(), dim_name)
 
-            # add the constraints, give it a valid name
-            model.add_constraints(x.to_linexpr() - (br * sos2_vars).sum() == 0, name=f"{name}_br_{num}")
-            model.add_constraints(y.to_linexpr() - (fv * sos2_vars).sum() == 0, name=f"{name}_fv_{num}")
+        # add the constraints
+        mask = br.notnull().any(dim_name)
+        model.add_constraints(xvar.to_linexpr() - (br.fillna(0) * sos2_vars).sum(dim_name) == 0, name=f"{name}_br", mask=mask)
+        model.add_constraints(yvar.to_linexpr() - (fv.fillna(0) * sos2_vars).sum(dim_name) == 0, name=f"{name}_fv", mask=mask)
 
-    def _get_nonnegative_sos2_vars(self, model, n):
-        """Creates a list of continues nonnegative variables in an SOS2
+    def _get_nonnegative_sos2_vars(self, model, name, mask, dim_name):
+        """Creates continuous nonnegative variables that are SOS2 constrained along the breakpoint dimension. The
+        adjacency is modeled with one binary per segment between consecutive breakpoints, such that the number of
+        constraints grows linearly with the number of breakpoints
 
         :param model: The model to add the variables
-        :param n: The number of variables to create
-        :return: A list of variables that are SOS2 constrained
+        :param name: The name of the piece-wise linear constraint
+        :param mask: A mask of the valid breakpoints, the breakpoints of each index have to be consecutive
+        :param dim_name: The name of the breakpoint dimension
+        :return: The variables that are SOS2 constrained along the breakpoint dimension
         """
 
-        # vars and binaries, we need to take care of all the annoying dimension names
-        dim_name = f"sos2_dim_{uuid.uuid1()}"
-        sos2_var = model.add_variables(lower=np.zeros(n), binary=False, name=f"sos2_var_{uuid.uuid1()}", coords=(xr.DataArray(np.arange(n), dims=dim_name), ))
-        sos2_var_bin = model.add_variables(binary=True, name=f"sos2_var_bin_{uuid.uuid1()}", coords=(xr.DataArray(np.arange(n), dims=dim_name), ))
+        # the binary of a breakpoint selects the segment between the breakpoint and the next breakpoint
+        mask_segments = mask & mask.shift({dim_name: -1}, fill_value=False)
+        sos2_var = model.add_variables(lower=xr.zeros_like(mask, dtype=float), upper=xr.full_like(mask, np.inf, dtype=float), name=f"sos2_var_{name}", mask=mask)
+        sos2_var_bin = model.add_variables(binary=True, coords=mask.coords, name=f"sos2_var_bin_{name}", mask=mask_segments)
 
-        # add the constraints
-        model.add_constraints(sos2_var.sum() == 1.0)
-        model.add_constraints(sos2_var - sos2_var_bin <= 0.0)
-        model.add_constraints(sos2_var_bin.sum() <= 2.0)
-        combi_index = xr.DataArray([c for c in combinations(np.arange(n), 2) if c[0] + 1 != c[1]], dims=[dim_name, "combi_dim"])
-        model.add_constraints(sos2_var_bin.sel({dim_name: combi_index[:, 0]}).rename({dim_name: f"{dim_name}_1"})
-                              + sos2_var_bin.sel({dim_name: combi_index[:, 1]}).rename({dim_name: f"{dim_name}_1"})
-                              <= 1.0)
+        # add the constraints, exactly one segment is selected and only the breakpoints of this segment can be nonzero
+        model.add_constraints(sos2_var.sum(dim_name) == 1.0, name=f"sos2_con_sum_{name}", mask=mask.any(dim_name))
+        model.add_constraints(sos2_var_bin.sum(dim_name) == 1.0, name=f"sos2_con_bin_sum_{name}", mask=mask_segments.any(dim_name))
+        model.add_constraints(sos2_var - sos2_var_bin - sos2_var_bin.shift({dim_name: 1}) <= 0.0, name=f"sos2_con_adjacency_{name}", mask=mask_segments.any(dim_name) & mask)
 
         return sos2_var
 
@@ -6,6 +6,7 @@ optimization model as an input.
 """
 import cProfile
 import copy
+import functools
 import itertools
 import logging
 import os
@@ -17,6 +18,7 @@ import psutil
 import time
 from pathlib import Path
 from zen_garden.preprocess.extract_input_data import DataInput
+from .component import ParameterRecorder
 
 class Element:
     """
@@ -82,34 +84,39 @@ class Element:
         pid = os.getpid()
         # construct Sets
         t_start = time.perf_counter()
-        cls.construct_sets(optimization_setup)
+        with optimization_setup.profiler.profile("construct_sets"):
+            cls.construct_sets(optimization_setup)
         t1 = time.perf_counter()
         if optimization_setup.solver.run_diagnostics:
             logging.info(f"Time to construct Sets: {t1 - t_start:0.1f} seconds")
             logging.info(f"Memory usage: {psutil.Process(pid).memory_info().rss / 1024 ** 2:0.1f} MB")
         # construct Params
         t0 = time.perf_counter()
-        cls.construct_params(optimization_setup)
+        with optimization_setup.profiler.profile("construct_params"):
+            cls.construct_params(optimization_setup)
         t1 = time.perf_counter()
         if optimization_setup.solver.run_diagnostics:
             logging.info(f"Time to construct Params: {t1 - t0:0.1f} seconds")
             logging.info(f"Memory usage: {psutil.Process(pid).memory_info().rss / 1024 ** 2:0.1f} MB")
         # construct Vars
         t0 = time.perf_counter()
-        cls.construct_vars(optimization_setup)
+        with optimization_setup.profiler.profile("construct_vars"):
+            cls.construct_vars(optimization_setup)
         t1 = time.perf_counter()
         if optimization_setup.solver.run_diagnostics:
             logging.info(f"Time to construct Vars: {t1 - t0:0.1f} seconds")
             logging.info(f"Memory usage: {psutil.Process(pid).memory_info().rss / 1024 ** 2:0.1f} MB")
         # construct Constraints
         t0 = time.perf_counter()
-        cls.construct_constraints(optimization_setup)
+        with optimization_setup.profiler.profile("construct_constraints"):
+            cls.construct_constraints(optimization_setup)
         t1 = time.perf_counter()
         if optimization_setup.solver.run_diagnostics:
             logging.info(f"Time to construct Constraints: {t1 - t0:0.1f} seconds")
             logging.info(f"Memory usage: {psutil.Process(pid).memory_info().rss / 1024 ** 2:0.1f} MB")
         # construct Objective
-        optimization_setup.energy_system.construct_objective()
+        with optimization_setup.profiler.profile("construct_objective"):
+            optimization_setup.energy_system.construct_objective()
         t_end = time.perf_counter()
         if optimization_setup.solver.run_diagnostics:
             logging.info(f"Total time to construct model components: {t_end - t_start:0.1f} seconds")
@@ -316,33 +323,80 @@ class GenericRule(object):
         self.energy_system = self.optimization_setup.energy_system
         self.time_steps = self.energy_system.time_steps
 
-    # helper methods for constraint rules
-    def get_year_time_step_array(self,storage = False):
-        """ returns array with year and time steps of each year
-
-        :param storage: boolean indicating if object is a storage object
-        """
-        # create times xarray with 1 where the operation time step is in the year
-        if storage:
-            meth = self.time_steps.get_time_steps_year2storage
-            time_step_name = "set_time_steps_storage"
-        else:
-            meth = self.time_steps.get_time_steps_year2operation
-            time_step_name = "set_time_steps_operation"
-        times = [(y, t) for y in self.sets["set_time_steps_yearly"] for t in meth(y)]
-        times = pd.MultiIndex.from_tuples(times)
-        times.names = ["set_time_steps_yearly", time_step_name]
-        times = pd.Series(index=times, data=1)
-        times = times.to_xarray()
-        times = times.fillna(0.0)
-        return times
-
-    def get_year_time_step_duration_array(self):
-        """ returns array with year and duration of time steps of each year """
-        times = self.get_year_time_step_array()
-        times = times * self.parameters.time_steps_operation_duration
-        return times
+    def __init_subclass__(cls, **kwargs):
+        """ wraps the constraint rules of the subclasses, such that each rule is recorded by the profiler
+
+        :param kwargs: keyword arguments of the subclass """
+        super().__init_subclass__(**kwargs)
+        for name, method in list(vars(cls).items()):
+            if name.startswith("constraint_") and callable(method):
+                setattr(cls, name, GenericRule._profile_rule(method, f"{cls.__name__}.{name}"))
+
+    @staticmethod
+    def _profile_rule(method, name):
+        """ returns the constraint rule wrapped by the profiler
+
+        :param method: constraint rule
+        :param name: name of the record
+        :return: wrapped constraint rule """
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.optimization_setup.profiler.profile(name, category="rule"):
+                if self.optimization_setup.rule_records is None:
+                    return method(self, *args, **kwargs)
+                return self._record_rule(method, name, *args, **kwargs)
+        return wrapper
+
+    def _record_rule(self, method, name, *args, **kwargs):
+        """ calls a constraint rule and records the parameters, sets and energy system attributes it reads and the
+        constraints it adds, such that the rule can be rerun if the parameters of a scenario or the rolling horizon step change
+
+        :param method: constraint rule
+        :param name: name of the record
+        :param args: positional arguments of the rule
+        :param kwargs: keyword arguments of the rule
+        :return: return value of the rule """
+        parameters = self.optimization_setup.parameters
+        energy_system = self.optimization_setup.energy_system
+        time_steps = self.time_steps
+        recorder = ParameterRecorder(parameters)
+        # the attributes of the energy system, e.g., the time steps of the rolling horizon step, are recorded like the parameters
+        energy_system_recorder = ParameterRecorder(energy_system)
+        time_steps_recorder = ParameterRecorder(time_steps)
+        sets = self.optimization_setup.sets
+        used_sets_before = sets.used_sets
+        sets.used_sets = set()
+        constraints_before = set(self.model.constraints)
+        docs_before = set(self.constraints.docs)
+        # the rules and the classmethods they call read the parameters from the optimization setup
+        self.parameters = self.optimization_setup.parameters = recorder
+        self.energy_system = self.optimization_setup.energy_system = energy_system_recorder
+        self.time_steps = time_steps_recorder
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            self.parameters = self.optimization_setup.parameters = parameters
+            self.energy_system = self.optimization_setup.energy_system = energy_system
+            self.time_steps = time_steps
+            used_sets, sets.used_sets = sets.used_sets, used_sets_before
+            # the sets read by a nested rule are also read by the calling rule
+            if used_sets_before is not None:
+                used_sets_before |= used_sets
+        energy_system_attributes = energy_system_recorder.used_parameters
+        if time_steps_recorder.used_parameters:
+            energy_system_attributes.add("time_steps")
+        self.optimization_setup.rule_records[name] = {
+            "rule_class": type(self),
+            "method": method.__name__,
+            "parameters": recorder.used_parameters,
+            "sets": used_sets,
+            "energy_system": energy_system_attributes,
+            "constraints": [constraint for constraint in self.model.constraints if constraint not in constraints_before],
+            "docs": [doc for doc in self.constraints.docs if doc not in docs_before],
+        }
+        return result
 
+    # helper methods for constraint rules
     def get_previous_storage_time_step_array(self):
         """ returns array with storage time steps and previous storage time steps """
         times_prev = []
@@ -377,6 +431,36 @@ class GenericRule(object):
         times.index.name = "set_time_steps_storage"
         return times
 
+    def get_operation2year_time_step_array(self):
+        """ returns array with operation2year time steps """
+        times = {t: y for y in self.sets["set_time_steps_yearly"] for t in self.time_steps.get_time_steps_year2operation(y)}
+        times = pd.Series(times,name="set_time_steps_yearly").sort_index()
+        times.index.name = "set_time_steps_operation"
+        return times
+
+    def map_year2operation(self, array):
+        """ maps a yearly array onto the operational time steps by gathering the value of the year of each time step
+
+        :param array: xarray with the dimension set_time_steps_yearly
+        :return: xarray with the dimension set_time_steps_operation instead of set_time_steps_yearly
+        """
+        return self.map_and_expand(array, self.get_operation2year_time_step_array())
+
+    def sum_operation2year(self, expr):
+        """ sums an expression over the operational time steps of each year, weighted by the duration of the time steps.
+        The time steps are grouped by the year of each time step, such that no array of years and time steps is created
+
+        :param expr: linopy expression or xarray with the dimension set_time_steps_operation
+        :return: linopy expression or xarray with the dimension set_time_steps_yearly instead of set_time_steps_operation
+        """
+        times = self.get_operation2year_time_step_array()
+        years = xr.DataArray(times.values, coords={"set_time_steps_operation": times.index}, name="set_time_steps_yearly")
+        expr = (expr * self.parameters.time_steps_operation_duration).groupby(years).sum()
+        # the years are the last dimension
+        if isinstance(expr, xr.DataArray):
+            return expr.transpose(..., "set_time_steps_yearly")
+        return lp.LinearExpression(expr.data.transpose(..., "set_time_steps_yearly", "_term"), self.model)
+
     def map_and_expand(self, array, mapping):
         """ maps and expands array
 
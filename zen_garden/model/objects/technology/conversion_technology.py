@@ -213,33 +213,31 @@ class ConversionTechnology(Technology):
             sets = optimization_setup.sets
             energy_system = optimization_setup.energy_system
 
-            # init the bounds
-            index_arrs = sets.tuple_to_arr(index_values, index_names)
-            coords = [optimization_setup.sets.get_coord(data, name) for data, name in zip(index_arrs, index_names)]
-            lower = xr.DataArray(0.0, coords=coords)
-            upper = xr.DataArray(np.inf, coords=coords)
-
-            # get the sets
-            technology_set, carrier_set, node_set, timestep_set = [sets[name] for name in index_names]
-
-            for tech in technology_set:
-                for carrier in carrier_set[tech]:
-                    time_step_year = [energy_system.time_steps.convert_time_step_operation2year(t) for t in timestep_set]
-                    if carrier == sets["set_reference_carriers"][tech][0]:
-                        conversion_factor_lower = 1
-                        conversion_factor_upper = 1
-                    else:
-                        conversion_factor_lower = params.conversion_factor.loc[tech, carrier, node_set].min().data
-                        conversion_factor_upper = params.conversion_factor.loc[tech, carrier, node_set].max().data
-                        if 0 in conversion_factor_upper:
-                            _rounding_tsa = optimization_setup.solver.rounding_decimal_points_tsa
-                            raise ValueError(f"Maximum conversion factor of {tech} for carrier {carrier} is 0.\nOne reason might be that the conversion factor is too small (1e-{_rounding_tsa}), so that it is rounded to 0 after the time series aggregation.")
-
-                    lower.loc[tech, carrier, ...] = model.variables["capacity"].lower.loc[tech, "power", node_set, time_step_year].data * conversion_factor_lower
-                    upper.loc[tech, carrier, ...] = model.variables["capacity"].upper.loc[tech, "power", node_set, time_step_year].data * conversion_factor_upper
-
-            # make sure lower is never below 0
-            return lower, upper
+            if len(index_values) == 0:
+                return 0, np.inf
+            # get the arrays
+            tech_arr, carrier_arr, node_arr, time_arr = sets.tuple_to_arr(index_values, index_names)
+            # convert operationTimeStep to time_step_year: operationTimeStep -> base_time_step -> time_step_year
+            time_step_year = xr.DataArray(energy_system.time_steps.convert_time_steps_operation2year(time_arr.data))
+            lower = model.variables["capacity"].lower.loc[tech_arr, "power", node_arr, time_step_year].data
+            upper = model.variables["capacity"].upper.loc[tech_arr, "power", node_arr, time_step_year].data
+
+            # the conversion factor of the reference carrier is 1, the dependent carriers are bounded by the minimum and maximum conversion factor over all nodes and time steps
+            reference_carriers = pd.Series({tech: sets["set_reference_carriers"][tech][0] for tech in np.unique(tech_arr.data)})
+            is_dependent = carrier_arr.data != reference_carriers.loc[tech_arr.data].to_numpy()
+            if is_dependent.any():
+                conversion_factor = params.conversion_factor
+                dims_nodes_time = conversion_factor.dims[2:]
+                conversion_factor_lower = conversion_factor.min(dims_nodes_time).loc[tech_arr[is_dependent], carrier_arr[is_dependent]].data
+                conversion_factor_upper = conversion_factor.max(dims_nodes_time).loc[tech_arr[is_dependent], carrier_arr[is_dependent]].data
+                if (conversion_factor_upper == 0).any():
+                    idx_zero = np.argmax(conversion_factor_upper == 0)
+                    tech, carrier = tech_arr[is_dependent].data[idx_zero], carrier_arr[is_dependent].data[idx_zero]
+                    _rounding_tsa = optimization_setup.solver.rounding_decimal_points_tsa
+                    raise ValueError(f"Maximum conversion factor of {tech} for carrier {carrier} is 0.\nOne reason might be that the conversion factor is too small (1e-{_rounding_tsa}), so that it is rounded to 0 after the time series aggregation.")
+                lower[is_dependent] = lower[is_dependent] * conversion_factor_lower
+                upper[is_dependent] = upper[is_dependent] * conversion_factor_upper
+            return np.stack([lower, upper], axis=-1)
 
         ## Flow variables
         # input flow of carrier into technology
@@ -139,7 +139,7 @@ class StorageTechnology(Technology):
             # get the arrays
             tech_arr, node_arr, time_arr = sets.tuple_to_arr(index_values, index_list)
             # convert operationTimeStep to time_step_year: operationTimeStep -> base_time_step -> time_step_year
-            time_step_year = xr.DataArray([optimization_setup.energy_system.time_steps.convert_time_step_operation2year(time) for time in time_arr.data])
+            time_step_year = xr.DataArray(optimization_setup.energy_system.time_steps.convert_time_steps_operation2year(time_arr.data))
             lower = model.variables["capacity"].lower.loc[tech_arr, "power", node_arr, time_step_year].data
             upper = model.variables["capacity"].upper.loc[tech_arr, "power", node_arr, time_step_year].data
             return np.stack([lower, upper], axis=-1)
@@ -364,9 +364,8 @@ class StorageTechnologyRules(GenericRule):
         term_delta_storage_level = (
                 self.variables["storage_level"] - self_discharge_previous * self.variables["storage_level"].sel({"set_time_steps_storage": times_coupling}))
         # charge and discharge flow
-        times_year_time_step = self.get_year_time_step_array()
-        efficiency_charge = self.parameters.efficiency_charge.broadcast_like(times_year_time_step).where(times_year_time_step, 0.0).sum("set_time_steps_yearly")
-        efficiency_discharge = self.parameters.efficiency_discharge.broadcast_like(times_year_time_step).where(times_year_time_step, 0.0).sum("set_time_steps_yearly")
+        efficiency_charge = self.map_year2operation(self.parameters.efficiency_charge)
+        efficiency_discharge = self.map_year2operation(self.parameters.efficiency_discharge)
         term_flow_charge_discharge = (
                 self.variables["flow_storage_charge"] * efficiency_charge -
                 self.variables["flow_storage_discharge"] / efficiency_discharge +
@@ -357,42 +357,27 @@ class Technology(Element):
         variables = optimization_setup.variables
         sets = optimization_setup.sets
 
-        # TODO: This could be vectorized
-        def capacity_bounds(tech, capacity_type, loc, time):
+        def capacity_bounds():
             """ return bounds of capacity for bigM expression
 
-            :param tech: tech index
-            :param capacity_type: either power or energy
-            :param loc: location of capacity
-            :param time: investment time step
-            :return bounds: bounds of capacity"""
+            :return bounds: lower and upper bounds of capacity"""
+            params = optimization_setup.parameters
+            time = params.capacity_limit.coords["set_time_steps_yearly"]
+            # existing capacities that are still available in the investment time step
+            is_available = xr.where(params.lifetime_existing > params.lifetime, time > params.lifetime_existing - params.lifetime, time <= params.lifetime_existing + 1)
+            capacities_existing = params.capacity_existing.where(is_available).sum("set_technologies_existing")
+            capacity_addition_max = len(sets["set_time_steps_yearly"]) * params.capacity_addition_max
+            upper = np.minimum(capacity_addition_max, params.capacity_limit) + capacities_existing
             # bounds only needed for Big-M formulation, thus if any technology is modeled with on-off behavior
-            if tech in techs_on_off:
-                params = optimization_setup.parameters.dict_parameters
-                capacity_existing = params.capacity_existing
-                capacity_addition_max = params.capacity_addition_max
-                capacity_limit = params.capacity_limit
-                capacities_existing = 0
-                for id_technology_existing in sets["set_technologies_existing"][tech]:
-                    if params.lifetime_existing[tech, loc, id_technology_existing] > params.lifetime[tech]:
-                        if time > params.lifetime_existing[tech, loc, id_technology_existing] - params.lifetime[tech]:
-                            capacities_existing += capacity_existing[tech, capacity_type, loc, id_technology_existing]
-                    elif time <= params.lifetime_existing[tech, loc, id_technology_existing] + 1:
-                        capacities_existing += capacity_existing[tech, capacity_type, loc, id_technology_existing]
-
-                capacity_addition_max = len(sets["set_time_steps_yearly"]) * capacity_addition_max[tech, capacity_type]
-                max_capacity_limit = capacity_limit[tech, capacity_type, loc, time]
-                bound_capacity = min(capacity_addition_max + capacities_existing, max_capacity_limit + capacities_existing)
-                return 0, bound_capacity
-            else:
-                return 0, np.inf
+            upper = upper.where(upper.coords["set_technologies"].isin(techs_on_off), np.inf)
+            return 0, upper
 
         # bounds only needed for Big-M formulation, thus if any technology is modeled with on-off behavior
         techs_on_off = cls.create_custom_set(["set_technologies", "set_on_off"], optimization_setup)[0]
         # construct pe.Vars of the class <Technology>
         # capacity technology
         variables.add_variable(model, name="capacity", index_sets=cls.create_custom_set(["set_technologies", "set_capacity_types", "set_location", "set_time_steps_yearly"], optimization_setup),
-            bounds=capacity_bounds, doc='size of installed technology at location l and time t', unit_category={"energy_quantity": 1, "time": -1})
+            bounds=capacity_bounds(), doc='size of installed technology at location l and time t', unit_category={"energy_quantity": 1, "time": -1})
         # capacity technology before current year
         variables.add_variable(model, name="capacity_previous", index_sets=cls.create_custom_set(["set_technologies", "set_capacity_types", "set_location", "set_time_steps_yearly"], optimization_setup),
             bounds=(0,np.inf), doc='size of installed technology at location l and BEFORE time t', unit_category={"energy_quantity": 1, "time": -1})
@@ -427,6 +412,21 @@ class Technology(Element):
         variables.add_variable(model, name="carbon_emissions_technology_total", index_sets=sets["set_time_steps_yearly"],
             doc="total carbon emissions for operating technology at location l and time t", unit_category={"emissions": 1})
 
+        # knowledge of the technology diffusion limit, only for technologies with a finite diffusion rate if there are previous years
+        mask_knowledge = (optimization_setup.parameters.max_diffusion_rate != np.inf).any("set_time_steps_yearly")
+        if len(sets["set_time_steps_yearly"]) > 1:
+            variables.add_variable(model, name="knowledge", index_sets=cls.create_custom_set(["set_technologies", "set_capacity_types", "set_location", "set_time_steps_yearly"], optimization_setup),
+                bounds=(0, np.inf), doc='depreciated knowledge of the capacity additions in the previous years at location l in year y', mask=mask_knowledge, unit_category={"energy_quantity": 1, "time": -1})
+        # capacity addition of all nodes for the knowledge spillover of the technology diffusion limit
+        if optimization_setup.parameters.knowledge_spillover_rate != np.inf:
+            index_values, index_names = cls.create_custom_set(["set_technologies", "set_capacity_types", "set_time_steps_yearly"], optimization_setup)
+            index_values = [index for index in index_values if index[0] not in sets["set_transport_technologies"]]
+            variables.add_variable(model, name="capacity_addition_all_nodes", index_sets=(index_values, index_names), bounds=(0, np.inf),
+                doc='size of built technology summed over all nodes in year y', unit_category={"energy_quantity": 1, "time": -1})
+            if len(sets["set_time_steps_yearly"]) > 1:
+                variables.add_variable(model, name="knowledge_all_nodes", index_sets=(index_values, index_names), bounds=(0, np.inf),
+                    doc='depreciated knowledge of the capacity additions of all nodes in the previous years in year y', mask=mask_knowledge, unit_category={"energy_quantity": 1, "time": -1})
+
         # install technology
         # Note: binary variables are written into the lp file by linopy even if they are not relevant for the optimization,
         # which makes all problems MIPs. Therefore, we only add binary variables, if really necessary. Gurobi can handle this
@@ -791,6 +791,10 @@ class TechnologyRules(GenericRule):
         :math:`dy`: interval between planning periods\n
         :math:`\\omega`: parameter which specifies the knowledge spillover rate
 
+        The capacity additions of all nodes are summed up in the helper variable capacity_addition_all_nodes, so that the
+        knowledge spillover grows linearly with the number of nodes. The knowledge :math:`K_{j,e,y}` is a helper variable that is
+        defined recursively from the previous year, see get_depreciated_knowledge
+
         """
         # load variables and parameters
         capacity_addition = self.variables["capacity_addition"]
@@ -798,6 +802,12 @@ class TechnologyRules(GenericRule):
         knowledge_depreciation_rate = self.parameters.knowledge_depreciation_rate
         interval_between_years = self.system.interval_between_years
         spillover_rate = self.parameters.knowledge_spillover_rate
+        # sum of the capacity additions of all nodes
+        if spillover_rate != np.inf:
+            capacity_addition_all_nodes = self.variables["capacity_addition_all_nodes"]
+            lhs = capacity_addition_all_nodes - capacity_addition.sel({"set_location": self.sets["set_nodes"]}).sum("set_location")
+            lhs = self.align_and_mask(lhs, capacity_addition_all_nodes.labels != -1)
+            self.constraints.add_constraint("constraint_capacity_addition_all_nodes", lhs == 0)
         # technology diffusion rate per investment period
         tdr = (1 + self.parameters.max_diffusion_rate) ** interval_between_years - 1
         tdr = tdr.broadcast_like(capacity_addition.lower)
@@ -821,43 +831,24 @@ class TechnologyRules(GenericRule):
         mask_transport_edge = (1-mask_technology_type) & (1-mask_location)
         mask_not_transport_not_edge = mask_technology_type & mask_location
         mask_technology_location = mask_transport_edge | mask_not_transport_not_edge
-        # create xarray for previous years
-        years = pd.MultiIndex.from_tuples(
-            [(y, py) for y, py in
-             itertools.product(self.sets["set_time_steps_yearly"], self.sets["set_time_steps_yearly"])
-             if py < y],
-            names=["set_time_steps_yearly", "set_time_steps_yearly_prev"])
         # only formulate term_knowledge if there are previous years
         term_knowledge_no_spillover = capacity_addition.where(False) # dummy term
         term_knowledge = capacity_addition.where(False) # dummy term
-        if len(years) != 0:
-            # kdr for capacity additions
-            kdr = {(y, py): (1 - knowledge_depreciation_rate) ** (interval_between_years * (y - 1 - py))
-                   for y, py in years}
-            kdr = pd.Series(kdr)
-            kdr.index.names = ["set_time_steps_yearly", "set_time_steps_yearly_prev"]
-            kdr = kdr.to_xarray().fillna(0)
-
-            years = pd.Series(index=years, data=1)
-            years = years.to_xarray().fillna(0)
-            # expand and sum capacity addition over all nodes for spillover
-            capacity_addition_years = capacity_addition.rename({"set_time_steps_yearly": "set_time_steps_yearly_prev"}).broadcast_like(years)
-            kdr = kdr.broadcast_like(capacity_addition_years.lower)
-            term_knowledge_no_spillover = tdr * (capacity_addition_years * kdr).sum("set_time_steps_yearly_prev")
+        if len(self.sets["set_time_steps_yearly"]) > 1:
+            # knowledge of the capacity additions in previous years
+            knowledge = self.variables["knowledge"]
+            self.constraints.add_constraint("constraint_knowledge", self.get_depreciated_knowledge(knowledge, capacity_addition) == 0)
+            term_knowledge_no_spillover = tdr * knowledge
             # if spillover rate is not inf, calculate term knowledge with spillover
             if spillover_rate != np.inf:
-                location_index = pd.Series(index=pd.MultiIndex.from_product(
-                    [capacity_addition.coords["set_location"].values, capacity_addition.coords["set_location"].values],
-                    names=["set_location", "set_location_temp"])).to_xarray()
-                capacity_addition_location = capacity_addition_years.rename({"set_location": "set_location_temp"}).broadcast_like(
-                    location_index).sel({"set_location_temp": self.sets["set_nodes"]}).sum("set_location_temp")
+                knowledge_all_nodes = self.variables["knowledge_all_nodes"]
+                self.constraints.add_constraint("constraint_knowledge_all_nodes", self.get_depreciated_knowledge(knowledge_all_nodes, capacity_addition_all_nodes) == 0)
+                knowledge_all_nodes = knowledge_all_nodes.broadcast_like(capacity_addition.lower)
                 # calculate term spillover
-                term_spillover = capacity_addition_location - capacity_addition_years
-                sr = xr.full_like(term_spillover.const, spillover_rate)
-                sr = sr.where(mask_technology_type, 0).where(mask_location, 0)
+                term_spillover = knowledge_all_nodes - knowledge
+                sr = spillover_rate * mask_technology_type * mask_location
                 # annual knowledge addition
-                term_knowledge = capacity_addition_years + sr * term_spillover
-                term_knowledge = tdr*(term_knowledge * kdr).sum("set_time_steps_yearly_prev")
+                term_knowledge = tdr * (knowledge + sr * term_spillover)
         # unbounded market share --> only for same technology class
         capacity_previous = self.variables["capacity_previous"]
         market_share_unbounded = {
@@ -905,6 +896,20 @@ class TechnologyRules(GenericRule):
             constraints_an = lhs_an <= rhs_an
             self.constraints.add_constraint("constraint_technology_diffusion_limit",constraints_an)
 
+    def get_depreciated_knowledge(self, knowledge, capacity_addition):
+        """ returns the left-hand side of the recursive definition of the knowledge of the capacity additions in the previous years,
+        :math:`K_y = (1-\\delta)^\\mathrm{dy} K_{y-1} + \\Delta S_{y-1}`, where :math:`\\delta` is the knowledge depreciation rate.
+        Each year only refers to the previous year, so that the number of nonzeros grows linearly with the number of years
+
+        :param knowledge: knowledge variable
+        :param capacity_addition: capacity addition variable with the same index as the knowledge
+        :return: left-hand side of the constraint that defines the knowledge """
+        knowledge_depreciation_rate = self.parameters.knowledge_depreciation_rate
+        interval_between_years = self.system.interval_between_years
+        kdr = float((1 - knowledge_depreciation_rate) ** interval_between_years)
+        lhs = knowledge - kdr * knowledge.shift(set_time_steps_yearly=1) - capacity_addition.shift(set_time_steps_yearly=1)
+        return self.align_and_mask(lhs, knowledge.labels != -1)
+
     def constraint_cost_capex_yearly(self):
         """ aggregates the capex of built capacity and of existing capacity
 
@@ -973,12 +978,7 @@ class TechnologyRules(GenericRule):
 
         """
 
-        times = {y: self.parameters.time_steps_operation_duration.loc[
-            self.time_steps.get_time_steps_year2operation(y)].to_series() for y in self.sets["set_time_steps_yearly"]}
-        times = pd.concat(times, keys=times.keys())
-        times.index.names = ["set_time_steps_yearly", "set_time_steps_operation"]
-        times = times.to_xarray().broadcast_like(self.variables["cost_opex_variable"].mask)
-        term_opex_variable = (self.variables["cost_opex_variable"] * times).sum("set_time_steps_operation")
+        term_opex_variable = self.sum_operation2year(self.variables["cost_opex_variable"])
         term_opex_fixed = (self.parameters.opex_specific_fixed * self.variables["capacity"]).sum("set_capacity_types")
         lhs = self.variables["cost_opex_yearly"] - term_opex_variable - term_opex_fixed
         rhs = 0
@@ -998,8 +998,8 @@ class TechnologyRules(GenericRule):
         :math:`\\tau_{t}`: duration of time step :math:`t`
 
         """
-        term_summed_carbon_emissions_technology = (self.variables["carbon_emissions_technology"] * self.get_year_time_step_duration_array()).sum(
-            ["set_technologies", "set_location", "set_time_steps_operation"])
+        term_summed_carbon_emissions_technology = self.sum_operation2year(
+            self.variables["carbon_emissions_technology"]).sum(["set_technologies", "set_location"])
         lhs = self.variables["carbon_emissions_technology_total"] - term_summed_carbon_emissions_technology
         rhs = 0
         constraints = lhs == rhs
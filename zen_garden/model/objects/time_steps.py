@@ -263,3 +263,12 @@ class TimeStepsDicts(object):
         """
         time_steps_operation2year = self.time_steps_operation2year
         return time_steps_operation2year[time_step_operation]
+
+    def convert_time_steps_operation2year(self, time_steps_operation):
+        """ converts an array of operational time steps to the invest time steps
+
+        :param time_steps_operation: array of operational time steps
+        :return: array of invest time steps
+        """
+        time_steps_operation2year = pd.Series(self.time_steps_operation2year)
+        return time_steps_operation2year.loc[time_steps_operation].to_numpy()
@@ -9,21 +9,25 @@ The class also includes a method to solve the optimization problem.
 import copy
 import logging
 import os
+import time
 from collections import defaultdict
 
 import linopy as lp
 import numpy as np
 import pandas as pd
+import xarray as xr
 
 from .objects.component import Parameter, Variable, Constraint, IndexSet
 from .objects.element import Element
-from .objects.energy_system import EnergySystem
+from .objects.energy_system import EnergySystem, EnergySystemRules
 from .objects.technology.technology import Technology
+from .warm_start import WarmStartStore
+from zen_garden.preprocess.input_data_cache import InputDataCache
 from zen_garden.preprocess.time_series_aggregation import TimeSeriesAggregation
 from zen_garden.preprocess.unit_handling import Scaling
 from zen_garden.preprocess.parameter_change_log import parameter_change_log
 
-from ..utils import ScenarioDict, IISConstraintParser, StringUtils
+from ..utils import ScenarioDict, IISConstraintParser, StringUtils, Profiler
 
 
 class OptimizationSetup(object):
@@ -35,17 +39,25 @@ class OptimizationSetup(object):
     """
     # dict of element classes, this dict is filled in the __init__ of the package
     dict_element_classes = {}
+    # solvers to which linopy can pass the model directly without writing a problem file
+    direct_io_api_solvers = ["highs", "gurobi", "mosek"]
+    # attributes of the technologies that are overwritten by the results of the rolling horizon steps
+    existing_quantity_attributes = ["set_technologies_existing", "capacity_existing", "capacity_investment_existing", "lifetime_existing", "capex_capacity_existing",
+                                    "capacity_existing_energy", "capacity_investment_existing_energy", "capex_capacity_existing_energy"]
 
-    def __init__(self, config, scenario_dict: dict, input_data_checks):
+    def __init__(self, config, scenario_dict: dict, input_data_checks, warm_start_store=None):
         """setup optimization setup of the energy system
 
         :param config: config object used to extract the analysis, system and solver dictionaries
         :param scenario_dict: dictionary defining the scenario
         :param input_data_checks: input data checks object
+        :param warm_start_store: warm start store of the previous scenario, a new store is created if None and warm starts are enabled
         """
         self.analysis = copy.deepcopy(config.analysis)
         self.system = copy.deepcopy(config.system)
         self.solver = copy.deepcopy(config.solver)
+        # profiler of the phases and components
+        self.profiler = Profiler(enabled=self.solver.run_profiling)
         self.input_data_checks = input_data_checks
         self.input_data_checks.optimization_setup = self
         # create a dictionary with the paths to access the model inputs and check if input data exists
@@ -60,14 +72,29 @@ class OptimizationSetup(object):
         self.parameter_change_log = parameter_change_log()
         # optimization model
         self.model = None
+        # basis or solution of the previous solve to warm start the next rolling horizon step or scenario
+        if warm_start_store is None and ((self.system.use_rolling_horizon and self.solver.warm_start_rolling_horizon) or self.solver.warm_start_scenarios):
+            warm_start_store = WarmStartStore(self.solver)
+        self.warm_start_store = warm_start_store
+        # api used to pass the model to the solver and wall time of the solver call
+        self.io_api = None
+        self.solve_time = 0
         # the components
         self.variables = None
         self.parameters = None
         self.constraints = None
         self.sets = None
+        # parameters read and constraints added by each constraint rule, only recorded to patch the problem for the next scenario or rolling horizon step
+        self.rule_records = None
+        # number of scenarios for which the optimization problem was patched instead of formulated from scratch
+        self.n_patched_scenarios = 0
+        # number of rolling horizon steps for which the optimization problem of the previous step was updated
+        self.n_updated_steps = 0
 
         # initiate dictionary for storing extra year data
         self.year_specific_ts = {}
+        # on-disk cache of the extracted input data
+        self.input_data_cache = InputDataCache(self) if self.analysis.use_input_data_cache else None
 
         # sorted list of class names
         element_classes = self.dict_element_classes.keys()
@@ -91,13 +118,15 @@ class OptimizationSetup(object):
         self.set_base_configuration()
 
         # read input data into elements
-        self.read_input_csv()
+        with self.profiler.profile("read_input_csv"):
+            self.read_input_csv()
 
         # conduct consistency checks of input units
         self.energy_system.unit_handling.consistency_checks_input_units(optimization_setup=self)
 
         # conduct time series aggregation
-        self.time_series_aggregation = TimeSeriesAggregation(energy_system=self.energy_system)
+        with self.profiler.profile("time_series_aggregation"):
+            self.time_series_aggregation = TimeSeriesAggregation(energy_system=self.energy_system)
 
 
     def create_paths(self):
@@ -221,6 +250,8 @@ class OptimizationSetup(object):
             element_class = [k for k,v in self.dict_element_classes.items() if v == element.__class__][0]
             logging.info(f"Create {element_class} {element.name}")
             element.store_input_data()
+        if self.input_data_cache is not None:
+            self.input_data_cache.log_statistics()
 
     def add_element(self, element_class, name):
         """
@@ -418,12 +449,294 @@ class OptimizationSetup(object):
         self.sets = IndexSet()
         self.variables = Variable(self)
         self.parameters = Parameter(self)
-        self.constraints = Constraint(self.sets,self.model)
+        self.constraints = Constraint(self.sets,self.model,self.profiler)
+        if self.system.use_rolling_horizon:
+            self.rule_records = {} if self.system.reuse_rolling_horizon_model else None
+        else:
+            self.rule_records = {} if self.system.reuse_base_model else None
         # define and construct components of self.model
         Element.construct_model_components(self)
         # Initiate scaling object
         self.scaling = Scaling(self.model, self.solver.scaling_algorithm, self.solver.scaling_include_rhs)
 
+    def apply_scenario_delta(self, scenario_dict):
+        """ patches the optimization problem of the previous scenario to the scenario defined by scenario_dict.
+        Only the input data of the elements whose scenario entries differ is read again. The bounds of the variables
+        are overwritten and the constraint rules that read changed parameters are rerun.
+        If the scenario changes the settings, the time series, the sets or the variables, the problem has to be
+        formulated from scratch and the optimization setup must not be used anymore
+
+        :param scenario_dict: dictionary defining the scenario
+        :return: True if the problem was patched, False if it has to be formulated from scratch """
+        if self.rule_records is None or self.model is None or self.system.use_rolling_horizon:
+            return False
+        # the settings are applied to the whole setup
+        if any(self.scenario_dict.init_dict.get(key) != scenario_dict.get(key) for key in ScenarioDict._setting_elements):
+            logging.info("The scenario changes the settings, the optimization problem is formulated from scratch")
+            return False
+        # constraints that are not added by a rule, e.g., the piecewise affine capex, cannot be patched
+        recorded_constraints = {constraint for record in self.rule_records.values() for constraint in record["constraints"]}
+        if any(constraint not in recorded_constraints for constraint in self.model.constraints):
+            logging.info("The optimization problem contains constraints that cannot be patched, it is formulated from scratch")
+            return False
+        with self.profiler.profile("apply_scenario_delta"):
+            patched = self._apply_scenario_delta(scenario_dict)
+        if patched:
+            self.n_patched_scenarios += 1
+        return patched
+
+    def _apply_scenario_delta(self, scenario_dict):
+        """ patches the optimization problem of the previous scenario, see apply_scenario_delta
+
+        :param scenario_dict: dictionary defining the scenario
+        :return: True if the problem was patched, False if it has to be formulated from scratch """
+        old_scenario_dict = self.scenario_dict
+        self.scenario_dict = ScenarioDict(scenario_dict, self, self.paths)
+        skipped_entries = ScenarioDict._special_elements + ScenarioDict._setting_elements
+        changed_entries = {name for name in set(old_scenario_dict.dict) | set(self.scenario_dict.dict)
+                           if name not in skipped_entries and old_scenario_dict.dict.get(name) != self.scenario_dict.dict.get(name)}
+        changed_elements = [element for element in [self.energy_system] + self.dict_elements["Element"] if element.name in changed_entries]
+        # read the input data of the changed elements again
+        for element in changed_elements:
+            element.data_input.scenario_dict = self.scenario_dict
+            old_attributes = dict(element.__dict__)
+            element.store_input_data()
+            # the time series would have to be aggregated again
+            old_time_series = old_attributes.get("raw_time_series", {})
+            if not self._is_equal(old_time_series, getattr(element, "raw_time_series", {})):
+                logging.info(f"The scenario changes time series of {element.name}, the optimization problem is formulated from scratch")
+                return False
+            # keep the aggregated time series and all attributes that did not change
+            new_attributes = {name: value for name, value in element.__dict__.items() if name not in old_attributes or not self._is_equal(old_attributes[name], value)}
+            element.__dict__.clear()
+            element.__dict__.update(old_attributes)
+            element.__dict__.update(new_attributes)
+        self.energy_system.unit_handling.consistency_checks_input_units(optimization_setup=self)
+        # the sets define the structure of the optimization problem
+        old_sets = self.sets
+        self.sets = IndexSet()
+        Element.construct_sets(self)
+        new_sets, self.sets = self.sets, old_sets
+        if not self._sets_equal(old_sets, new_sets):
+            logging.info("The scenario changes the sets, the optimization problem is formulated from scratch")
+            return False
+        self.scaling.restore_unscaled_problem()
+        # construct the parameters of the scenario
+        old_parameters = self.parameters
+        self.parameters = Parameter(self)
+        container_attributes = set(vars(self.parameters))
+        Element.construct_params(self)
+        changed_parameters = {name for name in set(vars(old_parameters)) | set(vars(self.parameters))
+                              if name not in container_attributes and not self._is_equal(getattr(old_parameters, name, None), getattr(self.parameters, name, None))}
+        # construct the variables of the scenario in an empty model and overwrite the bounds
+        model, variables = self.model, self.variables
+        self.model, self.variables = lp.Model(solver_dir=self.solver.solver_dir), Variable(self)
+        try:
+            Element.construct_vars(self)
+        finally:
+            new_model, self.model, self.variables = self.model, model, variables
+        n_bounds = 0
+        for name in new_model.variables:
+            # variables without constraints, e.g., the on-off variables, are removed from the model
+            if name not in self.model.variables and not (new_model.variables[name].labels != -1).any():
+                continue
+            if name not in self.model.variables or not (self.model.variables[name].labels != -1).equals(new_model.variables[name].labels != -1):
+                logging.info(f"The scenario changes the variable {name}, the optimization problem is formulated from scratch")
+                return False
+            variable, new_variable = self.model.variables[name], new_model.variables[name]
+            if not variable.lower.equals(new_variable.lower):
+                variable.lower = new_variable.lower.copy()
+                n_bounds += 1
+            if not variable.upper.equals(new_variable.upper):
+                variable.upper = new_variable.upper.copy()
+                n_bounds += 1
+        # the solution and the duals of the previous scenario would have to be aligned with the new constraints
+        self.model.reset_solution()
+        # rerun the constraint rules that read changed parameters
+        changed_records = [record for record in self.rule_records.values() if record["parameters"] & changed_parameters]
+        for record in changed_records:
+            self.model.remove_constraints([constraint for constraint in record["constraints"] if constraint in self.model.constraints])
+            for doc in record["docs"]:
+                self.constraints.docs.pop(doc, None)
+        for record in changed_records:
+            getattr(record["rule_class"](self), record["method"])()
+        self.scaling = Scaling(self.model, self.solver.scaling_algorithm, self.solver.scaling_include_rhs)
+        logging.info(f"Patched the optimization problem: {len(changed_parameters)} changed parameters, {n_bounds} changed variable bounds, {len(changed_records)} constraint rules rerun")
+        return True
+
+    def apply_rolling_horizon_step(self):
+        """ updates the optimization problem of the previous rolling horizon step to the current step instead of formulating
+        it from scratch. The time coordinates of the variables and of the constraints are shifted to the years of the current
+        step, the bounds of the variables are overwritten and the constraint rules are rerun if they read parameters or sets
+        that changed, e.g., the existing capacities and the cumulative carbon emissions, or if they depend on the time steps of the step.
+        If the number of time steps or the variables change, e.g., in the last step, the problem has to be formulated from scratch
+
+        :return: True if the problem was updated, False if it has to be formulated from scratch """
+        if self.rule_records is None or self.model is None or not self.system.use_rolling_horizon:
+            return False
+        # constraints that are not added by a rule, e.g., the piecewise affine capex, cannot be updated
+        recorded_constraints = {constraint for record in self.rule_records.values() for constraint in record["constraints"]}
+        if any(constraint not in recorded_constraints for constraint in self.model.constraints):
+            logging.info("The optimization problem contains constraints that cannot be updated, it is formulated from scratch")
+            return False
+        with self.profiler.profile("apply_rolling_horizon_step"):
+            updated = self._apply_rolling_horizon_step()
+        if updated:
+            self.n_updated_steps += 1
+        return updated
+
+    def _apply_rolling_horizon_step(self):
+        """ updates the optimization problem of the previous rolling horizon step, see apply_rolling_horizon_step
+
+        :return: True if the problem was updated, False if it has to be formulated from scratch """
+        # the sets of the current step
+        old_sets = self.sets
+        self.sets = IndexSet()
+        Element.construct_sets(self)
+        time_coords = self._get_time_coords(old_sets, self.sets)
+        if time_coords is None:
+            logging.info("The number of time steps changes, the optimization problem is formulated from scratch")
+            return False
+        # the sets of the other time steps, e.g., of the entire horizon, are not shifted with the step
+        step_sets = {name for name in self.sets.sets if "time_steps" in name and name not in time_coords}
+        changed_sets = {name for name in set(old_sets.sets) | set(self.sets.sets)
+                        if name not in time_coords and (name not in old_sets or name not in self.sets or not self._set_equal(old_sets[name], self.sets[name]))}
+        self.scaling.restore_unscaled_problem()
+        # construct the parameters of the step, the parameters of the previous step are compared in the time steps of the current step
+        old_parameters = self.parameters
+        self.parameters = Parameter(self)
+        container_attributes = set(vars(self.parameters))
+        Element.construct_params(self)
+        changed_parameters = {name for name in set(vars(old_parameters)) | set(vars(self.parameters))
+                              if name not in container_attributes and not self._is_equal(self._shift_time_coords(getattr(old_parameters, name, None), time_coords), getattr(self.parameters, name, None))}
+        # construct the variables of the step in an empty model and overwrite the bounds
+        model = self.model
+        self.model, self.variables = lp.Model(solver_dir=self.solver.solver_dir), Variable(self)
+        try:
+            Element.construct_vars(self)
+        finally:
+            new_model, self.model = self.model, model
+        # the solution and the duals of the previous step would have to be aligned with the new constraints
+        self.model.reset_solution()
+        n_bounds = 0
+        for name in new_model.variables:
+            # variables without constraints, e.g., the on-off variables, are removed from the model
+            if name not in self.model.variables and not (new_model.variables[name].labels != -1).any():
+                continue
+            if name not in self.model.variables:
+                logging.info(f"The step changes the variable {name}, the optimization problem is formulated from scratch")
+                return False
+            variable, new_variable = self.model.variables[name], new_model.variables[name]
+            data = self._shift_time_coords(variable.data, time_coords)
+            if not (data.labels != -1).equals(new_variable.labels != -1):
+                logging.info(f"The step changes the variable {name}, the optimization problem is formulated from scratch")
+                return False
+            variable._data = data
+            if not variable.lower.equals(new_variable.lower):
+                variable.lower = new_variable.lower.copy()
+                n_bounds += 1
+            if not variable.upper.equals(new_variable.upper):
+                variable.upper = new_variable.upper.copy()
+                n_bounds += 1
+        if any(name not in new_model.variables for name in self.model.variables):
+            logging.info("The step removes variables, the optimization problem is formulated from scratch")
+            return False
+        # rerun the constraint rules that read changed parameters or sets or that depend on the time steps of the step
+        changed_records = [record for record in self.rule_records.values()
+                           if record["parameters"] & changed_parameters or record["sets"] & (changed_sets | step_sets)
+                           or any("time_steps" in attribute for attribute in record["energy_system"])]
+        self.constraints.index_sets = self.sets
+        for record in changed_records:
+            self.model.remove_constraints([constraint for constraint in record["constraints"] if constraint in self.model.constraints])
+            for doc in record["docs"]:
+                self.constraints.docs.pop(doc, None)
+        for name in self.model.constraints:
+            constraint = self.model.constraints[name]
+            constraint._data = self._shift_time_coords(constraint.data, time_coords)
+        for record in changed_records:
+            getattr(record["rule_class"](self), record["method"])()
+        # the objective sums up the shifted variables
+        self.model.remove_objective()
+        self.energy_system.rules = EnergySystemRules(self)
+        self.energy_system.construct_objective()
+        self.scaling = Scaling(self.model, self.solver.scaling_algorithm, self.solver.scaling_include_rhs)
+        logging.info(f"Updated the optimization problem to the rolling horizon step: {len(changed_parameters)} changed parameters, {n_bounds} changed variable bounds, "
+                     f"{len(changed_records)} of {len(self.rule_records)} constraint rules rerun")
+        return True
+
+    @staticmethod
+    def _get_time_coords(sets, other_sets):
+        """ returns the time steps of other_sets that replace the time steps of sets, such that the time coordinates of
+        the previous rolling horizon step can be shifted to the current step
+
+        :param sets: IndexSet of the previous step
+        :param other_sets: IndexSet of the current step
+        :return: dict of the time step sets and their new elements, None if the number of time steps differs """
+        time_coords = {}
+        for name in ["set_time_steps_yearly", "set_time_steps_operation", "set_time_steps_storage"]:
+            if len(sets[name]) != len(other_sets[name]):
+                return None
+            time_coords[name] = list(other_sets[name])
+        return time_coords
+
+    @staticmethod
+    def _shift_time_coords(value, time_coords):
+        """ replaces the time coordinates of a parameter or of the data of a variable or constraint with the time steps of the current step
+
+        :param value: value whose time coordinates are replaced
+        :param time_coords: dict of the time step sets and their new elements
+        :return: value with the replaced time coordinates """
+        if not isinstance(value, (xr.DataArray, xr.Dataset)):
+            return value
+        coords = {dim: elements for dim, elements in time_coords.items() if dim in value.dims and value.sizes[dim] == len(elements)}
+        return value.assign_coords(coords)
+
+    @staticmethod
+    def _sets_equal(sets, other_sets):
+        """ checks if two IndexSets contain the same sets with the same elements
+
+        :param sets: IndexSet
+        :param other_sets: other IndexSet
+        :return: True if the sets are equal """
+        if sets.sets.keys() != other_sets.sets.keys():
+            return False
+        return all(OptimizationSetup._set_equal(zen_set, other_sets[name]) for name, zen_set in sets.sets.items())
+
+    @staticmethod
+    def _set_equal(zen_set, other_set):
+        """ checks if two sets contain the same elements
+
+        :param zen_set: ZenSet
+        :param other_set: other ZenSet
+        :return: True if the sets are equal """
+        if zen_set.is_indexed() != other_set.is_indexed() or list(zen_set) != list(other_set):
+            return False
+        if zen_set.is_indexed() and any(list(zen_set[key]) != list(other_set[key]) for key in zen_set):
+            return False
+        return True
+
+    @staticmethod
+    def _is_equal(value, other_value):
+        """ checks if two attributes or parameters are equal, including pandas and xarray objects
+
+        :param value: value
+        :param other_value: other value
+        :return: True if the values are equal """
+        if type(value) is not type(other_value):
+            return False
+        if isinstance(value, (pd.Series, pd.DataFrame, pd.Index, xr.DataArray)):
+            return value.equals(other_value)
+        if isinstance(value, np.ndarray):
+            return np.array_equal(value, other_value)
+        if isinstance(value, dict):
+            return value.keys() == other_value.keys() and all(OptimizationSetup._is_equal(value[key], other_value[key]) for key in value)
+        if isinstance(value, (list, tuple)):
+            return len(value) == len(other_value) and all(OptimizationSetup._is_equal(item, other_item) for item, other_item in zip(value, other_value))
+        try:
+            return bool(value == other_value)
+        except (TypeError, ValueError):
+            return False
+
     def get_optimization_horizon(self):
         """ returns list of optimization horizon steps """
         # if using rolling horizon
@@ -434,6 +747,8 @@ class OptimizationSetup(object):
             # skip years_in_decision_horizon years
             self.optimized_time_steps = [year for year in time_steps_yearly if (year % self.system.years_in_decision_horizon == 0 or year == time_steps_yearly[-1])]
             self.steps_horizon = {year: list(range(year, min(year + self.years_in_horizon, max(time_steps_yearly) + 1))) for year in self.optimized_time_steps}
+            # store the existing quantities to reset them after the last step without re-reading the input data
+            self.store_existing_quantities()
         # if no rolling horizon
         else:
             self.years_in_horizon = len(self.energy_system.set_time_steps_yearly)
@@ -465,7 +780,7 @@ class OptimizationSetup(object):
         """ select subset of time indices, matching the step horizon
 
         :param step_horizon: step of the rolling horizon """
-
+        self.profiler.step = step_horizon
         if self.system.use_rolling_horizon:
             self.step_horizon = step_horizon
             time_steps_yearly_horizon = self.steps_horizon[step_horizon]
@@ -498,17 +813,30 @@ class OptimizationSetup(object):
         solver_options = {key: self.solver.solver_options[key] for key in self.solver.solver_options if self.solver.solver_options[key] is not None}
 
         logging.info(f"\n--- Solve model instance using {solver_name} ---\n")
+        # remap the basis or solution of the previous solve onto the model
+        warm_start_file = None
+        if self.warm_start_store is not None:
+            warm_start_file = self.warm_start_store.write_warm_start_file(self)
         # disable logger temporarily
         logging.disable(logging.WARNING)
 
         if solver_name == "gurobi":
-            self.model.solve(solver_name=solver_name, io_api=self.solver.io_api,
-                             keep_files=self.solver.keep_files, sanitize_zeros=True,
-                             # remaining kwargs are passed to the solver
-                             **solver_options)
+            # remaining kwargs are passed to the solver
+            solver_kwargs = solver_options
+        elif solver_name == "highs" and "threads" in solver_options:
+            solver_kwargs = {"threads": solver_options["threads"]}
         else:
-            self.model.solve(solver_name=solver_name, io_api=self.solver.io_api,
-                             keep_files=self.solver.keep_files, sanitize_zeros=True)
+            solver_kwargs = {}
+        self.io_api = self.get_io_api()
+        t0 = time.perf_counter()
+        with self.profiler.profile("solve") as record:
+            self.model.solve(solver_name=solver_name, io_api=self.io_api,
+                             keep_files=self.solver.keep_files, sanitize_zeros=True,
+                             warmstart_fn=warm_start_file, **solver_kwargs)
+            record["io_api"] = self.io_api
+        self.solve_time = time.perf_counter() - t0
+        if warm_start_file is not None and not self.solver.keep_files:
+            os.remove(warm_start_file)
         # enable logger
         logging.disable(logging.NOTSET)
         if self.model.termination_condition == 'optimal':
@@ -519,6 +847,17 @@ class OptimizationSetup(object):
         else:
             self.optimality = False
 
+    def get_io_api(self):
+        """ returns the api that is used to pass the model to the solver. With "auto", the model is passed to the solver
+        in memory if the solver has a direct api, otherwise it is written to an lp file
+
+        :return: io_api of linopy """
+        if self.solver.io_api != "auto":
+            return self.solver.io_api
+        if self.solver.name in self.direct_io_api_solvers and self.solver.name in lp.available_solvers:
+            return "direct"
+        return "lp"
+
     def write_IIS(self):
         """ write an ILP file to print the IIS if infeasible. Only possible for gurobi
         """
@@ -533,6 +872,9 @@ class OptimizationSetup(object):
         """ adds the new capacity additions and the cumulative carbon emissions for next
 
         :param step_horizon: step of the rolling horizon """
+        # keep the basis and the solution to warm start the next step or scenario
+        if self.warm_start_store is not None:
+            self.warm_start_store.save_warm_start(self)
         # add newly capacity_addition of first year to existing capacity
         self.add_new_capacity_addition(step_horizon)
         # add cumulative carbon emissions to previous carbon emissions
@@ -563,29 +905,21 @@ class OptimizationSetup(object):
                     tech.add_new_capacity_addition_tech(capacity_addition_tech, cost_capex_tech, decision_horizon)
                     tech.add_new_capacity_investment(capacity_investment, decision_horizon)
             else:
-                # TODO clean up
                 # reset to initial values
-                for tech in self.get_all_elements(Technology):
-                    # extract existing capacity
-                    set_location = tech.location_type
-                    set_time_steps_yearly = self.energy_system.set_time_steps_yearly_entire_horizon
-                    self.energy_system.set_time_steps_yearly = copy.deepcopy(set_time_steps_yearly)
-                    tech.set_technologies_existing = tech.data_input.extract_set_technologies_existing()
-                    tech.capacity_existing = tech.data_input.extract_input_data(
-                        "capacity_existing", index_sets=[set_location, "set_technologies_existing"], unit_category={"energy_quantity": 1, "time": -1})
-                    tech.capacity_investment_existing = tech.data_input.extract_input_data(
-                        "capacity_investment_existing", index_sets=[set_location, "set_time_steps_yearly"], time_steps="set_time_steps_yearly", unit_category={"energy_quantity": 1, "time": -1})
-                    tech.lifetime_existing = tech.data_input.extract_lifetime_existing(
-                        "capacity_existing", index_sets=[set_location, "set_technologies_existing"])
-                    # calculate capex of existing capacity
-                    tech.capex_capacity_existing = tech.calculate_capex_of_capacities_existing()
-                    if tech.__class__.__name__ == "StorageTechnology":
-                        tech.capacity_existing_energy = tech.data_input.extract_input_data(
-                            "capacity_existing_energy", index_sets=["set_nodes", "set_technologies_existing"], unit_category={"energy_quantity": 1})
-                        tech.capacity_investment_existing_energy = tech.data_input.extract_input_data(
-                            "capacity_investment_existing_energy", index_sets=["set_nodes", "set_time_steps_yearly"],
-                            time_steps="set_time_steps_yearly", unit_category={"energy_quantity": 1})
-                        tech.capex_capacity_existing_energy = tech.calculate_capex_of_capacities_existing(storage_energy=True)
+                self.energy_system.set_time_steps_yearly = copy.deepcopy(self.energy_system.set_time_steps_yearly_entire_horizon)
+                self.reset_existing_quantities()
+
+    def store_existing_quantities(self):
+        """ stores a copy of the existing quantities of all technologies and the cumulative carbon emissions before they are overwritten in the rolling horizon steps """
+        self.existing_quantities = {"carbon_emissions_cumulative_existing": copy.deepcopy(self.energy_system.carbon_emissions_cumulative_existing)}
+        for tech in self.get_all_elements(Technology):
+            self.existing_quantities[tech.name] = {attribute: copy.deepcopy(getattr(tech, attribute)) for attribute in self.existing_quantity_attributes if hasattr(tech, attribute)}
+
+    def reset_existing_quantities(self):
+        """ resets the existing quantities of all technologies to the values before the first rolling horizon step """
+        for tech in self.get_all_elements(Technology):
+            for attribute, value in self.existing_quantities[tech.name].items():
+                setattr(tech, attribute, copy.deepcopy(value))
 
     def add_carbon_emission_cumulative(self, step_horizon):
         """ overwrite previous carbon emissions with cumulative carbon emissions
@@ -600,8 +934,7 @@ class OptimizationSetup(object):
                 carbon_emissions_annual = self.model.solution["carbon_emissions_annual"].loc[last_year].item()
                 self.energy_system.carbon_emissions_cumulative_existing = carbon_emissions_cumulative + carbon_emissions_annual * (interval_between_years - 1)
             else:
-                self.energy_system.carbon_emissions_cumulative_existing = self.energy_system.data_input.extract_input_data(
-                    "carbon_emissions_cumulative_existing", index_sets=[], unit_category={"emissions": 1})
+                self.energy_system.carbon_emissions_cumulative_existing = copy.deepcopy(self.existing_quantities["carbon_emissions_cumulative_existing"])
 
     def initialize_component(self, calling_class, component_name, index_names=None, set_time_steps=None, capacity_types=False):
         """ this method initializes a modeling component by extracting the stored input data.
@@ -0,0 +1,318 @@
+"""
+Class storing the basis or the solution of a solve to warm start the next related solve.
+
+The basis and the solution are stored per variable and constraint name with the coordinates of the components.
+Therefore, they can be remapped onto the model of the next rolling horizon step or the next scenario, even if the
+labels of the variables and constraints differ between the models.
+"""
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+
+
+class WarmStartStore(object):
+    """ Stores the basis or the solution of a solve and writes the warm start file of the next related solve """
+    # basis status of HiGHS, which is also used to store the basis of gurobi
+    status_lower = 0
+    status_basic = 1
+    status_upper = 2
+    status_zero = 3
+    # mapping of the gurobi VBasis and CBasis attributes to the basis status
+    gurobi_status = {-1: status_lower, 0: status_basic, -2: status_upper, -3: status_zero}
+    # solvers that can be warm started
+    warm_start_solvers = ["highs", "gurobi"]
+    # share of the variables and constraints that must be remapped, otherwise the solve is started from scratch
+    min_remapped_share = 0.5
+
+    def __init__(self, solver):
+        """ initializes an empty warm start store
+
+        :param solver: solver configuration """
+        self.solver = solver
+        # primal solution and basis of the previous solve
+        self.solution = None
+        self.variable_basis = None
+        self.constraint_basis = None
+        # type of the warm start of the current solve, None if the solve is started from scratch
+        self.warm_start_type = None
+        # simplex iterations of the current solve and of the last solve that was started from scratch
+        self.number_iterations = None
+        self.reference_iterations = None
+        self.iterations_saved = None
+
+    def write_warm_start_file(self, optimization_setup):
+        """ remaps the stored basis or solution onto the current model and writes the warm start file.
+        The basis is used for linear programs if the warm start type is "basis", otherwise the solution is used
+
+        :param optimization_setup: optimization setup of the current solve
+        :return: path of the warm start file, None if no warm start is available """
+        self.warm_start_type = None
+        if self.solution is None or self.solver.name not in self.warm_start_solvers:
+            return None
+        model = optimization_setup.model
+        use_basis = self.solver.warm_start_type == "basis" and self.variable_basis is not None and model.type == "LP"
+        file_name = Path(model.solver_dir) / f"warm_start_{os.getpid()}"
+        if use_basis:
+            variable_labels, variable_status, constraint_labels, constraint_status, remapped_share = self.remap_basis(model)
+            if remapped_share < self.min_remapped_share:
+                logging.info(f"Only {remapped_share:.0%} of the basis could be remapped onto the current model, the solver is started from scratch")
+                return None
+            warm_start_file = file_name.with_suffix(".bas")
+            if self.solver.name == "highs":
+                self.write_highs_basis(warm_start_file, variable_labels, variable_status, constraint_labels, constraint_status)
+            else:
+                self.write_gurobi_basis(warm_start_file, variable_labels, variable_status, constraint_labels, constraint_status)
+            self.warm_start_type = "basis"
+        else:
+            labels, values, remapped_share = self.remap_solution(model)
+            if remapped_share < self.min_remapped_share:
+                logging.info(f"Only {remapped_share:.0%} of the solution could be remapped onto the current model, the solver is started from scratch")
+                return None
+            # the variables of the current model are scaled
+            if self.solver.use_scaling:
+                values = values / optimization_setup.scaling.D_c_inv[labels]
+            warm_start_file = file_name.with_suffix(".sol")
+            self.write_solution(warm_start_file, labels, values)
+            self.warm_start_type = "solution"
+        logging.info(f"Warm starting the solver from the {self.warm_start_type} of the previous solve")
+        return warm_start_file
+
+    def save_warm_start(self, optimization_setup):
+        """ stores the solution and the basis of the current solve and the number of simplex iterations.
+        Must be called after the solution is rescaled
+
+        :param optimization_setup: optimization setup of the current solve """
+        model = optimization_setup.model
+        self.solution = model.solution
+        self.variable_basis, self.constraint_basis = self.get_basis(model)
+        self.number_iterations = self.get_number_iterations(model)
+        if self.number_iterations is None:
+            return
+        if self.warm_start_type is None:
+            self.reference_iterations = self.number_iterations
+            self.iterations_saved = None
+        elif self.reference_iterations is not None:
+            self.iterations_saved = self.reference_iterations - self.number_iterations
+            logging.info(f"The warm start saved {self.iterations_saved} of {self.reference_iterations} simplex iterations")
+
+    def get_benchmarking_data(self):
+        """ returns the warm start information that is saved in the benchmarking data
+
+        :return: dictionary with the type of the warm start and the saved iterations """
+        return {"warm_start_type": self.warm_start_type, "reference_iterations": self.reference_iterations,
+                "iterations_saved": self.iterations_saved}
+
+    def get_basis(self, model):
+        """ gets the basis status of all variables and constraints from the solver model
+
+        :param model: solved linopy model
+        :return: dictionaries of the basis status per variable and constraint name, None if no basis is available """
+        solver_model = getattr(model, "solver_model", None)
+        if solver_model is None or model.type != "LP":
+            return None, None
+        if self.solver.name == "highs":
+            basis = solver_model.getBasis()
+            if not basis.valid:
+                return None, None
+            lp = solver_model.getLp()
+            variable_names, variable_status = lp.col_names_, [int(status) for status in basis.col_status]
+            constraint_names, constraint_status = lp.row_names_, [int(status) for status in basis.row_status]
+        elif self.solver.name == "gurobi":
+            from gurobipy import GurobiError
+            # the basis is only available if the problem was solved with the simplex or with crossover
+            try:
+                gurobi_vars = solver_model.getVars()
+                gurobi_constrs = solver_model.getConstrs()
+                variable_names = solver_model.getAttr("VarName", gurobi_vars)
+                variable_status = [self.gurobi_status[status] for status in solver_model.getAttr("VBasis", gurobi_vars)]
+                constraint_names = solver_model.getAttr("ConstrName", gurobi_constrs)
+                constraint_status = [self.gurobi_status[status] for status in solver_model.getAttr("CBasis", gurobi_constrs)]
+            except GurobiError:
+                logging.info("The basis of the solve is not available to warm start the next solve")
+                return None, None
+        else:
+            return None, None
+        variable_basis = self.map_status_to_components(model.variables, variable_names, variable_status)
+        constraint_basis = self.map_status_to_components(model.constraints, constraint_names, constraint_status)
+        return variable_basis, constraint_basis
+
+    def get_number_iterations(self, model):
+        """ gets the number of simplex iterations of the solve
+
+        :param model: solved linopy model
+        :return: number of simplex iterations, None if not available """
+        solver_model = getattr(model, "solver_model", None)
+        if solver_model is None:
+            return None
+        if self.solver.name == "highs":
+            return solver_model.getInfo().simplex_iteration_count
+        elif self.solver.name == "gurobi":
+            return int(solver_model.IterCount)
+        return None
+
+    @staticmethod
+    def map_status_to_components(components, names, status):
+        """ maps the basis status of the solver columns or rows to the variables or constraints of the model.
+        The solver names of the columns and rows are the linopy labels prefixed with "x" or "c"
+
+        :param components: variables or constraints of the linopy model
+        :param names: names of the solver columns or rows
+        :param status: basis status of the solver columns or rows
+        :return: dictionary of the basis status per component name, nan where the component is not active """
+        labels = np.array([int(name[1:]) for name in names], dtype=int)
+        status_of_label = np.full(max(labels.max(initial=-1) + 1, 1), -1, dtype=int)
+        status_of_label[labels] = status
+        basis = {}
+        for name in components:
+            component_labels = components[name].labels
+            values = component_labels.values
+            mask = (values >= 0) & (values < len(status_of_label))
+            status_of_component = np.where(mask, status_of_label[np.where(mask, values, 0)], -1)
+            basis[name] = xr.DataArray(np.where(status_of_component != -1, status_of_component, np.nan), coords=component_labels.coords, dims=component_labels.dims)
+        return basis
+
+    @staticmethod
+    def remap_component(stored, labels, fill_value):
+        """ remaps the stored values of a component onto the labels of the component in the current model
+
+        :param stored: stored values of the component, None if the component did not exist
+        :param labels: labels of the component in the current model
+        :param fill_value: value of the coordinates that are not stored
+        :return: remapped values of the active labels and whether a value was stored for them """
+        if stored is None:
+            values = np.full(labels.shape, fill_value)
+            remapped = np.zeros(labels.shape, dtype=bool)
+        else:
+            values = stored.reindex({dim: labels.coords[dim] for dim in labels.dims}).broadcast_like(labels).transpose(*labels.dims)
+            remapped = values.notnull().values
+            values = np.where(remapped, values.values, fill_value)
+        mask = labels.values != -1
+        return labels.values[mask], values[mask], remapped[mask]
+
+    def remap_solution(self, model):
+        """ remaps the stored solution onto the variables of the current model, missing values are set to zero
+
+        :param model: linopy model of the current solve
+        :return: labels and values of the variables and the share of the variables with a stored value """
+        labels = []
+        values = []
+        remapped = []
+        for name in model.variables:
+            var_labels, var_values, var_remapped = self.remap_component(self.solution.get(name), model.variables[name].labels, 0)
+            labels.append(var_labels)
+            values.append(var_values.astype(float))
+            remapped.append(var_remapped)
+        remapped = np.concatenate(remapped)
+        return np.concatenate(labels), np.concatenate(values), remapped.mean() if remapped.size else 0.0
+
+    def remap_basis(self, model):
+        """ remaps the stored basis onto the variables and constraints of the current model.
+        Variables without a stored status are nonbasic at a bound, constraints without a stored status are basic.
+        Afterwards, the number of basic variables and constraints is corrected to the number of constraints,
+        otherwise the solvers reject the basis
+
+        :param model: linopy model of the current solve
+        :return: labels and basis status of the variables and constraints and the share of them with a stored status """
+        # the solver only receives the constraints that remain after sanitizing, which is repeated when solving
+        model.constraints.sanitize_zeros()
+        model.constraints.sanitize_infinities()
+        variable_labels, variable_status, variable_default, variable_remapped = [], [], [], []
+        for name in model.variables:
+            variable = model.variables[name]
+            # default status of variables without a stored status, depending on the finite bound
+            lower = np.isfinite(variable.lower.broadcast_like(variable.labels).transpose(*variable.labels.dims).values)
+            upper = np.isfinite(variable.upper.broadcast_like(variable.labels).transpose(*variable.labels.dims).values)
+            default = np.where(lower, self.status_lower, np.where(upper, self.status_upper, self.status_zero))
+            labels, status, remapped = self.remap_component(self.variable_basis.get(name), variable.labels, -1)
+            variable_labels.append(labels)
+            variable_status.append(status)
+            variable_remapped.append(remapped)
+            variable_default.append(default[variable.labels.values != -1])
+        constraint_labels, constraint_status, constraint_default = [], [], []
+        for name in model.constraints:
+            constraint = model.constraints[name]
+            # constraints without any variable are not passed to the solver
+            has_variables = ((constraint.vars != -1) & (constraint.coeffs != 0)).any("_term")
+            active_labels = constraint.labels.where(has_variables, -1)
+            # nonbasic status of the constraints at the bound given by the sign
+            sign = constraint.sign.broadcast_like(active_labels).transpose(*active_labels.dims).values
+            default = np.where(sign == "<=", self.status_upper, self.status_lower)
+            labels, status, _ = self.remap_component(self.constraint_basis.get(name), active_labels, -1)
+            constraint_labels.append(labels)
+            constraint_status.append(status)
+            constraint_default.append(default[active_labels.values != -1])
+        variable_labels, variable_status, variable_default = (np.concatenate(array).astype(int) for array in [variable_labels, variable_status, variable_default])
+        constraint_labels, constraint_status, constraint_default = (np.concatenate(array).astype(int) for array in [constraint_labels, constraint_status, constraint_default])
+        variable_remapped = np.concatenate(variable_remapped)
+        new_constraints = constraint_status == -1
+        variable_status = np.where(variable_status == -1, variable_default, variable_status)
+        constraint_status = np.where(new_constraints, self.status_basic, constraint_status)
+        # correct the number of basic variables and constraints
+        n_excess = np.sum(variable_status == self.status_basic) + np.sum(constraint_status == self.status_basic) - len(constraint_status)
+        if n_excess > 0:
+            # first make the constraints without stored status nonbasic, then the basic variables
+            idx_constraints = np.flatnonzero(new_constraints & (constraint_status == self.status_basic))[:n_excess]
+            constraint_status[idx_constraints] = constraint_default[idx_constraints]
+            n_excess -= len(idx_constraints)
+            idx_variables = np.flatnonzero(variable_status == self.status_basic)[::-1][:n_excess]
+            variable_status[idx_variables] = variable_default[idx_variables]
+        elif n_excess < 0:
+            idx_constraints = np.flatnonzero(constraint_status != self.status_basic)[:-n_excess]
+            constraint_status[idx_constraints] = self.status_basic
+        n_remapped = np.sum(variable_remapped) + np.sum(~new_constraints)
+        n_total = len(variable_remapped) + len(new_constraints)
+        logging.info(f"Remapped the basis of {np.sum(variable_remapped)} of {len(variable_remapped)} variables and {np.sum(~new_constraints)} of {len(new_constraints)} constraints onto the current model")
+        remapped_share = n_remapped / n_total if n_total else 0.0
+        return variable_labels, variable_status, constraint_labels, constraint_status, remapped_share
+
+    @staticmethod
+    def write_highs_basis(file_name, variable_labels, variable_status, constraint_labels, constraint_status):
+        """ writes the basis in the name based HiGHS basis file format
+
+        :param file_name: path of the basis file
+        :param variable_labels: labels of the variables
+        :param variable_status: basis status of the variables
+        :param constraint_labels: labels of the constraints
+        :param constraint_status: basis status of the constraints """
+        with open(file_name, "w") as file:
+            file.write(f"HiGHS_basis_file v2\nValid\n# Columns {len(variable_labels)}\n")
+            file.writelines(f"x{label} {status}\n" for label, status in zip(variable_labels, variable_status))
+            file.write(f"# Rows {len(constraint_labels)}\n")
+            file.writelines(f"c{label} {status}\n" for label, status in zip(constraint_labels, constraint_status))
+
+    def write_gurobi_basis(self, file_name, variable_labels, variable_status, constraint_labels, constraint_status):
+        """ writes the basis in the MPS basis file format of gurobi. Each basic variable is paired with a nonbasic constraint,
+        the variables that are not listed are nonbasic at their lower bound and the constraints that are not listed are basic
+
+        :param file_name: path of the basis file
+        :param variable_labels: labels of the variables
+        :param variable_status: basis status of the variables
+        :param constraint_labels: labels of the constraints
+        :param constraint_status: basis status of the constraints """
+        basic_variables = variable_labels[variable_status == self.status_basic]
+        nonbasic = constraint_status != self.status_basic
+        nonbasic_constraints = constraint_labels[nonbasic]
+        nonbasic_constraints_status = np.where(constraint_status[nonbasic] == self.status_upper, "XU", "XL")
+        with open(file_name, "w") as file:
+            file.write("NAME\n")
+            file.writelines(f" {status} x{variable} c{constraint}\n" for variable, constraint, status in zip(basic_variables, nonbasic_constraints, nonbasic_constraints_status))
+            file.writelines(f" UL x{label}\n" for label in variable_labels[variable_status == self.status_upper])
+            file.write("ENDATA\n")
+
+    def write_solution(self, file_name, labels, values):
+        """ writes the solution in the solution file format of the solver
+
+        :param file_name: path of the solution file
+        :param labels: labels of the variables
+        :param values: values of the variables """
+        with open(file_name, "w") as file:
+            if self.solver.name == "highs":
+                file.write(f"Model status\nUnknown\n\n# Primal solution values\nFeasible\nObjective 0\n# Columns {len(labels)}\n")
+            else:
+                file.write("# warm start from the previous solve\n")
+            file.writelines(f"x{label} {value}\n" for label, value in zip(labels, values))
+            if self.solver.name == "highs":
+                file.write("# Rows 0\n")
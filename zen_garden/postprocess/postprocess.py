@@ -6,8 +6,10 @@ The class contains methods to read the results and save them in a result diction
 import json
 import logging
 import os
+import shutil
 from pathlib import Path
 
+import h5py
 import numpy as np
 import pint
 from tables import NaturalNameWarning
@@ -19,6 +21,7 @@ import yaml
 from pydantic import BaseModel
 
 from ..model.optimization_setup import OptimizationSetup
+from .results.solution_loader import ComponentType, Scenario, SolutionLoader, get_metadata_index, get_mf_folders, hdf_store_pool, results_cache, UnitRegistryCache
 
 
 # Warnings
@@ -78,19 +81,19 @@ class Postprocess:
         self.output_format = self.analysis.output_format
 
         # save everything
-        self.save_sets()
-        self.save_param()
-        self.save_var()
-        self.save_duals()
-        self.save_system()
-        self.save_analysis()
-        self.save_scenarios()
-        self.save_solver()
-        self.save_unit_definitions()
-        self.save_sequence_time_steps(scenario=scenario_name)
-        self.save_param_map()
+        profiler = self.optimization_setup.profiler
+        with profiler.profile("postprocess"):
+            for save in [self.save_sets, self.save_param, self.save_var, self.save_duals, self.save_system, self.save_analysis,
+                         self.save_scenarios, self.save_solver, self.save_unit_definitions, self.save_param_map]:
+                with profiler.profile(save.__name__, category="save"):
+                    save()
+            with profiler.profile("save_sequence_time_steps", category="save"):
+                self.save_sequence_time_steps(scenario=scenario_name)
+        self.save_metadata_index()
         if self.solver.run_diagnostics:
             self.save_benchmarking_data()
+        if self.solver.run_profiling:
+            self.save_profile()
 
     def write_file(self, name, dictionary, format=None):
         """Writes the dictionary to file as json, if compression attribute is True, the serialized json is compressed
@@ -142,6 +145,11 @@ class Postprocess:
             with FileLock(f_name + ".lock").acquire(timeout=300):
                 self._write_h5_file(f_name, dictionary)
 
+        elif format == "parquet":
+            f_name = str(name)
+            with FileLock(f_name + ".lock").acquire(timeout=300):
+                self._write_parquet_files(f_name, dictionary)
+
         elif format == "txt":
             f_name = f"{name}.txt"
             f_mode = "w+"
@@ -181,6 +189,14 @@ class Postprocess:
             logging.info(f"Saving benchmarking data for solver {self.solver.name} has not been implemented yet")
 
         benchmarking_data["scaling_time"] = self.scaling.scaling_time
+        # time to pass the model to the solver and read the solution, i.e., the wall time of the solver call minus the solving time
+        benchmarking_data["io_api"] = self.optimization_setup.io_api
+        benchmarking_data["solver_call_time"] = self.optimization_setup.solve_time
+        if "solving_time" in benchmarking_data:
+            benchmarking_data["model_handoff_time"] = self.optimization_setup.solve_time - benchmarking_data["solving_time"]
+        # simplex iterations saved by the warm start compared to the last solve that was started from scratch
+        if self.optimization_setup.warm_start_store is not None:
+            benchmarking_data.update(self.optimization_setup.warm_start_store.get_benchmarking_data())
         # get numerical range
         range_lhs, range_rhs = self.scaling.print_numerics(0, no_scaling=False,benchmarking_output= True)
         benchmarking_data["numerical_range_lhs"] = range_lhs
@@ -188,6 +204,137 @@ class Postprocess:
         fname = self.name_dir.joinpath('benchmarking')
         self.write_file(fname, benchmarking_data, format="json")
 
+    def save_metadata_index(self, folder=None):
+        """
+        Saves an index of the components in the result files, such that the results can be loaded without probing each
+        file. For each component, the index contains the index names, the storage format and the number of rows
+
+        :param folder: folder of the result files, by default the output folder of the results
+        """
+        if folder is None:
+            folder = self.name_dir
+        metadata_index = {}
+        for file_name in ["set_dict.h5", "param_dict.h5", "var_dict.h5", "dual_dict.h5"]:
+            f_name = folder.joinpath(file_name)
+            if self.output_format == "parquet":
+                metadata_index.update(self._get_parquet_metadata_index(f_name.with_suffix("")))
+                continue
+            if not os.path.exists(f_name):
+                continue
+            components = {}
+            with h5py.File(f_name, "r") as h5_file:
+                for key, group in h5_file.items():
+                    is_table_format = "table" in group
+                    components[key] = {
+                        "index_names": group.attrs["index_names"].decode().split(","),
+                        "docstring": group.attrs["docstring"].decode(),
+                        "has_units": bool(group.attrs["has_units"]),
+                        "units_dictionary": group.attrs["units_dictionary"].decode().split(";") if "units_dictionary" in group.attrs else None,
+                        "format": "table" if is_table_format else "fixed",
+                        "rows": int(group["table"].shape[0]) if is_table_format else None,
+                    }
+            metadata_index[file_name] = components
+        self.write_file(folder.joinpath("metadata_index"), metadata_index, format="json")
+
+    def save_stitched_results(self):
+        """
+        Saves the results of all rolling horizon steps of the scenario stitched together, i.e., the values of each year
+        from the step whose decision horizon covers the year. The results loader reads the stitched results instead of
+        loading and combining the results of all steps. Must be called after the last rolling horizon step.
+        """
+        scenario_dir = self.name_dir.parent
+        stitched_dir = scenario_dir.joinpath("stitched")
+        os.makedirs(stitched_dir, exist_ok=True)
+        # the previous stitched results must not be read while stitching
+        if os.path.exists(stitched_dir.joinpath("metadata_index.json")):
+            os.remove(stitched_dir.joinpath("metadata_index.json"))
+        scenario = Scenario(str(scenario_dir), "none", "", UnitRegistryCache(pint.UnitRegistry()))
+        solution_loader = SolutionLoader(str(scenario_dir), scenarios={"none": scenario})
+        mf_folders = get_mf_folders(str(scenario_dir))
+        first_mf_dir = scenario_dir.joinpath(mf_folders[min(mf_idx for mf_idx in mf_folders if isinstance(mf_idx, int))])
+        metadata_index = get_metadata_index(str(first_mf_dir))
+        # the stitched values are written in the format of the results of the steps
+        components_per_file = {}
+        for component in solution_loader.components.values():
+            if component.component_type is not ComponentType.sets:
+                components_per_file.setdefault(component.file_name, []).append(component)
+        for file_name, components in components_per_file.items():
+            f_name = str(stitched_dir.joinpath(file_name))
+            if self.output_format == "parquet":
+                f_name = f_name.removesuffix(".h5")
+            with FileLock(f_name + ".lock").acquire(timeout=300):
+                hdf_store_pool.close(f_name)
+                results_cache.invalidate(str(scenario_dir))
+                if self.output_format == "h5":
+                    with pd.HDFStore(f_name, mode='w', complevel=4, complib="blosc") as store:
+                        for component in components:
+                            chunks, coords, docstring, units_dictionary = self._get_stitched_chunk(solution_loader, scenario, component, metadata_index, file_name)
+                            self._append_h5_chunks(store, component.name, chunks, coords, docstring, units_dictionary)
+                else:
+                    self._create_parquet_dataset(f_name)
+                    for component in components:
+                        chunks, _, docstring, units_dictionary = self._get_stitched_chunk(solution_loader, scenario, component, metadata_index, file_name)
+                        self._write_parquet_chunks(f_name, component.name, chunks, docstring, units_dictionary)
+        self.save_metadata_index(stitched_dir)
+
+    @staticmethod
+    def _get_stitched_chunk(solution_loader, scenario, component, metadata_index, file_name):
+        """Returns the stitched values of a component as a single chunk of rows
+
+        :param solution_loader: The solution loader of the scenario
+        :param scenario: The scenario
+        :param component: The component
+        :param metadata_index: The metadata index of the results of the first step
+        :param file_name: The name of the result file of the component
+        :return: list of the chunk, the values of the index levels by name, the docstring and the list of distinct units
+        """
+        series = solution_loader.get_component_data(scenario, component).rename("value")
+        docstring = metadata_index.get(file_name, {}).get(component.name, {}).get("docstring", component.doc)
+        units_dictionary = None
+        df = series
+        if component.has_units:
+            units = solution_loader.get_component_data(scenario, component, data_type="units").astype("category")
+            units_dictionary = [str(unit) for unit in units.cat.categories]
+            df = pd.concat([series, units.cat.codes.rename("units")], axis=1)
+        coords = {name: series.index.get_level_values(name).unique() for name in series.index.names}
+        chunks = [df] if len(df) > 0 else []
+        return chunks, coords, docstring, units_dictionary
+
+    @staticmethod
+    def _get_parquet_metadata_index(folder):
+        """
+        Returns the metadata index of the components of a Parquet dataset, which is read from the footers of the files
+
+        :param folder: The folder of the dataset
+        :return: dictionary with the metadata index of the dataset
+        """
+        if not os.path.isdir(folder):
+            return {}
+        import pyarrow.parquet as pq
+        components = {}
+        for file_name in sorted(os.listdir(folder)):
+            if not file_name.endswith(".parquet"):
+                continue
+            parquet_file = pq.ParquetFile(os.path.join(folder, file_name))
+            metadata = {key.decode(): value.decode() for key, value in parquet_file.schema_arrow.metadata.items() if key != b"pandas"}
+            components[metadata["name"]] = {
+                "index_names": metadata["index_names"].split(","),
+                "docstring": metadata["docstring"],
+                "has_units": bool(int(metadata["has_units"])),
+                "units_dictionary": metadata["units_dictionary"].split(";") if "units_dictionary" in metadata else None,
+                "format": "parquet",
+                "rows": parquet_file.metadata.num_rows,
+            }
+        return {os.path.basename(folder): components}
+
+    def save_profile(self):
+        """
+        Saves the records of the profiler to a json file and logs the slowest components
+        """
+        records = self.optimization_setup.profiler.pop_records()
+        self.optimization_setup.profiler.log_slowest(records, self.solver.profiling_top_n)
+        self.write_file(self.name_dir.joinpath('profile'), {"records": records}, format="json")
+
     def save_sets(self):
         """ Saves the Set values to a json file which can then be
         post-processed immediately or loaded and postprocessed at some other time"""
@@ -244,41 +391,22 @@ class Postprocess:
             logging.info("Parameters are not saved")
             return
 
-        # dataframe serialization
-        data_frames = {}
+        # stream the parameters to the file one at a time
+        components = []
         for param in self.params.docs.keys():
             if self.solver.selected_saved_parameters and param not in self.solver.selected_saved_parameters:
                 continue
-            # get the values
-            vals = getattr(self.params, param)
             doc = self.params.docs[param]
-            units = self.params.units[param]
-            index_list = self.get_index_list(doc)
-            # data frame
-            if isinstance(vals, xr.DataArray):
-                df = vals.to_dataframe("value").dropna()
-            # we have a scalar
-            else:
-                df = pd.DataFrame(data=[vals], columns=["value"])
-
-            # rename the index
-            if len(df.index.names) == len(index_list):
-                df.index.names = index_list
-
-            units = self._unit_df(units,df.index)
-            # update dict
-            data_frames[param] = self._transform_df(df, doc, units)
-
-        # write to json
-        self.write_file(self.name_dir.joinpath('param_dict'), data_frames)
+            components.append((param, lambda param=param: getattr(self.params, param), doc, self.params.units[param], self.get_index_list(doc)))
+        self.write_components(self.name_dir.joinpath('param_dict'), components)
 
     def save_var(self):
         """ Saves the variable values to a json file which can then be
         post-processed immediately or loaded and postprocessed at some other time"""
 
-        # dataframe serialization
-        data_frames = {}
-        for name, arr in self.model.solution.items():
+        # stream the variables to the file one at a time, the solution of each variable is only accessed when it is written
+        components = []
+        for name in self.model.variables:
             if self.solver.selected_saved_variables and name not in self.solver.selected_saved_variables:
                 continue
             if name in self.vars.docs:
@@ -291,18 +419,8 @@ class Postprocess:
                 index_list = []
                 doc = None
                 units = None
-
-            # create dataframe
-            df = arr.to_dataframe("value").dropna()
-            # rename the index
-            if len(df.index.names) == len(index_list):
-                df.index.names = index_list
-
-            units = self._unit_df(units,df.index)
-            # we transform the dataframe to a json string and load it into the dictionary as dict
-            data_frames[name] = self._transform_df(df,doc,units)
-
-        self.write_file(self.name_dir.joinpath('var_dict'), data_frames)
+            components.append((name, lambda name=name: self.model.variables[name].solution, doc, units, index_list))
+        self.write_components(self.name_dir.joinpath('var_dict'), components)
 
     def save_duals(self):
         """ Saves the dual variable values to a json file which can then be
@@ -406,7 +524,8 @@ class Postprocess:
         # Only save user-defined units (skip base units like 'meter')
         all_units = ureg._units
         default_units = pint.UnitRegistry()._units
-        user_units = list(set(all_units.items()).difference(default_units.items()))
+        # keep the order of the definitions, such that scenarios with the same units write identical files
+        user_units = [(name, unit) for name, unit in all_units.items() if default_units.get(name) != unit]
         for name, unit in user_units:
             if hasattr(unit, "raw") and f"{unit.raw}\n" not in lines:
                 lines.append(f"{unit.raw}\n")
@@ -535,7 +654,7 @@ class Postprocess:
         :param units: units
         :return: dictionary
         """
-        if self.output_format == "h5":
+        if self.output_format in ["h5", "parquet"]:
             if units is not None:
                 dataframe = {"dataframe": df, "docstring": doc, "units": units}
             else:
@@ -555,23 +674,257 @@ class Postprocess:
         else:
             return pd.DataFrame()
 
-    def _unit_df(self, units, index):
-        """Transforms the units to a series
+    def write_components(self, name, components):
+        """Writes the values of the components to file. The components are converted and appended one at a time in chunks
+        of rows, such that the memory is bounded by the largest chunk and not by the total size of the components
 
-        :param units: units string
-        :param index: index of the target dataframe
-        :return: pd.Series of the units
+        :param name: Filename without extension
+        :param components: list of tuples (key, function returning the values, docstring, units, index names)
         """
-        if units is not None:
-            if isinstance(units, str):
-                return pd.Series(units, index=index)
-            elif len(units) == len(index):
-                units.index.names = index.names
-                return units
+        if self.output_format == "h5":
+            f_name = f"{name}.h5"
+        elif self.output_format == "parquet":
+            f_name = str(name)
+        else:
+            raise AssertionError(f"The specified output format {self.output_format}, chosen in the config, is not supported")
+        with FileLock(f_name + ".lock").acquire(timeout=300):
+            if not self.overwrite and os.path.exists(f_name):
+                raise FileExistsError("File already exists. Please set overwrite=True to overwrite the file.")
+            # the results of a previous run might still be open for reading or cached
+            hdf_store_pool.close(f_name)
+            results_cache.invalidate(os.path.dirname(os.path.abspath(f_name)))
+            if self.output_format == "h5":
+                with pd.HDFStore(f_name, mode='w', complevel=4, complib="blosc") as store:
+                    for key, get_values, docstring, units, index_list in components:
+                        self._append_h5_component(store, key, get_values(), docstring, units, index_list)
             else:
-                raise AssertionError("The length of the units does not match the length of the index")
+                self._create_parquet_dataset(f_name)
+                for key, get_values, docstring, units, index_list in components:
+                    self._write_parquet_component(f_name, key, get_values(), docstring, units, index_list)
+
+    @staticmethod
+    def _encode_units(units):
+        """Dictionary-encodes the units, i.e., the rows store the integer codes of the distinct units
+
+        :param units: The units of the component, either None, a string or a (categorical) series
+        :return: The categorical series or string of the units and the list of distinct units
+        """
+        if isinstance(units, pd.Series):
+            units = units.astype("category")
+            return units, [str(unit) for unit in units.cat.categories]
+        elif units is not None:
+            return units, [str(units)]
+        return None, None
+
+    def _get_component_chunks(self, values, units, index_list):
+        """Returns the rows of a component in chunks of rows. The rows are created directly from the flattened values of
+        the array, missing values are dropped
+
+        :param values: The values of the component, either a DataArray or a scalar
+        :param units: The dictionary-encoded units of the component, either a string or a categorical series with the index of the non-missing values
+        :param index_list: The names of the index levels
+        :return: The names of the index levels, the values of the index levels by name and a generator of the chunks
+        """
+        if isinstance(values, xr.DataArray) and values.ndim > 0:
+            dims = list(values.dims)
+            coords = [values.get_index(dim) for dim in dims]
+            flat_values = values.values.ravel()
         else:
-            return None
+            dims = []
+            coords = []
+            flat_values = np.array([values.item() if isinstance(values, xr.DataArray) else values])
+        index_names = index_list if len(index_list) == len(dims) else dims
+        if isinstance(units, pd.Series) and units.index.nlevels == len(index_names):
+            units.index.names = index_names
+
+        named_coords = dict(zip(index_names, coords))
+
+        def chunks():
+            chunk_size = self.analysis.output_chunk_size
+            for start in range(0, len(flat_values), chunk_size):
+                chunk_values = flat_values[start:start + chunk_size]
+                positions = np.flatnonzero(~pd.isna(chunk_values)) + start
+                if len(positions) == 0:
+                    continue
+                if len(dims) == 0:
+                    index = pd.RangeIndex(len(positions))
+                else:
+                    codes = np.unravel_index(positions, values.shape)
+                    if len(dims) == 1:
+                        index = pd.Index(coords[0][codes[0]], name=index_names[0])
+                    else:
+                        index = pd.MultiIndex.from_arrays([coord[code] for coord, code in zip(coords, codes)], names=index_names)
+                df = pd.Series(flat_values[positions], index=index, name="value")
+                if units is not None:
+                    if isinstance(units, pd.Series):
+                        chunk_units = units.reindex(index).cat.codes
+                    else:
+                        chunk_units = pd.Series(np.zeros(len(index), dtype=np.int8), index=index)
+                    df = pd.concat([df, chunk_units.rename("units")], axis=1)
+                yield df
+
+        return index_names, named_coords, chunks()
+
+    def _append_h5_component(self, store, key, values, docstring, units, index_list):
+        """Appends the values of a component to the hdf5 file in chunks of rows
+
+        :param store: The open HDFStore
+        :param key: The name of the component
+        :param values: The values of the component, either a DataArray or a scalar
+        :param docstring: The docstring of the component
+        :param units: The units of the component, either a string or a (categorical) series with the index of the non-missing values
+        :param index_list: The names of the index levels
+        """
+        # the units are dictionary-encoded, the distinct units are stored as an attribute
+        units, units_dictionary = self._encode_units(units)
+        index_names, coords, chunks = self._get_component_chunks(values, units, index_list)
+        self._append_h5_chunks(store, key, chunks, coords, docstring, units_dictionary)
+
+    @staticmethod
+    def _append_h5_chunks(store, key, chunks, coords, docstring, units_dictionary):
+        """Appends the chunks of rows of a component to the hdf5 file and adds the attributes of the component
+
+        :param store: The open HDFStore
+        :param key: The name of the component
+        :param chunks: iterable of the chunks, each a series of the values or a dataframe with the values and the codes of the units
+        :param coords: The values of the index levels, which define the length of the string columns
+        :param docstring: The docstring of the component
+        :param units_dictionary: The list of distinct units, None if the component has no units
+        """
+        # the string columns have the length of the longest entry of all chunks
+        min_itemsize = {}
+        for index_name, coord in coords.items():
+            if coord.dtype == object:
+                min_itemsize[index_name if len(coords) > 1 else "index"] = max([len(str(value)) for value in coord], default=1)
+        is_written = False
+        for df in chunks:
+            store.append(key, df, format="table", index=False, min_itemsize=min_itemsize)
+            is_written = True
+        if is_written:
+            # add additional attributes
+            store.get_storer(key).attrs.docstring = docstring
+            store.get_storer(key).attrs["name"] = key
+            store.get_storer(key).attrs["has_units"] = units_dictionary is not None
+            store.get_storer(key).attrs["index_names"] = ",".join([str(name) for name in df.index.names])
+            if units_dictionary is not None:
+                store.get_storer(key).attrs["units_dictionary"] = ";".join(units_dictionary)
+
+    def _create_parquet_dataset(self, folder):
+        """Creates an empty folder of a Parquet dataset, the components of a previous run are removed
+
+        :param folder: The folder of the dataset
+        """
+        if os.path.exists(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+
+    def _write_parquet_component(self, folder, key, values, docstring, units, index_list):
+        """Writes the values of a component to a Parquet file in the folder of the dataset. Each chunk of rows is written
+        as a row group, such that readers can skip the row groups that do not match a filter
+
+        :param folder: The folder of the dataset
+        :param key: The name of the component
+        :param values: The values of the component, either a DataArray or a scalar
+        :param docstring: The docstring of the component
+        :param units: The units of the component, either a string or a (categorical) series with the index of the non-missing values
+        :param index_list: The names of the index levels
+        """
+        units, units_dictionary = self._encode_units(units)
+        _, _, chunks = self._get_component_chunks(values, units, index_list)
+        self._write_parquet_chunks(folder, key, chunks, docstring, units_dictionary)
+
+    def _write_parquet_chunks(self, folder, key, chunks, docstring, units_dictionary):
+        """Writes the chunks of rows of a component to a Parquet file in the folder of the dataset, each chunk as a row group
+
+        :param folder: The folder of the dataset
+        :param key: The name of the component
+        :param chunks: iterable of the chunks, each a series of the values or a dataframe with the values and the codes of the units
+        :param docstring: The docstring of the component
+        :param units_dictionary: The list of distinct units, None if the component has no units
+        """
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for df in chunks:
+                table = self._df_to_arrow_table(df, units_dictionary)
+                if writer is None:
+                    metadata = self._get_parquet_metadata(key, docstring, units_dictionary is not None, df.index.names, units_dictionary)
+                    table = table.replace_schema_metadata(metadata)
+                    writer = pq.ParquetWriter(os.path.join(folder, f"{key}.parquet"), table.schema, compression="zstd")
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    @staticmethod
+    def _df_to_arrow_table(df, units_dictionary=None):
+        """Converts the rows of a component to an Arrow table with the index levels as columns. The units are stored as a
+        dictionary-encoded column
+
+        :param df: The values of the component, either a series or a dataframe with the integer codes of the units
+        :param units_dictionary: The list of distinct units
+        :return: The Arrow table
+        """
+        import pyarrow as pa
+        if isinstance(df, pd.Series):
+            df = df.to_frame(name="value")
+        units = df.pop("units") if "units" in df.columns else None
+        table = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+        if units is not None:
+            if units_dictionary is None:
+                units = units.astype("category")
+                units_dictionary = [str(unit) for unit in units.cat.categories]
+                units = units.cat.codes
+            codes = units.to_numpy()
+            table = table.append_column("units", pa.DictionaryArray.from_arrays(pa.array(codes, mask=codes < 0), pa.array(units_dictionary, type=pa.string())))
+        return table
+
+    @staticmethod
+    def _get_parquet_metadata(key, docstring, has_units, index_names, units_dictionary=None):
+        """Returns the metadata of a component that is stored in the schema of the Parquet file
+
+        :param key: The name of the component
+        :param docstring: The docstring of the component
+        :param has_units: Whether the component has units
+        :param index_names: The names of the index levels
+        :param units_dictionary: The list of distinct units
+        :return: dictionary of the metadata
+        """
+        metadata = {
+            "name": key,
+            "docstring": docstring if docstring is not None else "",
+            "has_units": str(int(has_units)),
+            "index_names": ",".join([str(name) for name in index_names]),
+        }
+        if units_dictionary is not None:
+            metadata["units_dictionary"] = ";".join(units_dictionary)
+        return metadata
+
+    def _write_parquet_files(self, folder, dictionary):
+        """Writes the dictionary to a Parquet dataset with one file per component
+
+        :param folder: The folder of the dataset
+        :param dictionary: The dictionary to save
+        """
+        import pyarrow.parquet as pq
+        if not self.overwrite and os.path.exists(folder):
+            raise FileExistsError("File already exists. Please set overwrite=True to overwrite the file.")
+        results_cache.invalidate(os.path.dirname(os.path.abspath(folder)))
+        self._create_parquet_dataset(folder)
+        for key, value in dictionary.items():
+            if not isinstance(key, str):
+                raise TypeError("All dictionary keys must be strings!")
+            if not isinstance(value, dict):
+                raise TypeError(f"Type {type(value)} is not supported.")
+            input_dict, docstring, has_units = self._format_dict(value)
+            df = input_dict["dataframe"]
+            if df.empty:
+                continue
+            if isinstance(df, pd.DataFrame):
+                df = df.rename(columns={df.columns[0]: "value"})
+            table = self._df_to_arrow_table(df)
+            table = table.replace_schema_metadata(self._get_parquet_metadata(key, docstring, has_units, df.index.names))
+            pq.write_table(table, os.path.join(folder, f"{key}.parquet"), compression="zstd")
 
     def _write_h5_file(self, file_name, dictionary,complevel=4,complib="blosc"):
         """Writes the dictionary to a hdf5 file
@@ -581,6 +934,9 @@ class Postprocess:
         """
         if not self.overwrite and os.path.exists(file_name):
             raise FileExistsError("File already exists. Please set overwrite=True to overwrite the file.")
+        # the results of a previous run might still be open for reading or cached
+        hdf_store_pool.close(file_name)
+        results_cache.invalidate(os.path.dirname(os.path.abspath(file_name)))
         with pd.HDFStore(file_name, mode='w', complevel=complevel, complib=complib) as store:
             for key, value in dictionary.items():
                 if not isinstance(key, str):
@@ -3,16 +3,19 @@ This module contains the Results class, which is used to extract and process the
 """
 from zen_garden.postprocess.results.solution_loader import (
     SolutionLoader,
+    results_cache,
     Scenario,
     Component,
     TimestepType,
     ComponentType,
 )
 from zen_garden.model.default_config import Config, Analysis, Solver, System
+import numpy as np
 import pandas as pd
 from typing import Optional, Any, Literal, Union
 from zen_garden.utils import reformat_slicing_index
 from functools import cache
+from concurrent.futures import ThreadPoolExecutor
 import importlib
 import os
 import logging
@@ -26,18 +29,49 @@ class Results:
     """
     The Results class is used to extract and process the results of a model run.
     """
-    def __init__(self, path: str):
+    def __init__(self, path: str, cache_max_bytes: Optional[int] = None):
         """
         Initializes the Results class.
 
         :param path: Path to the results folder
+        :param cache_max_bytes: Budget in bytes of the cache of the loaded data, which is shared by all results. If None, the current budget is kept
         """
+        if cache_max_bytes is not None:
+            results_cache.set_max_bytes(cache_max_bytes)
         self.solution_loader = SolutionLoader(path)
         self.has_scenarios = len(self.solution_loader.scenarios) > 1
         first_scenario = next(iter(self.solution_loader.scenarios.values()))
         self.name = Path(first_scenario.analysis.dataset).name
         self.ureg = first_scenario.ureg
 
+    def get_dataset(self, component_name: str) -> "pyarrow.dataset.Dataset":
+        """
+        Returns a pyarrow dataset of a component over all scenarios, which can be filtered and projected without loading
+        the other rows and columns, e.g., with Arrow-based tools. The scenario and, for rolling horizon, the foresight step
+        are partition columns of the dataset. Only available for results in the Parquet format.
+
+        :param component_name: Name of the component
+        :return: The pyarrow dataset of the component
+        """
+        if component_name not in self.solution_loader.components:
+            raise KeyError(f"Component {component_name} not found.")
+        return self.solution_loader.get_arrow_dataset(self.solution_loader.components[component_name])
+
+    def invalidate_cache(self) -> None:
+        """
+        Removes the cached data of the results, e.g., after the results folder changed on disk
+        """
+        results_cache.invalidate(self.solution_loader.path)
+
+    @staticmethod
+    def get_cache_info() -> dict[str, int]:
+        """
+        Returns the statistics of the cache of the loaded data, which is shared by all results
+
+        :return: dictionary with the hits, misses, evictions, number of entries, used bytes and budget of the cache
+        """
+        return results_cache.info()
+
     def __str__(self) -> str:
         first_scenario = next(iter(self.solution_loader.scenarios.values()))
         return f"Results of '{first_scenario.analysis.dataset}'"
@@ -72,6 +106,12 @@ class Results:
             else:
                 return {s:pd.Series() for s in scenario_names}
 
+        if len(scenario_names) > 1:
+            # the scenarios are read concurrently, which speeds up the reads of Parquet results
+            return self.get_batch(
+                {component_name: (component_name, index)}, scenario_names=scenario_names, data_type=data_type
+            )[component_name]
+
         component = self.solution_loader.components[component_name]
 
         index = reformat_slicing_index(index,component)
@@ -79,19 +119,10 @@ class Results:
         if data_type == "units" and not component.has_units:
             return None
 
-        if len(scenario_names) == 1:
-            scenario_name = scenario_names[0]
-            scenario = self.solution_loader.scenarios[scenario_name]
-            ans = self.solution_loader.get_component_data(
-                scenario, component, data_type=data_type, index=index
-            )
-        else:
-            ans = {}
-            for scenario_name in scenario_names:
-                scenario = self.solution_loader.scenarios[scenario_name]
-                ans[scenario_name] = self.solution_loader.get_component_data(
-                    scenario, component, data_type=data_type, index=index
-                )
+        scenario = self.solution_loader.scenarios[scenario_names[0]]
+        ans = self.solution_loader.get_component_data(
+            scenario, component, data_type=data_type, index=index
+        )
 
         return ans
 
@@ -135,7 +166,7 @@ class Results:
                 index = index + (f"{component.timestep_type.value} in [{', '.join(time_steps.astype(str))}]",)
                 select_year_time_steps = True
         series = self.solution_loader.get_component_data(
-            scenario, component, keep_raw=keep_raw, index=index
+            scenario, component, keep_raw=keep_raw, index=index, years=tuple(years) if year is not None else None
         )
         if isinstance(series.index, pd.MultiIndex):
             series = series.unstack(component.timestep_name)
@@ -180,21 +211,8 @@ class Results:
                 output_df = series[sequence_timesteps]
             elif component.timestep_type is TimestepType.storage:
                 # for storage components, the last timestep is the final state, linear interpolation is used
-                last_occurrences = sequence_timesteps.groupby(sequence_timesteps).apply(lambda x: x.index[-1])
-                first_occurrences = sequence_timesteps.groupby(sequence_timesteps).apply(lambda x: x.index[0])
-                output_df = series[last_occurrences.index].rename(last_occurrences,axis=1)
-                # fill missing ts with nan
-                output_df = output_df.reindex(columns=sequence_timesteps.index)
                 time_steps_start_end = self.solution_loader.get_time_steps_storage_level_startend_year(scenario)
-                for tstart,tend in time_steps_start_end.items():
-                    tstart_reconstructed = first_occurrences[tstart]
-                    first_valid_timestep = output_df.loc[:,tstart_reconstructed:].T.first_valid_index()
-                    df_temp = pd.DataFrame(index=series.index,columns=range(tstart_reconstructed-1,first_valid_timestep+1),dtype=float)
-                    df_temp.loc[:,tstart_reconstructed-1] = series.loc[:,tend]
-                    df_temp.loc[:,first_valid_timestep] = series.loc[:,sequence_timesteps[first_valid_timestep]]
-                    df_temp = df_temp.interpolate(method='index',axis=1)
-                    output_df.loc[:,first_occurrences[tstart]:last_occurrences[tstart]] = df_temp.loc[:,tstart_reconstructed:first_valid_timestep]
-                output_df = output_df.interpolate(method='index',axis=1)
+                output_df = self._get_full_ts_storage_level(series, sequence_timesteps, time_steps_start_end)
                 if select_year_time_steps:
                     sequence_timesteps = sequence_timesteps[sequence_timesteps.isin(time_steps)]
                 output_df = output_df[sequence_timesteps.index]
@@ -207,6 +225,74 @@ class Results:
 
         return output_df
 
+    @staticmethod
+    def _get_full_ts_storage_level(
+        series: "pd.DataFrame", sequence_timesteps: "pd.Series[Any]", time_steps_start_end: dict[int, int]
+    ) -> "pd.DataFrame":
+        """Reconstructs the full timeseries of a storage level component. The value of each storage time step is placed at
+        its last occurrence in the full timeseries and the time steps in between are filled by linear interpolation.
+        At the start of each year, the values are interpolated from the storage level at the end of the year.
+        The values are gathered and interpolated for all rows and time steps at once.
+
+        :param series: values of the component with the storage time steps as columns
+        :param sequence_timesteps: sequence of the storage time steps in the full timeseries
+        :param time_steps_start_end: first storage time step of each year and the corresponding last storage time step
+        :return: Full timeseries with the time steps of the full timeseries as columns
+        """
+        sequence = sequence_timesteps.to_numpy()
+        n_time_steps = len(sequence)
+        positions = np.arange(n_time_steps)
+        # first and last occurrence of each storage time step in the full timeseries
+        storage_time_steps, first_occurrences = np.unique(sequence, return_index=True)
+        last_occurrences = n_time_steps - 1 - np.unique(sequence[::-1], return_index=True)[1]
+        values = np.full((len(series.index), n_time_steps), np.nan)
+        values[:, last_occurrences] = series[storage_time_steps].to_numpy(dtype=float)
+
+        # the first time steps of each year are interpolated from the storage level at the end of the year
+        starts = np.array(list(time_steps_start_end.keys()), dtype=sequence.dtype)
+        if not np.isin(starts, storage_time_steps).all():
+            raise KeyError(f"Storage time steps {starts[~np.isin(starts, storage_time_steps)]} not in sequence time steps")
+        end_values = series[list(time_steps_start_end.values())].to_numpy(dtype=float)
+        start_idx = np.searchsorted(storage_time_steps, starts)
+        block_first = first_occurrences[start_idx]
+        block_last = last_occurrences[start_idx]
+        # first time step with a value in any row after the start of the year
+        has_value = ~np.isnan(values).all(axis=0)
+        next_with_value = np.minimum.accumulate(np.where(has_value, positions, n_time_steps)[::-1])[::-1]
+        block_valid = next_with_value[block_first]
+        keep = block_valid < n_time_steps
+        block_first, block_last, block_valid, end_values = block_first[keep], block_last[keep], block_valid[keep], end_values[:, keep]
+        block_end = np.minimum(block_valid, block_last)
+        lengths = block_end - block_first + 1
+        block_idx = np.repeat(np.arange(len(block_first)), lengths)
+        block_cols = block_first[block_idx] + np.arange(len(block_idx)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        weights = (block_cols - block_first[block_idx] + 1) / (block_valid - block_first + 1)[block_idx]
+        left = end_values[:, block_idx]
+        right = values[:, block_valid][:, block_idx]
+        block_values = np.where(np.isnan(right), left, left + (right - left) * weights)
+        block_values = np.where(np.isnan(left) & (block_cols == block_valid[block_idx]), right, block_values)
+        # the time steps of the year after the first time step with a value are interpolated again
+        cleared_lengths = block_last - block_end
+        cleared_idx = np.repeat(np.arange(len(block_first)), cleared_lengths)
+        cleared_cols = block_end[cleared_idx] + 1 + np.arange(len(cleared_idx)) - np.repeat(np.cumsum(cleared_lengths) - cleared_lengths, cleared_lengths)
+        values[:, cleared_cols] = np.nan
+        values[:, block_cols] = block_values
+
+        # linear interpolation between the previous and the next value of each row, the last value is kept until the end
+        is_valid = ~np.isnan(values)
+        if (is_valid == is_valid[:1]).all():
+            # the same time steps have values in all rows, the positions of the values are computed once
+            is_valid = is_valid[:1]
+        previous_idx = np.maximum.accumulate(np.where(is_valid, positions, -1), axis=1)
+        next_idx = np.minimum.accumulate(np.where(is_valid, positions, n_time_steps)[:, ::-1], axis=1)[:, ::-1]
+        previous_values = np.take_along_axis(values, np.maximum(previous_idx, 0), axis=1)
+        next_values = np.take_along_axis(values, np.minimum(next_idx, n_time_steps - 1), axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            interpolated = previous_values + (next_values - previous_values) * (positions - previous_idx) / (next_idx - previous_idx)
+        interpolated = np.where(next_idx < n_time_steps, interpolated, previous_values)
+        interpolated = np.where(is_valid, values, np.where(previous_idx < 0, np.nan, interpolated))
+        return pd.DataFrame(interpolated, index=series.index, columns=sequence_timesteps.index)
+
     def get_full_ts(
         self,
         component_name: str,
@@ -235,25 +321,15 @@ class Results:
             logging.warning(f"Component {component_name} not found. If you expected this component to be present, the solution is probably empty and therefore skipped.")
             return pd.Series()
 
-        component = self.solution_loader.components[component_name]
-
-        scenarios_dict: dict[str, "pd.DataFrame | pd.Series[Any]"] = {}
-
-        index = reformat_slicing_index(index,component)
-
-        for scenario_name in scenario_names:
-            scenario = self.solution_loader.scenarios[scenario_name]
-
-            scenarios_dict[scenario_name] = self.get_full_ts_per_scenario(
-                scenario,
-                component,
-                discount_to_first_step=discount_to_first_step,
-                year=year,
-                keep_raw=keep_raw,
-                index=index
-            )
-
-        return self._concat_scenarios_dict(scenarios_dict)
+        # the scenarios are read concurrently, which speeds up the reads of Parquet results
+        return self.get_batch(
+            {component_name: (component_name, index)},
+            method="full_ts",
+            scenario_names=scenario_names,
+            discount_to_first_step=discount_to_first_step,
+            year=year,
+            keep_raw=keep_raw,
+        )[component_name]
 
     def get_total_per_scenario(
         self,
@@ -275,13 +351,13 @@ class Results:
         """
         if index is None:
             index = tuple()
-        series = self.solution_loader.get_component_data(scenario, component, keep_raw, index = index)
-
         if year is None:
             years = [i for i in range(0, scenario.system.optimized_years)]
         else:
             years = [year]
 
+        series = self.solution_loader.get_component_data(scenario, component, keep_raw, index = index, years=tuple(years) if year is not None else None)
+
         if component.timestep_type is None or type(series.index) is not pd.MultiIndex:
             return series
 
@@ -340,24 +416,97 @@ class Results:
             logging.warning(f"Component {component_name} not found. If you expected this component to be present, the solution is probably empty and therefore skipped.")
             return pd.Series()
 
-        component = self.solution_loader.components[component_name]
-
-        scenarios_dict: dict[str, "pd.DataFrame | pd.Series[Any]"] = {}
-
-        index = reformat_slicing_index(index, component)
-        
-        for scenario_name in scenario_names:
-            scenario = self.solution_loader.scenarios[scenario_name]
-            current_total = self.get_total_per_scenario(
-                scenario, component, year, keep_raw, index = index
-            )
-
-            if type(current_total) is pd.Series:
-                current_total = current_total.rename(component_name)
+        # the scenarios are read concurrently, which speeds up the reads of Parquet results
+        return self.get_batch(
+            {component_name: (component_name, index)},
+            method="total",
+            scenario_names=scenario_names,
+            year=year,
+            keep_raw=keep_raw,
+        )[component_name]
 
-            scenarios_dict[scenario_name] = current_total
+    def get_batch(
+        self,
+        queries: Union[list[str], dict[str, Union[str, tuple[str, Any]]]],
+        method: Literal["df", "full_ts", "total"] = "df",
+        scenario_names: Optional[list[str]] = None,
+        max_workers: Optional[int] = None,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        """
+        Returns the values of many components for many scenarios at once. The result of each query is the same as the
+        result of get_df, get_full_ts or get_total for the component. The reads are planned before they are run, such that
+        each component is read once per scenario and index, and the reads of the same file follow each other. The reads
+        are run on a thread pool. Only the reads of Parquet results run in parallel; the HDF5 library is not thread-safe,
+        so the reads of hdf5 results hold the lock of the HDF store pool and are serialized.
+
+        :param queries: component names, or dictionary of labels and component names or tuples of a component name and a slicing index
+        :param method: method that is applied to each query, either 'df', 'full_ts' or 'total'
+        :param scenario_names: names of the scenarios, all scenarios if None
+        :param max_workers: maximum number of threads, by default the number of threads of the ThreadPoolExecutor
+        :param kwargs: additional arguments of the method, e.g., year, keep_raw, discount_to_first_step or data_type
+        :return: Dictionary with the labels of the queries as keys and the results as values
+        """
+        if method not in ["df", "full_ts", "total"]:
+            raise ValueError(f"Invalid method {method}. Valid methods are 'df', 'full_ts' and 'total'.")
+        if isinstance(queries, list):
+            queries = {component_name: component_name for component_name in queries}
+        if scenario_names is None:
+            scenario_names = list(self.solution_loader.scenarios)
+        data_type = kwargs.get("data_type", "dataframe")
+
+        # plan the reads, each component is read once per scenario and index
+        ans: dict[str, Any] = {}
+        planned_queries: dict[str, tuple[Component, tuple]] = {}
+        tasks: dict[tuple[str, str, tuple], tuple[Scenario, Component, tuple]] = {}
+        for label, query in queries.items():
+            component_name, index = (query, None) if isinstance(query, str) else query
+            if component_name not in self.solution_loader.components:
+                logging.warning(f"Component {component_name} not found. If you expected this component to be present, the solution is probably empty and therefore skipped.")
+                ans[label] = {s: pd.Series() for s in scenario_names} if method == "df" and len(scenario_names) > 1 else pd.Series()
+                continue
+            component = self.solution_loader.components[component_name]
+            if method == "df" and data_type == "units" and not component.has_units:
+                ans[label] = None
+                continue
+            index = reformat_slicing_index(index, component)
+            planned_queries[label] = (component, index)
+            for scenario_name in scenario_names:
+                tasks.setdefault((component_name, scenario_name, index), (self.solution_loader.scenarios[scenario_name], component, index))
+        task_keys = sorted(tasks, key=lambda key: (tasks[key][0].path, tasks[key][1].file_name))
+
+        def run_task(key: tuple[str, str, tuple]) -> "pd.DataFrame | pd.Series[Any]":
+            scenario, component, index = tasks[key]
+            if method == "df":
+                return self.solution_loader.get_component_data(scenario, component, data_type=data_type, index=index)
+            elif method == "full_ts":
+                return self.get_full_ts_per_scenario(
+                    scenario,
+                    component,
+                    year=kwargs.get("year"),
+                    discount_to_first_step=kwargs.get("discount_to_first_step", True),
+                    keep_raw=kwargs.get("keep_raw", False),
+                    index=index,
+                )
+            total = self.get_total_per_scenario(scenario, component, kwargs.get("year"), kwargs.get("keep_raw", False), index=index)
+            if type(total) is pd.Series:
+                total = total.rename(component.name)
+            return total
+
+        if len(task_keys) > 1 and max_workers != 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                values = dict(zip(task_keys, executor.map(run_task, task_keys)))
+        else:
+            values = {key: run_task(key) for key in task_keys}
 
-        return self._concat_scenarios_dict(scenarios_dict)
+        # assemble the results of the queries
+        for label, (component, index) in planned_queries.items():
+            scenarios_dict = {scenario_name: values[(component.name, scenario_name, index)] for scenario_name in scenario_names}
+            if method == "df":
+                ans[label] = scenarios_dict[scenario_names[0]] if len(scenario_names) == 1 else scenarios_dict
+            else:
+                ans[label] = self._concat_scenarios_dict(scenarios_dict)
+        return {label: ans[label] for label in queries}
 
     def _concat_scenarios_dict(
         self, scenarios_dict: dict[str, "pd.DataFrame | pd.Series[Any]"]
@@ -507,26 +656,38 @@ class Results:
             if len(units.index.names.difference(drop_idx)) == 0:
                 units = units.iloc[0]
             else:
-                units.index = units.index.droplevel(drop_idx.to_list())
+                units = units.droplevel(drop_idx.to_list())
                 units = units[~units.index.duplicated()]
-        # convert to pint units
-        for i in units.index:
-            try:
-                u = units[i]
-                u = self.ureg.parse_expression(u)
-                if is_total and self.solution_loader.components[component_name].timestep_type is TimestepType.operational:
-                    u = u * self.ureg.h
-                units[i] = f"{u.u:~D}"
-            # if the unit is not in the pint registry, change the string manually (normally, when the unit_definition.txt is not saved)
-            except Exception:
-                if is_total and self.solution_loader.components[component_name].timestep_type is TimestepType.operational:
-                    if units[i].endswith(" / hour"):
-                        units[i] = units[i].replace(" / hour", "")
-                    else:
-                        units[i] = f"{units[i]} * hour"
-
+        # convert to pint units, each distinct unit is only converted once
+        is_total = is_total and self.solution_loader.components[component_name].timestep_type is TimestepType.operational
+        if isinstance(units, str):
+            return self._convert_unit(units, is_total)
+        converted_units = {unit: self._convert_unit(unit, is_total) for unit in units.dropna().unique()}
+        units = units.map(converted_units)
         return units
 
+    def _convert_unit(self, unit: str, is_total: bool) -> str:
+        """
+        Converts a unit to the pint format and multiplies it by hour for the total of operational components
+
+        :param unit: unit as stored in the results
+        :param is_total: whether the unit is converted for the annual total of an operational component
+        :return: The converted unit
+        """
+        try:
+            u = self.ureg.parse_expression(unit)
+            if is_total:
+                u = u * self.ureg.h
+            return f"{u.u:~D}"
+        # if the unit is not in the pint registry, change the string manually (normally, when the unit_definition.txt is not saved)
+        except Exception:
+            if is_total:
+                if unit.endswith(" / hour"):
+                    return unit.replace(" / hour", "")
+                else:
+                    return f"{unit} * hour"
+            return unit
+
     def get_system(self, scenario_name: Optional[str] = None) -> System:
         """
         Extracts the System config of a given Scenario. If no scenario is given, a random one is taken.
@@ -730,35 +891,30 @@ class Results:
 
         ans: dict[str, pd.DataFrame] = {}
 
+        # the full time series of all components are read at once, flow_transport is read once for both directions
+        component_names = [component for component in components if component not in ["flow_transport_in", "flow_transport_out"]]
+        component_names += ["flow_transport", "flow_transport_loss"]
+        component_names = [component for component in component_names if component in self.solution_loader.components]
+        full_ts_dict = self.get_batch(component_names, method="full_ts", scenario_names=[scenario_name], year=year)
+
         for component, factor in components.items():
 
             if component == "flow_transport_in":
-                full_ts = self.get_full_ts(
-                    "flow_transport", scenario_name=scenario_name, year=year
-                )
-                transport_loss = self.get_full_ts(
-                    "flow_transport_loss", scenario_name=scenario_name, year=year
-                )
+                full_ts = full_ts_dict.get("flow_transport", pd.Series())
+                transport_loss = full_ts_dict.get("flow_transport_loss", pd.Series())
                 if full_ts.empty or transport_loss.empty:
                     continue
                 full_ts = self.edit_carrier_flows(
                     full_ts - transport_loss, node, "in", scenario_name
                 )
             elif component == "flow_transport_out":
-                full_ts = self.get_full_ts(
-                    "flow_transport", scenario_name=scenario_name, year=year
-                )
+                full_ts = full_ts_dict.get("flow_transport", pd.Series())
                 if full_ts.empty:
                     continue
                 full_ts = self.edit_carrier_flows(full_ts, node, "out", scenario_name)
             else:
-                try:
-                    full_ts = self.get_full_ts(
-                        component, scenario_name=scenario_name, year=year
-                    )
-                    if full_ts.empty:
-                        continue
-                except KeyError:
+                full_ts = full_ts_dict.get(component, pd.Series())
+                if full_ts.empty:
                     continue
             carrier_df = self.extract_carrier(full_ts, carrier, scenario_name)
             if carrier_df is not None:
@@ -1,17 +1,23 @@
 """
 This module contains the implementation of a SolutionLoader that reads the solution.
 """
+import ast
+import atexit
 import copy
 import re
 import json
+import logging
 import os
+import sys
+import threading
+from collections import OrderedDict
 import h5py  # type: ignore
 import pint
 import pandas as pd
 import numpy as np
-from typing import Optional, Any,Literal
+from typing import Optional, Any, Callable, Literal
 from enum import Enum
-from functools import cache
+from functools import lru_cache, wraps
 from zen_garden.model.default_config import Analysis, System, Solver
 
 class ComponentType(Enum):
@@ -61,6 +67,129 @@ class TimestepType(Enum):
                 return member
         return None
 
+class ResultsCache():
+    """
+    Least recently used cache of the data read from the results, which is shared by all solution loaders. The cache is
+    bounded by a budget of bytes and evicts the least recently used entries first. Each entry belongs to a results
+    folder, such that the entries of a folder can be invalidated when the folder changes on disk.
+    """
+
+    def __init__(self, max_bytes: int = 1024 ** 3) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple[Any, ...], tuple[Any, int, str]] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def cached(self, get_path: Callable[..., str]) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """
+        Decorator that caches the return values of a function. The arguments of the function must be hashable.
+
+        :param get_path: function that returns the path of the results read by the function, given its arguments
+        :return: decorator
+        """
+        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+            @wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                key = (func.__qualname__, args, tuple(sorted(kwargs.items())))
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return self._entries[key][0]
+                    self.misses += 1
+                value = func(*args, **kwargs)
+                self.add(key, value, get_path(*args, **kwargs))
+                return value
+            return wrapper
+        return decorator
+
+    def add(self, key: tuple[Any, ...], value: Any, path: str) -> None:
+        """
+        Adds a value to the cache and evicts the least recently used entries if the budget is exceeded. Values larger
+        than the budget are not cached.
+
+        :param key: key of the value
+        :param value: value to cache
+        :param path: path of the results from which the value is read
+        """
+        nbytes = _get_nbytes(value)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes, os.path.abspath(path))
+            self.nbytes += nbytes
+            self._evict()
+
+    def _evict(self) -> None:
+        """
+        Evicts the least recently used entries until the cache is within the budget
+        """
+        while self.nbytes > self.max_bytes and len(self._entries) > 0:
+            self.nbytes -= self._entries.popitem(last=False)[1][1]
+            self.evictions += 1
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        """
+        Sets the budget of the cache and evicts entries if necessary.
+
+        :param max_bytes: budget of the cache in bytes
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def invalidate(self, folder: Optional[str] = None) -> None:
+        """
+        Removes the entries read from a results folder, or all entries if no folder is given. The entries of the parent
+        folders are removed as well, since they can combine the data of the folder, e.g., of the foresight steps.
+
+        :param folder: results folder that changed on disk
+        """
+        with self._lock:
+            if folder is None:
+                self._entries.clear()
+                self.nbytes = 0
+                return
+            folder = os.path.abspath(folder)
+            for key in [key for key, (_, _, path) in self._entries.items() if _is_relative_to(path, folder) or _is_relative_to(folder, path)]:
+                self.nbytes -= self._entries.pop(key)[1]
+
+    def info(self) -> dict[str, int]:
+        """
+        Returns the statistics of the cache.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "nbytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+            }
+
+def _is_relative_to(path: str, folder: str) -> bool:
+    """
+    Helper-function that checks if a path is the folder or inside the folder.
+    """
+    return path == folder or path.startswith(folder.rstrip(os.sep) + os.sep)
+
+def _get_nbytes(value: Any) -> int:
+    """
+    Helper-function that estimates the memory of a cached value in bytes.
+    """
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        nbytes = value.memory_usage(index=True, deep=True)
+        return int(nbytes.sum()) if isinstance(nbytes, pd.Series) else int(nbytes)
+    return sys.getsizeof(value)
+
+results_cache = ResultsCache()
+
 class Component():
     """
     Class that defines a component.
@@ -122,25 +251,27 @@ class Scenario():
     """
     Implementation of the abstract scenario. In this solution version, the analysis and
     system configs are stored as jsons for each of the scenario in the corresponding
-    folder.
+    folder. The configs and the unit registry are read when they are first accessed, such
+    that large sweeps of scenarios are opened without reading the files of every scenario.
     """
 
-    def __init__(self, path: str, name: str, base_scenario: str, default_ureg: pint.UnitRegistry) -> None:
+    def __init__(self, path: str, name: str, base_scenario: str, unit_registries: "UnitRegistryCache") -> None:
         self.name = name
         self.base_name = base_scenario
-        self._exists = True
         self._path = path
-        self._analysis: Analysis = self._read_analysis()
-        self._system: System = self._read_system()
-        self._solver: Solver = self._read_solver()
-        self._benchmarking: dict[str,Any] = self._read_benchmarking()
-        self._ureg = self._read_ureg(default_ureg)
+        self._unit_registries = unit_registries
+        self._exists = os.path.exists(os.path.join(self.path, "analysis.json"))
+        if not self._exists:
+            print(f"analysis.json does not exist for scenario {self.name}")
+        self._analysis: Optional[Analysis] = None
+        self._system: Optional[System] = None
+        self._solver: Optional[Solver] = None
+        self._benchmarking: Optional[dict[str,Any]] = None
+        self._ureg: Optional[pint.UnitRegistry] = None
 
     def _read_analysis(self) -> Analysis:
         analysis_path = os.path.join(self.path, "analysis.json")
         if not os.path.exists(analysis_path):
-            print(f"analysis.json does not exist for scenario {self.name}")
-            self._exists = False
             return Analysis()
 
         with open(analysis_path, "r") as f:
@@ -172,27 +303,32 @@ class Scenario():
         else:
             return {}
 
-    def _read_ureg(self,default_ureg) -> pint.UnitRegistry:
-        ureg = copy.deepcopy(default_ureg)
+    def _read_ureg(self) -> pint.UnitRegistry:
         unit_path = os.path.join(self.path, "unit_definitions.txt")
-        if os.path.exists(unit_path):
-            ureg.load_definitions(unit_path)
-        return ureg
+        return self._unit_registries.get(unit_path)
 
     @property
     def analysis(self) -> Analysis:
+        if self._analysis is None:
+            self._analysis = self._read_analysis()
         return self._analysis
 
     @property
     def solver(self) -> Solver:
+        if self._solver is None:
+            self._solver = self._read_solver()
         return self._solver
 
     @property
     def system(self) -> System:
+        if self._system is None:
+            self._system = self._read_system()
         return self._system
 
     @property
     def benchmarking(self) -> dict[str,Any]:
+        if self._benchmarking is None:
+            self._benchmarking = self._read_benchmarking()
         return self._benchmarking
 
     @property
@@ -205,6 +341,8 @@ class Scenario():
 
     @property
     def ureg(self) -> pint.UnitRegistry:
+        if self._ureg is None:
+            self._ureg = self._read_ureg()
         return self._ureg
 
     @property
@@ -216,10 +354,11 @@ class SolutionLoader():
     Implementation of a SolutionLoader.
     """
 
-    def __init__(self, path: str) -> None:
+    def __init__(self, path: str, scenarios: Optional[dict[str, Scenario]] = None) -> None:
         self.path = path
         assert len(os.listdir(path)) > 0, f"Path {path} is empty."
-        self._scenarios: dict[str, Scenario] = self._read_scenarios()
+        # the scenarios can be passed to load a single scenario of an unfinished run
+        self._scenarios: dict[str, Scenario] = self._read_scenarios() if scenarios is None else scenarios
         self._components: dict[str, Component] = self._read_components()
         self._series_cache: dict[str, "pd.Series[Any]"] = {}
 
@@ -254,44 +393,35 @@ class SolutionLoader():
         component: Component,
         scenario: Scenario,
         pd_dict: dict[int, "pd.Series[Any]"],
+        decision_horizons: Optional[dict[int, tuple[int, ...]]] = None,
     ) -> "pd.DataFrame | pd.Series[Any]":
         """
         Method that combines the values when a solution is created without perfect
         foresight given a component, a scenario and a dictionary containing the name of
-        the MF-data (Format: "MF_{year}").
+        the MF-data (Format: "MF_{year}"). The rows of each foresight step are selected with
+        a mask, which is computed for the distinct values of the time step level and gathered
+        with the codes of the level.
         """
-        series_to_concat = []
         optimized_years = sorted(pd_dict.keys())
+        if decision_horizons is None:
+            decision_horizons = get_decision_horizons(optimized_years)
+        if component.timestep_type is None:
+            return pd_dict[optimized_years[0]]
+        series_to_concat = []
         for year in optimized_years:
-            if year != optimized_years[-1]:
-                next_year = optimized_years[optimized_years.index(year) + 1]
-            else:
-                next_year = year + 1
-            decision_horizon = tuple(range(year, next_year))
+            decision_horizon = decision_horizons[year]
             current_mf = pd_dict[year]
             if component.timestep_type is TimestepType.yearly:
-                year_series = current_mf[
-                    current_mf.index.get_level_values("year").isin(decision_horizon)
-                ]
-                series_to_concat.append(year_series)
-            elif component.timestep_type in [
-                TimestepType.operational,
-                TimestepType.storage,
-            ]:
+                level_name = "year"
+                selected_values = np.array(decision_horizon)
+            else:
                 assert component.timestep_name is not None
-
-                time_steps = self.get_timesteps_of_years(
+                level_name = component.timestep_name
+                selected_values = self.get_timesteps_of_years(
                     scenario, component.timestep_type, decision_horizon
-                )
-                time_step_list = {tstep for tstep in time_steps}
-                all_timesteps = current_mf.index.get_level_values(
-                    component.timestep_name
-                )
-                year_series = current_mf[[i in time_step_list for i in all_timesteps]]
-                series_to_concat.append(year_series)
-            else:
-                series_to_concat.append(current_mf)
-                break
+                ).to_numpy()
+            mask = get_level_mask(current_mf.index, level_name, selected_values)
+            series_to_concat.append(current_mf.iloc[np.flatnonzero(mask)])
 
         return pd.concat(series_to_concat)
 
@@ -312,60 +442,106 @@ class SolutionLoader():
         series.index.names = new_index_names
         return series
 
-    @cache
     def get_component_data(
         self,
         scenario: Scenario,
         component: Component,
         keep_raw: bool = False,
         data_type: Literal["dataframe","units"] = "dataframe",
-        index = None
+        index = None,
+        years: Optional[tuple[int, ...]] = None
     ) -> "pd.DataFrame | pd.Series[Any]":
         """
         Returns the actual component values given
         a component and a scenario. Already combines the yearly data if the solution does
         not use perfect foresight, unless explicitly desired otherwise (keep_raw = True).
+        If years are given, only the foresight steps whose decision horizon covers the years
+        are loaded, the values of the other years can be missing.
         """
         if index is None:
             index = tuple()
         version = get_solution_version(scenario)
         if scenario.has_rh:
-            # If solution has rolling horizon, load the values for all the foresight
-            # steps and combine them.
-            pattern = re.compile(r'^MF_\d+(_.*)?$')
-            subfolder_names = list(filter(lambda x: pattern.match(x), os.listdir(scenario.path)))
-            pd_series_dict = {}
-
-            for subfolder_name in subfolder_names:
-                sf_stripped = subfolder_name.replace("MF_", "")
-                if not sf_stripped.isnumeric():
-                    if keep_raw:
-                        mf_idx = subfolder_name.replace("MF_", "")
-                    else:
-                        continue
-                else:
-                    mf_idx = int(subfolder_name.replace("MF_", ""))
-                file_path = os.path.join(
-                    scenario.path, subfolder_name, component.file_name
-                )
-                pd_series_dict[mf_idx] = get_df_from_path(
-                    file_path, component.name,version, data_type, index
-                )
-            if not keep_raw:
-                combined_dataseries = self._combine_dataseries(
-                    component, scenario, pd_series_dict
-                )
-            else:
-                combined_dataseries = self._concatenate_raw_dataseries(
-                    pd_series_dict
-                )
-            return combined_dataseries
+            return self._get_rh_component_data(scenario, component, keep_raw, data_type, index, years)
         else:
             # If solution does not use rolling horizon, simply load the HDF file.
             file_path = os.path.join(scenario.path, component.file_name)
             ans = get_df_from_path(file_path, component.name,version,data_type, index)
             return ans
 
+    @results_cache.cached(lambda self, scenario, *args, **kwargs: scenario.path)
+    def _get_rh_component_data(
+        self,
+        scenario: Scenario,
+        component: Component,
+        keep_raw: bool,
+        data_type: Literal["dataframe","units"],
+        index: tuple,
+        years: Optional[tuple[int, ...]] = None
+    ) -> "pd.DataFrame | pd.Series[Any]":
+        """
+        Returns the component values of a solution with rolling horizon. The values are loaded for the foresight
+        steps and combined, unless explicitly desired otherwise (keep_raw = True). If the stitched results were
+        written during the postprocessing, the combined values are read from them.
+        """
+        version = get_solution_version(scenario)
+        mf_folders = get_mf_folders(scenario.path)
+        if keep_raw:
+            pd_series_dict = {
+                mf_idx: get_df_from_path(os.path.join(scenario.path, subfolder_name, component.file_name), component.name, version, data_type, index)
+                for mf_idx, subfolder_name in mf_folders.items()
+            }
+            return self._concatenate_raw_dataseries(pd_series_dict)
+        stitched_path = get_stitched_path(scenario.path, component, mf_folders)
+        if stitched_path is not None:
+            return get_df_from_path(stitched_path, component.name, version, data_type, index)
+        optimized_years = sorted(mf_idx for mf_idx in mf_folders if isinstance(mf_idx, int))
+        decision_horizons = get_decision_horizons(optimized_years)
+        # only the foresight steps are loaded that are needed for the combined values of the requested years
+        if component.timestep_type is None:
+            optimized_years = optimized_years[:1]
+        elif years is not None:
+            optimized_years = [year for year in optimized_years if not set(decision_horizons[year]).isdisjoint(years)]
+        pd_series_dict = {
+            year: get_df_from_path(os.path.join(scenario.path, mf_folders[year], component.file_name), component.name, version, data_type, index)
+            for year in optimized_years
+        }
+        return self._combine_dataseries(component, scenario, pd_series_dict, decision_horizons)
+
+    def get_arrow_dataset(self, component: Component) -> "ds.Dataset":
+        """
+        Returns a pyarrow dataset of a component over all scenarios and, for rolling horizon, all foresight steps. The
+        files of the Parquet datasets are partitioned by the columns "scenario" and "mf", such that filters on the
+        partitions skip the other files. Only available for results in the Parquet format.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.fs as fs
+        import pyarrow.parquet as pq
+        paths = []
+        partitions = []
+        for scenario_name, scenario in self.scenarios.items():
+            subfolders = [("", None)]
+            if scenario.has_rh:
+                subfolders = [(subfolder_name, mf_idx) for mf_idx, subfolder_name in get_mf_folders(scenario.path).items() if isinstance(mf_idx, int)]
+            for subfolder_name, mf_idx in subfolders:
+                file_path = os.path.join(scenario.path, subfolder_name, component.file_name, f"{component.name}.parquet")
+                if not os.path.exists(file_path):
+                    continue
+                partition = ds.field("scenario") == scenario_name
+                if mf_idx is not None:
+                    partition = partition & (ds.field("mf") == mf_idx)
+                paths.append(file_path)
+                partitions.append(partition)
+        if len(paths) == 0:
+            raise ValueError(f"Component {component.name} is not stored in the Parquet format.")
+        schema = pq.read_schema(paths[0]).append(pa.field("scenario", pa.string()))
+        if get_first_scenario(self.scenarios).has_rh:
+            schema = schema.append(pa.field("mf", pa.int64()))
+        return ds.FileSystemDataset.from_paths(
+            paths, schema=schema, format=ds.ParquetFileFormat(), filesystem=fs.LocalFileSystem(use_mmap=True), partitions=partitions
+        )
+
     def _read_scenarios(self) -> dict[str, Scenario]:
         """
         Create the scenario instances. The definitions of the scenarios are stored in the
@@ -374,14 +550,15 @@ class SolutionLoader():
         """
         scenarios_json_path = os.path.join(self.path, "scenarios.json")
         ans: dict[str, Scenario] = {}
-        default_ureg = pint.UnitRegistry()
+        # the unit registries are shared by the scenarios of this solution only
+        self._unit_registries = UnitRegistryCache(pint.UnitRegistry())
         with open(scenarios_json_path, "r") as f:
             scenario_configs = json.load(f)
 
         if len(scenario_configs) == 1:
             scenario_name = "none"
             scenario_path = self.path
-            ans[scenario_name] = Scenario(scenario_path, scenario_name, "",default_ureg)
+            ans[scenario_name] = Scenario(scenario_path, scenario_name, "", self._unit_registries)
         else:
             for scenario_id, scenario_config in scenario_configs.items():
                 scenario_name = f"scenario_{scenario_id}"
@@ -401,7 +578,7 @@ class SolutionLoader():
                     )
 
                 scenario = Scenario(
-                    scenario_path, scenario_name, base_scenario, default_ureg
+                    scenario_path, scenario_name, base_scenario, self._unit_registries
                 )
 
                 if scenario.exists:
@@ -426,24 +603,36 @@ class SolutionLoader():
         else:
             component_folder = first_scenario.path
 
+        metadata_index = get_metadata_index(component_folder)
+        version = get_solution_version(first_scenario)
         for file_name, component_type in ComponentType.get_file_names_maps().items():
-            file_path = os.path.join(component_folder, file_name)
-
-            if not os.path.exists(file_path):
+            file_name = get_result_file_name(component_folder, file_name)
+            if file_name is None:
                 continue
+            file_path = os.path.join(component_folder, file_name)
 
-            h5_file = h5py.File(file_path)
-            version = get_solution_version(first_scenario)
-            for component_name in h5_file.keys():
-                index_names = get_index_names(h5_file,component_name,version)
+            if file_name in metadata_index:
+                # the metadata of the components is read from the index without opening the file
+                component_metadata = {
+                    component_name: (metadata["index_names"], format_doc(metadata["docstring"]), metadata["has_units"])
+                    for component_name, metadata in metadata_index[file_name].items()
+                }
+            elif os.path.isdir(file_path):
+                component_metadata = {
+                    component_name: (metadata["index_names"], format_doc(metadata["docstring"]), metadata["has_units"])
+                    for component_name, metadata in get_parquet_metadata_index(file_path).items()
+                }
+            else:
+                with h5py.File(file_path, "r") as h5_file:
+                    component_metadata = {
+                        component_name: (get_index_names(h5_file,component_name,version), get_doc(h5_file,component_name,version), get_has_units(h5_file,component_name,version))
+                        for component_name in h5_file.keys()
+                    }
+            for component_name, (index_names, doc, has_units) in component_metadata.items():
                 time_index = set(index_names).intersection(set(TimestepType.get_time_steps_names()))
                 timestep_name = time_index.pop() if len(time_index) > 0 else None
                 timestep_type = TimestepType.get_time_step_type(timestep_name)
 
-                doc = get_doc(h5_file,component_name,version)
-
-                has_units = get_has_units(h5_file,component_name,version)
-
                 ans[component_name] = Component(
                     component_name,
                     component_type,
@@ -457,7 +646,7 @@ class SolutionLoader():
 
         return ans
 
-    @cache
+    @results_cache.cached(lambda self, scenario, *args, **kwargs: scenario.path)
     def get_timestep_duration(
         self, scenario: Scenario, component: Component
     ) -> "pd.Series[Any]":
@@ -490,7 +679,7 @@ class SolutionLoader():
 
 
 
-    @cache
+    @results_cache.cached(lambda self, scenario, *args, **kwargs: scenario.path)
     def get_timesteps(
         self, scenario: Scenario, component: Component, year: int
     ) -> "pd.Series[Any]":
@@ -509,7 +698,8 @@ class SolutionLoader():
         if check_if_v1_leq_v2(version,"v0"):
             time_steps_file_name = time_steps_file_name + ".h5"
             dict_path = os.path.join(scenario.path,time_steps_file_name,)
-            ans = pd.read_hdf(dict_path, f"{timesteps_name}/{year}")
+            with hdf_store_pool.lock:
+                ans = pd.read_hdf(dict_path, f"{timesteps_name}/{year}")
         else:
             time_steps_file_name = time_steps_file_name + ".json"
             dict_path = os.path.join(scenario.path, time_steps_file_name, )
@@ -521,7 +711,7 @@ class SolutionLoader():
 
         return ans
 
-    @cache
+    @results_cache.cached(lambda self, scenario, *args, **kwargs: scenario.path)
     def get_timesteps_of_years(
         self, scenario: Scenario, ts_type: TimestepType, years: tuple
     ) -> "pd.DataFrame | pd.Series[Any]":
@@ -533,7 +723,8 @@ class SolutionLoader():
         if check_if_v1_leq_v2(version,"v0"):
             sequence_time_steps_name = sequence_time_steps_name + ".h5"
             time_step_path = os.path.join(scenario.path, sequence_time_steps_name)
-            time_step_file = h5py.File(time_step_path)
+            with hdf_store_pool.lock:
+                time_step_file = h5py.File(time_step_path)
         else:
             sequence_time_steps_name = sequence_time_steps_name + ".json"
             time_step_path = os.path.join(scenario.path, sequence_time_steps_name)
@@ -553,7 +744,8 @@ class SolutionLoader():
         for year in years:
             year_series = time_step_yearly[str(year)]
             if check_if_v1_leq_v2(version,"v0"):
-                time_steps.append(pd.read_hdf(time_step_path, year_series.name))
+                with hdf_store_pool.lock:
+                    time_steps.append(pd.read_hdf(time_step_path, year_series.name))
             else:
                 time_steps.append(pd.Series(time_step_yearly[str(year)]))
 
@@ -581,7 +773,8 @@ class SolutionLoader():
         if check_if_v1_leq_v2(version,"v0"):
             time_steps_file_name = time_steps_file_name + ".h5"
             dict_path = os.path.join(scenario.path, time_steps_file_name, )
-            ans = pd.read_hdf(dict_path, sequence_timesteps_name)
+            with hdf_store_pool.lock:
+                ans = pd.read_hdf(dict_path, sequence_timesteps_name)
         else:
             time_steps_file_name = time_steps_file_name + ".json"
             dict_path = os.path.join(scenario.path, time_steps_file_name, )
@@ -603,7 +796,8 @@ class SolutionLoader():
             if check_if_v1_leq_v2(version,"v0"):
                 time_steps_file_name = time_steps_file_name + ".h5"
                 dict_path = os.path.join(scenario.path, time_steps_file_name, )
-                ans = pd.read_hdf(dict_path, "optimized_time_steps").tolist()
+                with hdf_store_pool.lock:
+                    ans = pd.read_hdf(dict_path, "optimized_time_steps").tolist()
             else:
                 time_steps_file_name = time_steps_file_name + ".json"
                 dict_path = os.path.join(scenario.path, time_steps_file_name, )
@@ -654,6 +848,36 @@ def get_first_scenario(scenarios: dict[str, Scenario]) -> Scenario:
     """
     return scenarios[next(iter(scenarios.keys()))]
 
+class UnitRegistryCache:
+    """
+    Unit registries of the scenarios of one solution. The registries are shared by the scenarios whose unit definitions
+    are identical, such that the default registry is only copied once for each distinct set of unit definitions.
+    """
+
+    def __init__(self, default_ureg: pint.UnitRegistry) -> None:
+        self.default_ureg = default_ureg
+        self._registries: dict[Optional[str], pint.UnitRegistry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, unit_path: str) -> pint.UnitRegistry:
+        """
+        Returns the unit registry with the unit definitions of a scenario.
+
+        :param unit_path: The path of the unit definitions of the scenario.
+        :return: The unit registry of the scenario.
+        """
+        unit_definitions = None
+        if os.path.exists(unit_path):
+            with open(unit_path, "r") as f:
+                unit_definitions = f.read()
+        with self._lock:
+            if unit_definitions not in self._registries:
+                ureg = copy.deepcopy(self.default_ureg)
+                if unit_definitions is not None:
+                    ureg.load_definitions(unit_path)
+                self._registries[unit_definitions] = ureg
+            return self._registries[unit_definitions]
+
 def get_solution_version(scenario: Scenario) -> str:
     """
     Helper-function that checks the version of the solution.
@@ -725,6 +949,12 @@ def get_doc(h5_file: h5py.File,component_name: str,version: str) -> str:
         doc = str(np.char.decode(h5_file[component_name + "/docstring"].attrs.get("value")))
     else:
         doc = h5_file[component_name].attrs["docstring"].decode()
+    return format_doc(doc)
+
+def format_doc(doc: str) -> str:
+    """
+    Helper-function that formats the documentation of a component with one line per entry
+    """
     if ";" in doc and ":" in doc:
         doc = '\n'.join([f'{v.split(":")[0]}: {v.split(":")[1]}' for v in doc.split(";")])
     return doc
@@ -745,7 +975,7 @@ def get_has_units(h5_file: h5py.File,component_name: str,version: str) -> bool:
         raise ValueError(f"Value {has_units} for has_units not supported.")
     return has_units
 
-@cache
+@results_cache.cached(lambda path, *args, **kwargs: os.path.dirname(path))
 def get_df_from_path(path: str, component_name: str, version: str, data_type: Literal["dataframe","units"] = "dataframe",index: Optional[tuple[str]] = None) -> "pd.Series[Any]":
     """
     Helper-function that returns a Pandas series given the path of a file and the
@@ -754,28 +984,12 @@ def get_df_from_path(path: str, component_name: str, version: str, data_type: Li
     if index is None:
         index = tuple()
 
-    if check_if_v1_leq_v2(version,"v0"):
-        pd_read = pd.read_hdf(path, component_name + f"/{data_type}")
+    if os.path.isdir(path):
+        pd_read = read_parquet_component(path, component_name, data_type, index)
     else:
-        with pd.HDFStore(path) as store:
-            info = store.info()
-        is_table_format = 'typ->appendable' in next(k for k in info.splitlines()[2:] if k.startswith('/' + component_name)).split()[2]
-        if not is_table_format and len(index) > 0:
-            print(f"The index cannot be extracted, because file {path}/{component_name} is not in table format.")
-        if data_type == "dataframe":
-            if is_table_format:
-                pd_read = pd.read_hdf(path, component_name,where=index)
-            else:
-                pd_read = pd.read_hdf(path, component_name)
-            if isinstance(pd_read, pd.DataFrame):
-                pd_read = pd_read["value"]
-        elif data_type == "units":
-            if is_table_format:
-                pd_read = pd.read_hdf(path, component_name,where=index)["units"]
-            else:
-                pd_read = pd.read_hdf(path, component_name)["units"]
-        else:
-            raise ValueError(f"Data type {data_type} not supported.")
+        # the HDF5 files are read one at a time, since the HDF5 library is not thread-safe
+        with hdf_store_pool.lock:
+            pd_read = _read_hdf_component(path, component_name, version, data_type, index)
 
     if isinstance(pd_read, pd.DataFrame):
         ans = pd_read.squeeze()
@@ -791,6 +1005,269 @@ def get_df_from_path(path: str, component_name: str, version: str, data_type: Li
 
     return ans
 
+def _read_hdf_component(path: str, component_name: str, version: str, data_type: Literal["dataframe","units"], index: tuple[str]) -> "pd.DataFrame | pd.Series[Any]":
+    """
+    Helper-function that reads the values or the units of a component from a hdf5 file.
+    """
+    if check_if_v1_leq_v2(version,"v0"):
+        return pd.read_hdf(path, component_name + f"/{data_type}")
+    store = hdf_store_pool.get(path)
+    is_table_format = get_storage_format(path, component_name, store) == "table"
+    if not is_table_format and len(index) > 0:
+        print(f"The index cannot be extracted, because file {path}/{component_name} is not in table format.")
+    if data_type not in ["dataframe", "units"]:
+        raise ValueError(f"Data type {data_type} not supported.")
+    if is_table_format:
+        # the units are read without the values
+        columns = ["units"] if data_type == "units" else None
+        pd_read = store.select(component_name, where=index, columns=columns)
+    else:
+        pd_read = store.get(component_name)
+    if data_type == "units":
+        pd_read = pd_read["units"]
+        # the dictionary-encoded units are decoded to a categorical series
+        units_dictionary = get_units_dictionary(path, component_name, store)
+        if units_dictionary is not None:
+            pd_read = pd.Series(pd.Categorical.from_codes(pd_read.to_numpy(), categories=units_dictionary), index=pd_read.index, name="units")
+    elif isinstance(pd_read, pd.DataFrame):
+        pd_read = pd_read["value"]
+
+    return pd_read
+
+def get_metadata_index(folder: str) -> dict[str, dict[str, dict[str, Any]]]:
+    """
+    Helper-function that returns the metadata index of the results in a folder, which is written by the postprocessing.
+    Returns an empty dictionary for results without an index.
+    """
+    index_path = os.path.join(folder, "metadata_index.json")
+    if not os.path.exists(index_path):
+        return {}
+    return _read_metadata_index(index_path, os.path.getmtime(index_path))
+
+@lru_cache(maxsize=256)
+def _read_metadata_index(index_path: str, mtime: float) -> dict[str, dict[str, dict[str, Any]]]:
+    """
+    Helper-function that reads the metadata index. The modification time is part of the cache key, such that a rewritten index is read again.
+    The number of cached indices is bounded, since every rewrite of an index adds a new key.
+    """
+    with open(index_path, "r") as f:
+        return json.load(f)
+
+def get_storage_format(path: str, component_name: str, store: pd.HDFStore) -> str:
+    """
+    Helper-function that returns the storage format ("table" or "fixed") of a component in a file. The format is taken
+    from the metadata index if available, otherwise the file is probed.
+    """
+    metadata_index = get_metadata_index(os.path.dirname(path))
+    file_metadata = metadata_index.get(os.path.basename(path), {})
+    if component_name in file_metadata:
+        return file_metadata[component_name]["format"]
+    return "table" if store.get_storer(component_name).is_table else "fixed"
+
+def get_mf_folders(path: str) -> dict[int | str, str]:
+    """
+    Helper-function that returns the subfolders of the foresight steps of a scenario with rolling horizon, keyed by the
+    year of the step. Subfolders with non-numeric suffixes are keyed by the suffix.
+    """
+    pattern = re.compile(r'^MF_\d+(_.*)?$')
+    mf_folders: dict[int | str, str] = {}
+    for subfolder_name in sorted(os.listdir(path)):
+        if not pattern.match(subfolder_name):
+            continue
+        mf_idx = subfolder_name.replace("MF_", "")
+        mf_folders[int(mf_idx) if mf_idx.isnumeric() else mf_idx] = subfolder_name
+    return mf_folders
+
+def get_decision_horizons(optimized_years: list[int]) -> dict[int, tuple[int, ...]]:
+    """
+    Helper-function that returns the years of the decision horizon of each foresight step, i.e., the years until the next step.
+    """
+    decision_horizons = {}
+    for year, next_year in zip(optimized_years, optimized_years[1:] + [optimized_years[-1] + 1]):
+        decision_horizons[year] = tuple(range(year, next_year))
+    return decision_horizons
+
+def get_level_mask(index: pd.Index, level_name: str, selected_values: np.ndarray) -> np.ndarray:
+    """
+    Helper-function that returns the boolean mask of the rows whose value of an index level is in the selected values.
+    For a multi-index, the mask is computed for the distinct values of the level and gathered with the codes of the level.
+    """
+    if isinstance(index, pd.MultiIndex):
+        level = index.names.index(level_name)
+        level_mask = index.levels[level].isin(selected_values)
+        codes = index.codes[level]
+        # missing values have the code -1 and are not selected
+        return np.append(level_mask, False)[codes]
+    return index.isin(selected_values)
+
+def get_stitched_path(path: str, component: Component, mf_folders: dict[int | str, str]) -> Optional[str]:
+    """
+    Helper-function that returns the path of the stitched results of a component of a scenario with rolling horizon,
+    which are written during the postprocessing. Returns None if the component was not stitched or the results of a
+    foresight step were written after the stitched results.
+    """
+    stitched_folder = os.path.join(path, "stitched")
+    index_path = os.path.join(stitched_folder, "metadata_index.json")
+    if not os.path.exists(index_path):
+        return None
+    if component.name not in get_metadata_index(stitched_folder).get(component.file_name, {}):
+        return None
+    stitched_time = os.path.getmtime(index_path)
+    for subfolder_name in mf_folders.values():
+        result_file_name = get_result_file_name(os.path.join(path, subfolder_name), component.file_name)
+        if result_file_name is not None and os.path.getmtime(os.path.join(path, subfolder_name, result_file_name)) > stitched_time:
+            return None
+    return os.path.join(stitched_folder, component.file_name)
+
+def get_result_file_name(folder: str, file_name: str) -> Optional[str]:
+    """
+    Helper-function that returns the name of the result file of a component type in a folder, i.e., the hdf5 file or the
+    folder of the Parquet dataset. If both exist, the more recently written one is returned. Returns None if neither exists.
+    """
+    candidates = [name for name in [file_name, file_name.removesuffix(".h5")] if os.path.exists(os.path.join(folder, name))]
+    if len(candidates) == 0:
+        return None
+    return max(candidates, key=lambda name: os.path.getmtime(os.path.join(folder, name)))
+
+def get_parquet_metadata_index(folder: str) -> dict[str, dict[str, Any]]:
+    """
+    Helper-function that returns the metadata of the components of a Parquet dataset, either from the metadata index
+    or from the footers of the files.
+    """
+    metadata_index = get_metadata_index(os.path.dirname(folder))
+    if os.path.basename(folder) in metadata_index:
+        return metadata_index[os.path.basename(folder)]
+    import pyarrow.parquet as pq
+    components = {}
+    for file_name in sorted(os.listdir(folder)):
+        if not file_name.endswith(".parquet"):
+            continue
+        metadata = pq.read_schema(os.path.join(folder, file_name)).metadata
+        metadata = {key.decode(): value.decode() for key, value in metadata.items()}
+        components[metadata["name"]] = {
+            "index_names": metadata["index_names"].split(","),
+            "docstring": metadata["docstring"],
+            "has_units": bool(int(metadata["has_units"])),
+        }
+    return components
+
+def read_parquet_component(folder: str, component_name: str, data_type: Literal["dataframe","units"], index: tuple[str]) -> "pd.Series[Any]":
+    """
+    Helper-function that reads a component of a Parquet dataset. Only the needed columns are read from the memory-mapped
+    file, and the slicing index is pushed down to the reader, such that row groups without matching rows are skipped.
+    The dictionary-encoded units are read as a categorical series.
+    """
+    import pyarrow.parquet as pq
+    if data_type not in ["dataframe", "units"]:
+        raise ValueError(f"Data type {data_type} not supported.")
+    file_path = os.path.join(folder, f"{component_name}.parquet")
+    schema = pq.read_schema(file_path, memory_map=True)
+    index_columns = [name for name in schema.names if name not in ["value", "units"]]
+    column = "units" if data_type == "units" else "value"
+    expression, remaining_conditions = get_parquet_filter(index, schema)
+    table = pq.read_table(file_path, columns=index_columns + [column], filters=expression, memory_map=True)
+    df = table.to_pandas().set_index(index_columns)
+    index_names = schema.metadata[b"index_names"].decode().split(",")
+    df.index.names = [None if name == "None" else name for name in index_names]
+    # a condition that cannot be evaluated by pandas either raises an error instead of being ignored
+    for condition in remaining_conditions:
+        df = df.query(condition)
+    return df[column]
+
+def get_parquet_filter(index: tuple[str], schema: "pa.Schema") -> tuple[Optional["ds.Expression"], list[str]]:
+    """
+    Helper-function that converts the slicing index, which is formatted for pytables, to a filter expression of pyarrow.
+    The values are cast to the type of the column. The conditions that cannot be converted are returned as well, such
+    that they are applied to the dataframe after reading.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    expression = None
+    remaining_conditions = []
+    for condition in index:
+        match = re.fullmatch(r"\s*(\S+)\s+(==|in)\s+(.+?)\s*", condition)
+        if match is None or match.group(1) not in schema.names:
+            logging.warning(f"The index {condition} cannot be pushed down to the Parquet reader and is applied after reading the file.")
+            remaining_conditions.append(condition)
+            continue
+        name, operator, value = match.groups()
+        try:
+            values = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            values = value
+        if operator == "==" or not isinstance(values, (list, tuple)):
+            values = [values]
+        column_type = schema.field(name).type
+        if pa.types.is_integer(column_type):
+            values = [int(value) for value in values]
+        elif pa.types.is_floating(column_type):
+            values = [float(value) for value in values]
+        else:
+            values = [str(value) for value in values]
+        condition_expression = ds.field(name).isin(values)
+        expression = condition_expression if expression is None else expression & condition_expression
+    return expression, remaining_conditions
+
+def get_units_dictionary(path: str, component_name: str, store: pd.HDFStore) -> Optional[list[str]]:
+    """
+    Helper-function that returns the distinct units of a component, whose codes are stored in the units column. Returns
+    None if the units are stored as strings, i.e., for results written before the units were dictionary-encoded.
+    """
+    metadata_index = get_metadata_index(os.path.dirname(path))
+    file_metadata = metadata_index.get(os.path.basename(path), {})
+    if component_name in file_metadata and "units_dictionary" in file_metadata[component_name]:
+        return file_metadata[component_name]["units_dictionary"]
+    units_dictionary = getattr(store.get_storer(component_name).attrs, "units_dictionary", None)
+    if units_dictionary is None:
+        return None
+    return units_dictionary.split(";")
+
+class HDFStorePool():
+    """
+    Pool of open HDF stores, such that the files are not reopened for every component. The least recently used store is
+    closed if more than max_open stores are open. The HDF5 library is not thread-safe, the stores must only be accessed
+    while holding the lock of the pool. The lock is shared by all files, since HDF5 is not safe for concurrent calls even
+    on different files, so concurrent reads of hdf5 results are serialized.
+    """
+
+    def __init__(self, max_open: int = 128) -> None:
+        self.max_open = max_open
+        self._stores: dict[str, tuple[pd.HDFStore, float]] = {}
+        self.lock = threading.RLock()
+
+    def get(self, path: str) -> pd.HDFStore:
+        """
+        Returns the open store of a file and opens it if necessary. The store is reopened if the file was rewritten.
+        """
+        path = os.path.abspath(path)
+        mtime = os.path.getmtime(path)
+        with self.lock:
+            store, store_mtime = self._stores.pop(path, (None, None))
+            if store is not None and (not store.is_open or store_mtime != mtime):
+                store.close()
+                store = None
+            if store is None:
+                store = pd.HDFStore(path, mode="r")
+            # the most recently used store is the last one
+            self._stores[path] = (store, mtime)
+            while len(self._stores) > self.max_open:
+                oldest_path = next(iter(self._stores))
+                self._stores.pop(oldest_path)[0].close()
+            return store
+
+    def close(self, path: Optional[str] = None) -> None:
+        """
+        Closes the store of a file, e.g., before the file is rewritten, or all open stores if no path is given.
+        """
+        with self.lock:
+            paths = list(self._stores) if path is None else [os.path.abspath(path)]
+            for path in paths:
+                if path in self._stores:
+                    self._stores.pop(path)[0].close()
+
+hdf_store_pool = HDFStorePool()
+atexit.register(hdf_store_pool.close)
+
 def _get_time_steps_file(scenario):
     """
     Helper-function that returns the name of the time steps file of a scenario.
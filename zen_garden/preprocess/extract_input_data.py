@@ -52,6 +52,28 @@ class DataInput:
         :param subelement: string specifying dependent element
         :return: dictionary with attribute values """
 
+        # read the extracted input data from the cache if it is unchanged
+        input_data_cache = self.energy_system.optimization_setup.input_data_cache
+        if input_data_cache is not None:
+            index_list, _ = self.construct_index_list(index_sets, time_steps if time_steps else "set_base_time_steps")
+            cache_key = input_data_cache.get_key(self, file_name, index_list, unit_category, time_steps, subelement)
+            df_output = input_data_cache.load(self, file_name, cache_key, subelement)
+            if df_output is not None:
+                return df_output
+            df_output = self._extract_input_data(file_name, index_sets, unit_category, time_steps, subelement)
+            input_data_cache.save(self, file_name, cache_key, df_output)
+            return df_output
+        return self._extract_input_data(file_name, index_sets, unit_category, time_steps, subelement)
+
+    def _extract_input_data(self, file_name, index_sets, unit_category, time_steps, subelement):
+        """ reads input data and restructures the dataframe to return (multi)indexed dict, see extract_input_data
+
+        :param file_name: name of selected file.
+        :param index_sets: index sets of attribute
+        :param unit_category: dict defining the dimensions of the parameter's unit
+        :param time_steps: string specifying time_steps
+        :param subelement: string specifying dependent element
+        :return: dictionary with attribute values """
         # generic time steps
         yearly_variation = False
         if not time_steps:
@@ -371,6 +393,19 @@ class DataInput:
     def extract_yearly_variation(self, file_name, index_sets):
         """ reads the yearly variation of a time dependent quantity
 
+        :param file_name: name of selected file.
+        :param index_sets: index sets of attribute. Creates (multi)index. Corresponds to order in pe.Set/pe.Param
+        """
+        input_data_cache = self.energy_system.optimization_setup.input_data_cache
+        if input_data_cache is not None:
+            input_data_cache.call(self, f"{file_name}_yearly_variation", lambda: self._extract_yearly_variation(file_name, index_sets),
+                                  key_args=index_sets, attributes=[(self, f"{file_name}_yearly_variation")])
+            return
+        self._extract_yearly_variation(file_name, index_sets)
+
+    def _extract_yearly_variation(self, file_name, index_sets):
+        """ reads the yearly variation of a time dependent quantity, see extract_yearly_variation
+
         :param file_name: name of selected file.
         :param index_sets: index sets of attribute. Creates (multi)index. Corresponds to order in pe.Set/pe.Param
         """
@@ -398,6 +433,20 @@ class DataInput:
     def extract_locations(self, extract_nodes=True, extract_coordinates=False):
         """ reads input data to extract nodes or edges.
 
+        :param extract_nodes: boolean to switch between nodes and edges
+        :param extract_coordinates: boolean to switch between nodes and nodes + coordinates
+        """
+        input_data_cache = self.energy_system.optimization_setup.input_data_cache
+        if input_data_cache is not None:
+            # the selected nodes are set in the system if none are configured
+            key_args = {"extract_nodes": extract_nodes, "extract_coordinates": extract_coordinates, "set_nodes": list(self.system.set_nodes)}
+            return input_data_cache.call(self, "locations", lambda: self._extract_locations(extract_nodes, extract_coordinates),
+                                         key_args=key_args, attributes=[(self.system, "set_nodes")])
+        return self._extract_locations(extract_nodes, extract_coordinates)
+
+    def _extract_locations(self, extract_nodes, extract_coordinates):
+        """ reads input data to extract nodes or edges, see extract_locations
+
         :param extract_nodes: boolean to switch between nodes and edges
         :param extract_coordinates: boolean to switch between nodes and nodes + coordinates
         """
@@ -513,7 +562,24 @@ class DataInput:
         """ reads input data and restructures the dataframe to return (multi)indexed dict
 
         :return pwa_dict: dictionary with pwa parameters """
-        attribute_name = "capex_specific_conversion"
+        input_data_cache = self.energy_system.optimization_setup.input_data_cache
+        if input_data_cache is not None:
+            pwa_capex = input_data_cache.call(self, "nonlinear_capex", self.extract_nonlinear_capex, attributes=[(self.element, "units_nonlinear_capex_files")])
+        else:
+            pwa_capex = self.extract_nonlinear_capex()
+        if pwa_capex is not None:
+            return pwa_capex
+        # linear
+        is_pwa = False
+        linear_dict = {}
+        linear_dict["capex"] = self.extract_input_data("capex_specific_conversion", index_sets=["set_nodes", "set_time_steps_yearly"],
+                                                       time_steps="set_time_steps_yearly", unit_category={"money": 1, "energy_quantity": -1, "time": 1})
+        return linear_dict, is_pwa
+
+    def extract_nonlinear_capex(self):
+        """ reads the nonlinear capex file and restructures it to the pwa parameters or linear capex, see extract_pwa_capex
+
+        :return pwa_dict: dictionary with pwa parameters, None if there is no nonlinear capex file """
         index_sets = ["set_nodes", "set_time_steps_yearly"]
         time_steps = "set_time_steps_yearly"
         unit_category = {"money": 1, "energy_quantity": -1, "time": 1}
@@ -594,13 +660,7 @@ class DataInput:
             else:
                 raise NotImplementedError(
                     f"There are both linearly and nonlinearly modeled variables in capex of {self.element.name}. Not yet implemented")
-        # linear
-        else:
-            is_pwa = False
-            linear_dict = {}
-            linear_dict["capex"] = self.extract_input_data(attribute_name, index_sets=index_sets,
-                                                           time_steps=time_steps, unit_category=unit_category)
-            return linear_dict, is_pwa
+        return None
 
     def read_pwa_capex_files(self):
         """ reads pwa files
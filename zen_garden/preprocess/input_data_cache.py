@@ -0,0 +1,235 @@
+"""
+On-disk cache of the extracted input data. The cache stores the fully extracted, unit-converted and interpolated
+input data of each element attribute, so that a re-run on unchanged data skips reading the csv files. The yearly
+variations, the piecewise affine capex and the nodes and edges are cached as well.
+The cache entries are keyed by the content of the source files and the relevant configuration.
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+import warnings
+
+import pandas as pd
+import pint
+from filelock import FileLock
+from tables import NaturalNameWarning
+
+# content hashes of files, keyed by path, size and modification time
+_file_hashes = {}
+
+
+def hash_file(file_path):
+    """ returns the content hash of a file. The hash is memorized as long as the file is not modified
+
+    :param file_path: path of the file
+    :return: hex digest of the file content """
+    stat = os.stat(file_path)
+    key = (str(file_path), stat.st_size, stat.st_mtime_ns)
+    if key not in _file_hashes:
+        with open(file_path, "rb") as file:
+            _file_hashes[key] = hashlib.sha1(file.read()).hexdigest()
+    return _file_hashes[key]
+
+
+def hash_folder(folder_path):
+    """ returns a hash of the content of all files in a folder
+
+    :param folder_path: path of the folder
+    :return: hex digest of the folder content """
+    folder_hash = hashlib.sha1()
+    for file_name in sorted(os.listdir(folder_path)):
+        file_path = os.path.join(folder_path, file_name)
+        if os.path.isfile(file_path):
+            folder_hash.update(file_name.encode())
+            folder_hash.update(hash_file(file_path).encode())
+    return folder_hash.hexdigest()
+
+
+def hash_object(obj):
+    """ returns a hash of a json serializable object
+
+    :param obj: object to hash
+    :return: hex digest of the object """
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class InputDataCache:
+    """
+    Class to cache the extracted input data of the elements on disk
+    """
+    def __init__(self, optimization_setup):
+        """ initializes the input data cache
+
+        :param optimization_setup: The OptimizationSetup the cache is part of """
+        self.optimization_setup = optimization_setup
+        self.folder = optimization_setup.analysis.folder_input_data_cache
+        os.makedirs(self.folder, exist_ok=True)
+        # hash of the configuration that influences the extracted input data
+        config = {
+            "system": optimization_setup.system.model_dump(),
+            "header_data_inputs": optimization_setup.analysis.header_data_inputs.model_dump(),
+            "earliest_year_of_data": optimization_setup.analysis.earliest_year_of_data,
+            "rounding_decimal_points_units": optimization_setup.solver.rounding_decimal_points_units,
+        }
+        self.config_hash = hash_object(config)
+        # the unit definitions and base units are stored in the energy system folder
+        self.energy_system_hash = hash_folder(optimization_setup.paths["energy_system"]["folder"])
+        self.folder_hashes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, data_input, file_name, index_list, unit_category, time_steps, subelement):
+        """ returns the key of a cache entry
+
+        :param data_input: DataInput object of the element
+        :param file_name: name of the extracted attribute
+        :param index_list: list of indices of the extracted attribute
+        :param unit_category: dict defining the dimensions of the parameter's unit
+        :param time_steps: string specifying time_steps
+        :param subelement: string specifying dependent element
+        :return: key of the cache entry """
+        folder_path = str(data_input.folder_path)
+        if folder_path not in self.folder_hashes:
+            self.folder_hashes[folder_path] = hash_folder(folder_path)
+        element_name = data_input.element.name
+        scenario_dict = data_input.scenario_dict.dict if data_input.scenario_dict is not None else {}
+        key = {
+            "element": element_name,
+            "file_name": file_name,
+            "index_list": index_list,
+            "unit_category": unit_category,
+            "time_steps": time_steps,
+            "subelement": subelement,
+            "scenario": scenario_dict.get(element_name, {}),
+            "folder": self.folder_hashes[folder_path],
+            "energy_system": self.energy_system_hash,
+            "config": self.config_hash,
+        }
+        return hash_object(key)
+
+    def get_path(self, data_input, file_name, key):
+        """ returns the path of a cache entry
+
+        :param data_input: DataInput object of the element
+        :param file_name: name of the extracted attribute
+        :param key: key of the cache entry
+        :return: path of the cache entry """
+        return os.path.join(self.folder, f"{data_input.element.name}_{file_name}_{key}.h5")
+
+    def load(self, data_input, file_name, key, subelement):
+        """ loads a cache entry and restores the side effects of the extraction on the element
+
+        :param data_input: DataInput object of the element
+        :param file_name: name of the extracted attribute
+        :param key: key of the cache entry
+        :param subelement: string specifying dependent element
+        :return: extracted input data, None if not cached """
+        path = self.get_path(data_input, file_name, key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        with FileLock(path + ".lock"):
+            with pd.HDFStore(path, mode="r") as store:
+                df_output = store["data"]
+                metadata = store.get_storer("data").attrs.metadata
+                yearly_variation = store["yearly_variation"] if "/yearly_variation" in store.keys() else None
+                year_specific_ts = {year: store[f"year_specific_ts_{year}"] for year in metadata["year_specific_ts"]}
+        # restore the units of the element
+        units = self._deserialize_units(metadata["units"], data_input.unit_handling.ureg)
+        if units is not None:
+            if subelement is not None and file_name in data_input.element.units:
+                data_input.element.units[file_name].update(units)
+            else:
+                data_input.element.units[file_name] = units
+        if yearly_variation is not None:
+            setattr(data_input, f"{file_name}_yearly_variation", yearly_variation)
+        for year, df_year in year_specific_ts.items():
+            if year not in self.optimization_setup.year_specific_ts:
+                self.optimization_setup.year_specific_ts[year] = {}
+            self.optimization_setup.year_specific_ts[year][(data_input.element._name, file_name)] = df_year
+        self.hits += 1
+        return df_output
+
+    def save(self, data_input, file_name, key, df_output):
+        """ saves a cache entry together with the side effects of the extraction on the element
+
+        :param data_input: DataInput object of the element
+        :param file_name: name of the extracted attribute
+        :param key: key of the cache entry
+        :param df_output: extracted input data """
+        path = self.get_path(data_input, file_name, key)
+        units = self._serialize_units(data_input.element.units.get(file_name))
+        year_specific_ts = {}
+        for year, dict_year in self.optimization_setup.year_specific_ts.items():
+            if (data_input.element._name, file_name) in dict_year:
+                year_specific_ts[year] = dict_year[(data_input.element._name, file_name)]
+        metadata = {"units": units, "year_specific_ts": list(year_specific_ts.keys())}
+        with FileLock(path + ".lock"):
+            with warnings.catch_warnings():
+                warnings.filterwarnings("ignore", category=NaturalNameWarning)
+                warnings.filterwarnings("ignore", category=pd.errors.PerformanceWarning)
+                with pd.HDFStore(path, mode="w") as store:
+                    store.put("data", df_output)
+                    store.get_storer("data").attrs.metadata = metadata
+                    if hasattr(data_input, f"{file_name}_yearly_variation"):
+                        store.put("yearly_variation", getattr(data_input, f"{file_name}_yearly_variation"))
+                    for year, df_year in year_specific_ts.items():
+                        store.put(f"year_specific_ts_{year}", df_year)
+
+    def call(self, data_input, name, function, key_args=None, attributes=()):
+        """ returns the result of an extraction that is not an element attribute read by extract_input_data, e.g., the
+        piecewise affine capex or the edges, from the cache, or runs the extraction and caches its result
+
+        :param data_input: DataInput object of the element
+        :param name: name of the extraction
+        :param function: function without arguments that runs the extraction
+        :param key_args: json serializable arguments of the extraction that are not part of the configuration
+        :param attributes: tuples of an object and an attribute name that the extraction sets
+        :return: result of the extraction """
+        key = self.get_key(data_input, name, key_args, None, None, None)
+        path = os.path.join(self.folder, f"{data_input.element.name}_{name}_{key}.pkl")
+        if os.path.exists(path):
+            with FileLock(path + ".lock"):
+                result, attribute_values = pd.read_pickle(path)
+            # restore the attributes that were set by the extraction
+            for obj, attribute_name in attributes:
+                if attribute_name in attribute_values:
+                    setattr(obj, attribute_name, attribute_values[attribute_name])
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = function()
+        attribute_values = {attribute_name: getattr(obj, attribute_name) for obj, attribute_name in attributes if hasattr(obj, attribute_name)}
+        with FileLock(path + ".lock"):
+            pd.to_pickle((result, attribute_values), path)
+        return result
+
+    def _serialize_units(self, units):
+        """ converts the pint quantities in the units of an attribute to strings, since they are bound to a unit registry
+
+        :param units: units of the attribute
+        :return: serializable units """
+        if isinstance(units, dict):
+            return {key: self._serialize_units(value) for key, value in units.items()}
+        elif isinstance(units, pint.Quantity):
+            return {"quantity": f"{units.magnitude!r} {units.units}"}
+        return copy.deepcopy(units)
+
+    def _deserialize_units(self, units, ureg):
+        """ converts the serialized units of an attribute back to pint quantities
+
+        :param units: serialized units of the attribute
+        :param ureg: unit registry of the energy system
+        :return: units """
+        if isinstance(units, dict):
+            if units.keys() == {"quantity"}:
+                return ureg(units["quantity"])
+            return {key: self._deserialize_units(value, ureg) for key, value in units.items()}
+        return units
+
+    def log_statistics(self):
+        """ logs the hits and misses of the cache """
+        if self.hits + self.misses > 0:
+            logging.info(f"Input data cache: {self.hits} of {self.hits + self.misses} attributes read from {self.folder}")
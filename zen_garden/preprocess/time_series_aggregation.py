@@ -2,11 +2,15 @@
 Functions to apply time series aggregation to time series
 """
 import copy
+import hashlib
+import os
 
 import pandas as pd
 import numpy as np
 import logging
 import tsam.timeseriesaggregation as tsam
+from filelock import FileLock
+from zen_garden.preprocess.input_data_cache import hash_object
 from zen_garden.model.objects.energy_system import EnergySystem
 from zen_garden.model.objects.element import Element
 from zen_garden.model.objects.technology.technology import Technology
@@ -100,6 +104,23 @@ class TimeSeriesAggregation(object):
         """ this method runs the time series aggregation """
         # substitute column names
         self.substitute_column_names(direction="flatten",year_specific=year_specific)
+        # read the aggregation from the cache if the same time series were aggregated before
+        if self.analysis.time_series_aggregation.use_cache:
+            cache_path = self.get_cache_path()
+            if not self.load_tsa_from_cache(cache_path):
+                self.aggregate_ts()
+                self.save_tsa_to_cache(cache_path)
+        else:
+            self.aggregate_ts()
+        # resubstitute column names
+        self.substitute_column_names(direction="raise")
+        # set aggregated time series
+        if year_specific == None:
+            self.set_aggregated_ts_all_elements()
+            self.conducted_tsa = True
+
+    def aggregate_ts(self):
+        """ this method creates the typical periods of the raw time series with tsam """
         # create aggregation object
         self.aggregation = tsam.TimeSeriesAggregation(timeSeries=self.df_ts_raw, noTypicalPeriods=self.number_typical_periods,
             hoursPerPeriod=self.analysis.time_series_aggregation.hoursPerPeriod, resolution=self.analysis.time_series_aggregation.resolution,
@@ -109,12 +130,48 @@ class TimeSeriesAggregation(object):
         # create typical periods
         self.typical_periods = self.aggregation.createTypicalPeriods().reset_index(drop=True)
         self.set_time_attributes(self.aggregation.clusterPeriodIdx, self.aggregation.clusterPeriodNoOccur, self.aggregation.clusterOrder)
-        # resubstitute column names
-        self.substitute_column_names(direction="raise")
-        # set aggregated time series
-        if year_specific == None:
-            self.set_aggregated_ts_all_elements()
-            self.conducted_tsa = True
+
+    def get_cache_path(self):
+        """ returns the path of the cached aggregation of the raw time series.
+        The key is a hash of the raw time series and the time series aggregation settings
+
+        :return: path of the cache entry """
+        tsa_config = self.analysis.time_series_aggregation
+        key = {
+            "df_ts_raw": hashlib.sha1(pd.util.hash_pandas_object(self.df_ts_raw, index=True).values).hexdigest(),
+            "columns": list(self.df_ts_raw.columns),
+            "number_typical_periods": self.number_typical_periods,
+            "config": {option: tsa_config[option] for option in ["clusterMethod", "solver", "hoursPerPeriod", "extremePeriodMethod",
+                                                                 "rescaleClusterPeriods", "representationMethod", "resolution"]},
+        }
+        os.makedirs(tsa_config.folder_cache, exist_ok=True)
+        return os.path.join(tsa_config.folder_cache, f"tsa_{hash_object(key)}.h5")
+
+    def load_tsa_from_cache(self, cache_path):
+        """ loads the typical periods, the cluster order and the number of occurrences of the typical periods from the cache
+
+        :param cache_path: path of the cache entry
+        :return: True if the aggregation was read from the cache """
+        if not os.path.exists(cache_path):
+            return False
+        with FileLock(cache_path + ".lock"):
+            with pd.HDFStore(cache_path, mode="r") as store:
+                self.typical_periods = store["typical_periods"]
+                cluster_order = store["cluster_order"].to_numpy()
+                cluster_period_no_occur = store["cluster_period_no_occur"].to_dict()
+        logging.info(f"Read time series aggregation from {cache_path}")
+        self.set_time_attributes(np.sort(np.unique(cluster_order)), cluster_period_no_occur, cluster_order)
+        return True
+
+    def save_tsa_to_cache(self, cache_path):
+        """ saves the typical periods, the cluster order and the number of occurrences of the typical periods to the cache
+
+        :param cache_path: path of the cache entry """
+        with FileLock(cache_path + ".lock"):
+            with pd.HDFStore(cache_path, mode="w") as store:
+                store.put("typical_periods", self.typical_periods)
+                store.put("cluster_order", pd.Series(self.sequence_time_steps))
+                store.put("cluster_period_no_occur", pd.Series(self.time_steps_duration))
 
     def set_aggregated_ts_all_elements(self):
         """ this method sets the aggregated time series and sets the necessary attributes after the aggregation """
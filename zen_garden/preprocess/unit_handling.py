@@ -10,6 +10,7 @@ import warnings
 import json
 import os
 import linopy as lp
+from linopy.constants import TERM_DIM
 import re
 import itertools
 from pint import UnitRegistry
@@ -692,25 +693,35 @@ class Scaling:
 
     def initiate_A_matrix(self):
         """
-        Constructs the A matrix and the right hand side of the constraints
+        Constructs the A matrix (scipy.sparse.csr_matrix) and the right hand side of the constraints directly from the labels, variables and coefficients of the constraints.
+        The A matrix is the only copy of the coefficients and is scaled in place, rows and columns are indexed by the constraint and variable labels.
 
         """
-        self.A_matrix = self.model.constraints.to_matrix(filter_missings=False)
-        self.A_matrix_copy = self.A_matrix.copy() #necessary for printing of numerics
-        self.D_r_inv = np.ones(self.A_matrix.get_shape()[0])
-        self.D_c_inv = np.ones(self.A_matrix.get_shape()[1])
-        self.rhs = []
+        n_rows, n_cols = self.model.shape
+        rows, cols, data = [], [], []
+        self.rhs = np.zeros(n_rows)
         for name in self.model.constraints:
             constraint = self.model.constraints[name]
-            labels = constraint.labels.data
-            mask = np.atleast_1d(labels != -2).nonzero()
-            try:
-                self.rhs += constraint.rhs.data[mask].tolist()
-            except:
-                self.rhs += [constraint.rhs.data]
-        self.rhs = np.array(self.rhs) #np.abs(np.array(self.rhs)) -> could get rid of all the other np.ads in iter_sclaing() etc. but then print numerics only includes absolute values
+            labels = constraint.labels
+            vars = constraint.vars.transpose(*labels.dims, TERM_DIM).data
+            coeffs = constraint.coeffs.transpose(*labels.dims, TERM_DIM).data
+            rhs = constraint.rhs.broadcast_like(labels).transpose(*labels.dims).data
+            labels = labels.data
+            mask_rows = labels != -1
+            self.rhs[labels[mask_rows]] = rhs[mask_rows]
+            labels = np.broadcast_to(labels[..., np.newaxis], vars.shape)
+            mask = (labels != -1) & (vars != -1) & (coeffs != 0) & ~np.isnan(coeffs)
+            rows.append(labels[mask])
+            cols.append(vars[mask])
+            data.append(coeffs[mask].astype(float))
+        rows, cols, data = np.concatenate(rows), np.concatenate(cols), np.concatenate(data)
+        # duplicate entries are summed up
+        self.A_matrix = sp.sparse.csr_matrix((data, (rows, cols)), shape=(n_rows, n_cols))
+        del rows, cols, data
+        self.A_matrix.eliminate_zeros()
+        self.D_r_inv = np.ones(n_rows)
+        self.D_c_inv = np.ones(n_cols)
         self.rhs[self.rhs == np.inf] = 0
-        self.rhs_copy = self.rhs.copy() #necessary for printing of numerics
 
     def re_scale(self):
         """
@@ -728,7 +739,6 @@ class Scaling:
         """
         #print numerics if no scaling is activated
         self.initiate_A_matrix()
-        self.A_matrix.eliminate_zeros()
         self.print_numerics(0,True)
 
     def run_scaling(self):
@@ -744,6 +754,32 @@ class Scaling:
         self.scaling_time = t1 - t0 #for benchmarking
         logging.info(f"\nTime to Scale Problem: {t1 - t0:0.1f} seconds\n")
 
+    def store_unscaled_problem(self):
+        """
+        Stores a copy of the data that is overwritten by the scaling, such that the unscaled problem can be restored,
+        e.g., to patch it for the next scenario
+        """
+        self.unscaled_problem = {
+            "variables": {name: (self.model.variables[name].lower.data.copy(), self.model.variables[name].upper.data.copy()) for name in self.model.variables},
+            "constraints": {name: (self.model.constraints[name].coeffs.data.copy(), self.model.constraints[name].rhs.data.copy()) for name in self.model.constraints},
+            "objective": self.model.objective.coeffs.data.copy()
+        }
+
+    def restore_unscaled_problem(self):
+        """
+        Overwrites the scaled data of the optimization problem with the unscaled data stored before the scaling
+        """
+        if getattr(self, "unscaled_problem", None) is None:
+            return
+        for name, (lower, upper) in self.unscaled_problem["variables"].items():
+            self.model.variables[name].lower.data[...] = lower
+            self.model.variables[name].upper.data[...] = upper
+        for name, (coeffs, rhs) in self.unscaled_problem["constraints"].items():
+            self.model.constraints[name].coeffs.data[...] = coeffs
+            self.model.constraints[name].rhs.data = rhs
+        self.model.objective.coeffs.data = self.unscaled_problem["objective"]
+        self.unscaled_problem = None
+
     def replace_data(self, name):
         """
         Replaces the data (coefficients) of the lhs and rhs of the constraint with the scaled data
@@ -813,6 +849,9 @@ l
         """
         #pre-check variables -> skip binary and integer variables
         self.adjust_int_variables()
+        #scaling factors that are currently applied to the A matrix
+        D_r_inv_applied = self.D_r_inv.copy()
+        D_c_inv_applied = self.D_c_inv.copy()
         #adjust scaling factors that have inf or nan values -> not really necessary anymore but might be a good security check
         self.D_c_inv[self.D_c_inv == np.inf] = 1
         self.D_r_inv[self.D_r_inv == np.inf] = 1
@@ -822,7 +861,7 @@ l
         for name_con in self.model.constraints:
             if self.model.constraints[name_con].coeffs.dtype == int:
                 self.adjust_scaling_factors_of_skipped_rows(name_con)
-        self.print_numerics_of_last_iteration()
+        self.print_numerics_of_last_iteration(D_r_inv_applied, D_c_inv_applied)
         #Include adjust upper/lower bounds of variables that are scaled
         self.adjust_upper_lower_bounds_variables()
         #overwrite constraints
@@ -838,22 +877,38 @@ l
         scale_factors = self.D_c_inv[vars]
         self.model.objective.coeffs.data = self.model.objective.coeffs.data * scale_factors
 
-    def get_min(self,A_matrix):
+    def reduce_A(self, ufunc, axis):
         """
-        Gets the minimum values each column or row of the A matrix
+        Reduces the absolute values of each row or column of the A matrix without creating a transposed copy of the matrix.
+        Empty rows and columns are set to 0.
 
-        :param A_matrix: A matrix of the optimization model (scipy.sparse.csr_matrix)
-        :return: minimum values of each column or row (np.array)
+        :param ufunc: numpy ufunc used for the reduction (np.maximum, np.minimum or np.add)
+        :param axis: axis along which the values are reduced (1 for rows, 0 for columns)
+        :return: reduced values of each row or column (np.array)
         """
-        d = A_matrix.data
-        try:
-            mins_values = np.minimum.reduceat(np.abs(d), A_matrix.indptr[:-1])
-        except: #necessary if multiple columns and rows at the end of the matrix without entries -> if not only last entry of indptr is len(data) and therefore out of range
-            last_empty_entries = A_matrix.indptr[A_matrix.indptr == len(d)]
-            non_empty_entries = A_matrix.indptr[A_matrix.indptr < len(d)]
-            mins_values = np.minimum.reduceat(np.abs(d), non_empty_entries)
-            mins_values = np.hstack((mins_values,np.ones((len(last_empty_entries)-1,))))
-        return mins_values
+        abs_data = np.abs(self.A_matrix.data)
+        if axis == 1:
+            indptr = self.A_matrix.indptr
+            non_empty = np.diff(indptr) > 0
+            values = np.zeros(self.A_matrix.shape[0])
+            values[non_empty] = ufunc.reduceat(abs_data, indptr[:-1][non_empty])
+        else:
+            initial = np.inf if ufunc is np.minimum else 0
+            values = np.full(self.A_matrix.shape[1], initial, dtype=float)
+            ufunc.at(values, self.A_matrix.indices, abs_data)
+            values[values == np.inf] = 0
+        return values
+
+    def count_nonzeros(self, axis):
+        """
+        Counts the nonzero entries of each row or column of the A matrix
+
+        :param axis: axis along which the entries are counted (1 for rows, 0 for columns)
+        :return: number of nonzero entries of each row or column (np.array)
+        """
+        if axis == 1:
+            return np.diff(self.A_matrix.indptr)
+        return np.bincount(self.A_matrix.indices, minlength=self.A_matrix.shape[1])
 
     def get_full_geom(self,A_matrix,axis): #Very slow and less effective than simplified geom norm
         """
@@ -874,27 +929,34 @@ l
 
     def update_A(self, vector, axis):
         """
-        Updates the A matrix with the current scaling vector.
+        Updates the A matrix in place with the current scaling vector.
         This function does not overwrite the original optimization model but is used for the scaling process.
 
         :param vector: vector to update current scaling vectors
-        :param axis: axis for which the scaling vector is updated (0 for rows, 1 for columns)
+        :param axis: axis for which the scaling vector is updated (1 for rows, 0 for columns)
 
         """
         if axis == 1:
-            self.A_matrix = sp.sparse.diags(vector, 0, format='csr').dot(self.A_matrix)
+            self.A_matrix.data *= np.repeat(vector, np.diff(self.A_matrix.indptr))
             self.D_r_inv = self.D_r_inv * vector
             self.rhs = self.rhs * vector
         elif axis == 0:
-            self.A_matrix = self.A_matrix.dot(sp.sparse.diags(vector, 0, format='csr'))
+            self.A_matrix.data *= vector[self.A_matrix.indices]
             self.D_c_inv = self.D_c_inv * vector
 
-    def print_numerics_of_last_iteration(self):
+    def print_numerics_of_last_iteration(self, D_r_inv_applied, D_c_inv_applied):
         """
         Prints the numerics of the last iteration of the scaling process.
+        The A matrix and the right hand side are updated in place from the applied scaling factors to the final scaling factors.
+
+        :param D_r_inv_applied: row scaling factors that are applied to the A matrix
+        :param D_c_inv_applied: column scaling factors that are applied to the A matrix
         """
-        self.A_matrix =  sp.sparse.diags(self.D_r_inv, 0, format='csr').dot(self.A_matrix_copy).dot(sp.sparse.diags(self.D_c_inv, 0, format='csr'))
-        self.rhs = self.rhs_copy * self.D_r_inv
+        r_vector = self.D_r_inv / D_r_inv_applied
+        c_vector = self.D_c_inv / D_c_inv_applied
+        self.A_matrix.data *= np.repeat(r_vector, np.diff(self.A_matrix.indptr))
+        self.A_matrix.data *= c_vector[self.A_matrix.indices]
+        self.rhs = self.rhs * r_vector
         self.print_numerics(len(self.algorithm))
 
     def generate_numerics_string(self,label,index=None,A_matrix=None,var=None, is_rhs=False):
@@ -929,21 +991,20 @@ l
         :param cond_number: bool whether the condition number of the A matrix is computed
         :return: numerical range of the A matrix and the right hand side as well as the condition number of the A matrix (if benchmarking_output is True
         """
-        data_coo = self.A_matrix.tocoo()
-        A_abs = np.abs(data_coo.data)
+        A_abs = np.abs(self.A_matrix.data)
         A_abs_nonzero = np.ma.masked_equal(A_abs,0.0,copy=False)
         index_max = np.argmax(A_abs_nonzero)
         index_min = np.argmin(A_abs_nonzero)
-        row_max = data_coo.row[index_max]
-        col_max = data_coo.col[index_max]
-        row_min = data_coo.row[index_min]
-        col_min = data_coo.col[index_min]
+        # rows and columns of the entries in the csr matrix
+        row_max, row_min = np.searchsorted(self.A_matrix.indptr, [index_max, index_min], side="right") - 1
+        col_max = self.A_matrix.indices[index_max]
+        col_min = self.A_matrix.indices[index_min]
         rhs_max_index = np.where(np.abs(self.rhs) == np.max(np.abs(self.rhs)[self.rhs != np.inf]))[0][0]
         rhs_min_index = np.where(np.abs(self.rhs) == np.min(np.abs(self.rhs)[np.abs(self.rhs) > 0]))[0][0]
         #Max Matrix String
-        cons_str_max = self.generate_numerics_string(row_max, index=index_max,A_matrix=data_coo.data,var=col_max)
+        cons_str_max = self.generate_numerics_string(row_max, index=index_max,A_matrix=self.A_matrix.data,var=col_max)
         #Min Matrix String
-        cons_str_min = self.generate_numerics_string(row_min, index=index_min,A_matrix=data_coo.data,var=col_min)
+        cons_str_min = self.generate_numerics_string(row_min, index=index_min,A_matrix=self.A_matrix.data,var=col_min)
         #RHS values
         cons_rhs_max = self.generate_numerics_string(rhs_max_index, is_rhs=True)
         cons_rhs_min = self.generate_numerics_string(rhs_min_index, is_rhs=True)
@@ -983,9 +1044,6 @@ l
         """
         Generates the row and column scaling factors.
         """
-        #transform A matrix to csr matrix for better computational properties
-        self.A_matrix.eliminate_zeros()
-        self.A_matrix = sp.sparse.csr_matrix(self.A_matrix)
         #initiate iteration counter
         i = 0
         self.print_numerics(i)
@@ -994,7 +1052,7 @@ l
             #update row scaling vector
             if algo == "infnorm":
                 #update row scaling vector
-                max_rows = sp.sparse.linalg.norm(self.A_matrix, ord=np.inf, axis=1)
+                max_rows = self.reduce_A(np.maximum, axis=1)
                 if self.include_rhs:
                     max_rows = np.maximum(max_rows, np.abs(self.rhs), out=max_rows, where=self.rhs != np.inf)
                 max_rows[max_rows == 0] = 1 #to avoid warning outputs
@@ -1003,7 +1061,7 @@ l
                 #update A and row scaling matrix
                 self.update_A(r_vector,1)
                 #update column scaling vector
-                max_cols = sp.sparse.linalg.norm(self.A_matrix, ord=np.inf, axis=0)
+                max_cols = self.reduce_A(np.maximum, axis=0)
                 max_cols[max_cols == 0] = 1 #to avoid warning outputs
                 c_vector = 1/max_cols
                 c_vector = np.power(2, np.round(np.emath.logn(2, c_vector)))
@@ -1016,8 +1074,8 @@ l
 
             elif algo == "geom":
                 # update row scaling vector
-                max_rows = sp.sparse.linalg.norm(self.A_matrix, ord=np.inf, axis=1)
-                min_rows = self.get_min(self.A_matrix)
+                max_rows = self.reduce_A(np.maximum, axis=1)
+                min_rows = self.reduce_A(np.minimum, axis=1)
                 if self.include_rhs:
                     max_rows = np.maximum(max_rows, np.abs(self.rhs), out=max_rows, where=self.rhs != np.inf)
                     min_rows = np.minimum(min_rows,np.abs(self.rhs),out =min_rows, where=np.abs(self.rhs)>0)
@@ -1028,8 +1086,8 @@ l
                 # update A and row scaling matrix
                 self.update_A(r_vector,1)
                 # update column scaling vector
-                max_cols = sp.sparse.linalg.norm(self.A_matrix, ord=np.inf, axis=0)
-                min_cols = self.get_min(self.A_matrix.tocsc())
+                max_cols = self.reduce_A(np.maximum, axis=0)
+                min_cols = self.reduce_A(np.minimum, axis=0)
                 geom = (max_cols * min_cols) ** 0.5
                 geom[geom == 0] = 1 #to avoid warning outputs
                 c_vector = 1 / geom
@@ -1042,16 +1100,17 @@ l
 
             elif algo == "arithm":
                 #update row scaling vector
-                mean_rows = sp.sparse.linalg.norm(self.A_matrix, ord=1, axis=1)/(np.diff(self.A_matrix.indptr)+np.ones(self.A_matrix.get_shape()[0]))
+                mean_rows = self.reduce_A(np.add, axis=1)/(self.count_nonzeros(axis=1)+1)
                 if self.include_rhs:
-                    mean_rows = mean_rows + np.abs(self.rhs)/(np.diff(self.A_matrix.indptr)+np.ones(self.A_matrix.get_shape()[0]))
+                    mean_rows = mean_rows + np.abs(self.rhs)/(self.count_nonzeros(axis=1)+1)
                 mean_rows[mean_rows == 0] = 1 #to avoid warning outputs
                 c_vector = 1/mean_rows
                 c_vector = np.power(2, np.round(np.emath.logn(2, c_vector)))
                 #update A and row scaling matrix
                 self.update_A(c_vector,1)
                 #update column scaling vector
-                mean_cols = sp.sparse.linalg.norm(self.A_matrix, ord=1, axis=0)/np.diff(self.A_matrix.tocsc().indptr)
+                nonzeros_cols = self.count_nonzeros(axis=0)
+                mean_cols = np.divide(self.reduce_A(np.add, axis=0), nonzeros_cols, out=np.zeros(self.A_matrix.shape[1]), where=nonzeros_cols > 0)
                 mean_cols[mean_cols == 0] = 1 #to avoid warning outputs
                 r_vector = 1/mean_cols
                 r_vector = np.power(2, np.round(np.emath.logn(2, r_vector)))
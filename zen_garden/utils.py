@@ -5,14 +5,18 @@ import json
 import logging
 import os
 import sys
+import threading
+import time
 import warnings
 import importlib.util
 from collections import defaultdict
+from contextlib import contextmanager
 import re
 from ordered_set import OrderedSet
 import linopy as lp
 import numpy as np
 import pandas as pd
+import psutil
 import xarray as xr
 import shutil
 from copy import deepcopy
@@ -1182,6 +1186,111 @@ class ScenarioUtils:
         return scenarios, elements
 
 
+class Profiler:
+    """
+    Records the elapsed time, the peak memory and the number of created variables, constraints and nonzeros of the phases
+    of the pipeline and of the individual components. The records are nested, i.e., the counts of a record include the
+    counts of the records inside of it
+    """
+
+    def __init__(self, enabled=False, interval=0.01):
+        """ initializes the profiler
+
+        :param enabled: if False, the profiler does not record anything
+        :param interval: interval in seconds at which the resident memory is sampled """
+        self.enabled = enabled
+        self.interval = interval
+        self.records = []
+        self.step = 0
+        self._stack = []
+        self._lock = threading.Lock()
+        self._process = psutil.Process(os.getpid())
+        self._sampler = None
+
+    @contextmanager
+    def profile(self, name, category="phase"):
+        """ context manager which records a phase or component
+
+        :param name: name of the phase or component
+        :param category: category of the record, e.g., phase, rule, variable or constraint
+        :return: the record, which can be extended by additional information """
+        if not self.enabled:
+            yield {}
+            return
+        rss = self._process.memory_info().rss
+        record = {"name": name, "category": category, "step": self.step, "depth": len(self._stack),
+                  "time": 0.0, "peak_rss_mb": 0.0, "rss_increase_mb": 0.0, "variables": 0, "constraints": 0, "nonzeros": 0}
+        # the resident memory in bytes at the start and the peak of the open record
+        frame = {"record": record, "start_rss": rss, "peak_rss": rss}
+        with self._lock:
+            self._stack.append(frame)
+            # the memory is sampled as long as a record is open
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, daemon=True)
+                self._sampler.start()
+        t0 = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["time"] = time.perf_counter() - t0
+            rss = self._process.memory_info().rss
+            with self._lock:
+                self._stack.pop()
+                frame["peak_rss"] = max(frame["peak_rss"], rss)
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent["peak_rss"] = max(parent["peak_rss"], frame["peak_rss"])
+                    for key in ["variables", "constraints", "nonzeros"]:
+                        parent["record"][key] += record[key]
+            record["rss_increase_mb"] = (rss - frame["start_rss"]) / 1024 ** 2
+            record["peak_rss_mb"] = frame["peak_rss"] / 1024 ** 2
+            self.records.append(record)
+
+    def count(self, variables=0, constraints=0, nonzeros=0):
+        """ adds the number of created variables, constraints and nonzeros to the innermost record
+
+        :param variables: number of variables
+        :param constraints: number of constraints
+        :param nonzeros: number of nonzeros """
+        if self.enabled and self._stack:
+            record = self._stack[-1]["record"]
+            record["variables"] += int(variables)
+            record["constraints"] += int(constraints)
+            record["nonzeros"] += int(nonzeros)
+
+    def pop_records(self):
+        """ returns the records that were completed since the last call and removes them from the profiler
+
+        :return: list of records """
+        records = self.records
+        self.records = []
+        return records
+
+    def log_slowest(self, records, n):
+        """ logs a table of the slowest components
+
+        :param records: list of records
+        :param n: number of components in the table """
+        components = [record for record in records if record["category"] != "phase"]
+        if not components or n <= 0:
+            return
+        df = pd.DataFrame(components).sort_values("time", ascending=False).head(n)
+        df = df[["name", "category", "time", "peak_rss_mb", "variables", "constraints", "nonzeros"]].round(3)
+        logging.info(f"\n--- {len(df)} slowest components ---\n{df.to_string(index=False)}")
+
+    def _sample(self):
+        """ samples the resident memory and updates the peak memory of the open records """
+        while True:
+            time.sleep(self.interval)
+            rss = self._process.memory_info().rss
+            with self._lock:
+                if not self._stack:
+                    self._sampler = None
+                    return
+                for frame in self._stack:
+                    frame["peak_rss"] = max(frame["peak_rss"], rss)
+
+
 class OptimizationError(RuntimeError):
     """
     Exception raised when the optimization problem is infeasible